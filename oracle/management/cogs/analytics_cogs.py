@@ -0,0 +1,182 @@
+"""Module with cogs related to rank analytics."""
+
+import logging
+import math
+import time
+
+import nextcord
+import numpy as np
+from asgiref.sync import sync_to_async
+from nextcord.ext import commands
+
+from player_tracker.models import GuildMember, RiotAccount
+from player_tracker.services.analytics.trend import TrendReport, compute_trends
+from player_tracker.services.riot.constants import QueueType
+from player_tracker.services.summoner.service import SummonerService
+
+logger = logging.getLogger("nextcord")
+
+GUILD_TARGETS = {"server", "guild"}
+MAX_TREND_DAYS = 365
+TOP_CLIMBERS = 5
+
+
+def _format_days(days: float) -> str:
+    """Format an ETA in days."""
+    if math.isnan(days):
+        return "-"
+    if days < 1:
+        return "< 1 day"
+    return f"~{days:.0f} days"
+
+
+def _format_rate(rate: float) -> str:
+    """Format a win rate."""
+    return "-" if math.isnan(rate) else f"{rate:.0%}"
+
+
+class TrendCog(commands.Cog):
+    """LP trends of players and servers."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self._summoner_service: SummonerService = bot.summoner_service
+
+    @commands.command(name="trend")
+    async def trend(
+        self, ctx: commands.Context, target: str | None = None, days: int = 14
+    ) -> None:
+        """Show LP trend, win rate, activity and next tier ETA.
+
+        Usage:
+            !trend [name#tag|server] [days]
+            Example: !trend, !trend Faker#KR1 30, !trend server 7
+        """
+        days = max(1, min(days, MAX_TREND_DAYS))
+        if target is not None and target.lower() in GUILD_TARGETS:
+            await self._send_guild_trend(ctx, days)
+            return
+
+        if target is None:
+            profile = await self._summoner_service.find_profile(
+                discord_id=str(ctx.author.id)
+            )
+        elif "#" in target:
+            name, tagline = (part.strip() for part in target.split("#", 1))
+            profile = await self._summoner_service.find_profile(
+                name=name, tagline=tagline
+            )
+        else:
+            await ctx.send("Wrong account format\nExample: summoner_name#tagline")
+            return
+        if profile is None:
+            await ctx.send("❌ This player is not tracked, use `!register` first")
+            return
+
+        report = await sync_to_async(compute_trends)(
+            [profile.account_id], QueueType.RANKED_SOLO.value, days
+        )
+        metrics = report.row(profile.account_id)
+        if metrics is None:
+            await ctx.send(f"No ranked activity in the last {days} days")
+            return
+
+        account = profile.account
+        # NaN when the player was unranked at either end of the window.
+        lp_delta = metrics["lp_delta"]
+        if math.isnan(lp_delta):
+            color = nextcord.Color.light_grey()
+        elif lp_delta >= 0:
+            color = nextcord.Color.green()
+        else:
+            color = nextcord.Color.red()
+        embed = nextcord.Embed(
+            title=f"📈 {account.summoner_name}#{account.tagline}, last {days} days",
+            color=color,
+        )
+        embed.add_field(
+            name="LP",
+            value="-" if math.isnan(lp_delta) else f"{lp_delta:+.0f}",
+            inline=True,
+        )
+        embed.add_field(
+            name="Games",
+            value=f"{metrics['games']} ({metrics['games_per_day']:.1f}/day)",
+            inline=True,
+        )
+        embed.add_field(
+            name="Win rate", value=_format_rate(metrics["win_rate"]), inline=True
+        )
+        embed.add_field(
+            name="Next tier",
+            value=_format_days(metrics["next_tier_eta_days"]),
+            inline=True,
+        )
+        await ctx.send(embed=embed)
+
+    async def _send_guild_trend(self, ctx: commands.Context, days: int) -> None:
+        """Summarize the trends of every player registered in the server."""
+        if ctx.guild is None:
+            await ctx.send("Server trends are only available in a server")
+            return
+        members = GuildMember.objects.filter(guild_id=str(ctx.guild.id)).values(
+            "profile__account_id"
+        )
+        started = time.perf_counter()
+        report: TrendReport = await sync_to_async(compute_trends)(
+            members, QueueType.RANKED_SOLO.value, days
+        )
+        logger.debug(
+            "Server trend of %d players computed in %.1fms",
+            len(report),
+            (time.perf_counter() - started) * 1000,
+        )
+        active = report.games > 0
+        if not active.any():
+            await ctx.send(f"Nobody in this server played ranked in {days} days")
+            return
+
+        games = int(report.games.sum())
+        games_per_day = float(report.games_per_day[active].mean())
+        climbers = np.argsort(-np.nan_to_num(report.lp_delta, nan=-np.inf))[
+            :TOP_CLIMBERS
+        ]
+        names = await sync_to_async(dict)(
+            RiotAccount.objects.filter(
+                pk__in=report.account_ids[climbers].tolist()
+            ).values_list("pk", "summoner_name")
+        )
+
+        embed = nextcord.Embed(
+            title=f"📈 {ctx.guild.name}, last {days} days",
+            color=nextcord.Color.blue(),
+        )
+        embed.add_field(name="Active players", value=str(int(active.sum())))
+        embed.add_field(
+            name="Games",
+            value=f"{games} ({games_per_day:.1f}/day each)",
+        )
+        embed.add_field(
+            name="Win rate", value=_format_rate(float(report.wins.sum()) / games)
+        )
+        # Players unranked at either end of the window have no LP/day.
+        lp_per_day = report.lp_per_day[active]
+        lp_per_day = lp_per_day[~np.isnan(lp_per_day)]
+        embed.add_field(
+            name="Median LP/day",
+            value=f"{float(np.median(lp_per_day)):+.1f}"
+            if lp_per_day.size
+            else "not enough data",
+        )
+        embed.add_field(
+            name="Top climbers",
+            value="\n".join(
+                f"{names.get(int(report.account_ids[i]), '?')}: "
+                f"{report.lp_delta[i]:+.0f} LP"
+                for i in climbers
+                if not math.isnan(report.lp_delta[i])
+            )
+            or "-",
+            inline=False,
+        )
+        await ctx.send(embed=embed)
@@ -0,0 +1,180 @@
+"""Module with cogs comparing several players at once."""
+
+import logging
+import re
+
+import nextcord
+from nextcord.ext import commands
+
+from oracle.management.cogs.summoner_cogs import RANK_ICONS
+from player_tracker.models import QueueRank
+from player_tracker.services.riot.constants import QueueType, RankScore, Region
+from player_tracker.services.riot.exceptions import (
+    CircuitOpenError,
+    SummonerNotFoundError,
+)
+from player_tracker.services.summoner.service import SummonerService
+from player_tracker.services.summoner.types import PlayerRanks
+
+logger = logging.getLogger("nextcord")
+
+# A Clash roster, and the most a single embed shows comfortably.
+MAX_PLAYERS = 10
+MENTION = re.compile(r"<@!?(\d+)>")
+
+
+def _format_rank(rank: QueueRank | None) -> str:
+    """Format a queue rank on one line."""
+    if rank is None or rank.tier == "UNRANKED":
+        return f"{RANK_ICONS['UNRANKED']} Unranked"
+    tier = f"{RANK_ICONS[rank.tier]} {rank.tier.title()}"
+    if rank.division and rank.tier not in RankScore.APEX_TIERS:
+        tier = f"{tier} {rank.division}"
+    games = rank.wins + rank.losses
+    win_rate = f", {rank.wins / games:.0%} of {games}" if games else ""
+    return f"{tier} {rank.league_points} LP{win_rate}"
+
+
+def _format_score(score: float) -> str:
+    """Format an average score as the rank it falls in."""
+    tier, division, league_points = RankScore.rank_of(round(score))
+    if tier == "UNRANKED":
+        return f"{RANK_ICONS['UNRANKED']} Unranked"
+    if division is None:
+        return f"{RANK_ICONS[tier]} {tier.title()}+ {league_points} LP"
+    return f"{RANK_ICONS[tier]} {tier.title()} {division} {league_points} LP"
+
+
+def _solo_score(player: PlayerRanks) -> int:
+    """Solo/Duo score of a player, for sorting."""
+    rank = player.ranks.get(QueueType.RANKED_SOLO.value)
+    return RankScore.UNRANKED if rank is None else rank.score
+
+
+class CompareCog(commands.Cog):
+    """Side by side ranks of several players."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self._summoner_service: SummonerService = bot.summoner_service
+
+    @commands.command(name="compare")
+    async def compare(self, ctx: commands.Context, *players: str) -> None:
+        """Compare the ranks of several players.
+
+        Usage:
+            !compare <name#tag|@user>... [region]
+            Example: !compare Faker#KR1 Chovy#KR1 kr
+        """
+        await self._send_players(ctx, players, team=False)
+
+    @commands.command(name="team")
+    async def team(self, ctx: commands.Context, *players: str) -> None:
+        """Show a team's ranks and average rank, e.g. a Clash roster.
+
+        Usage:
+            !team <name#tag|@user>... [region]
+            Example: !team @top @jungle Mid#EUW Adc#EUW @support
+        """
+        await self._send_players(ctx, players, team=True)
+
+    async def _resolve(
+        self, players: tuple[str, ...]
+    ) -> tuple[list[tuple[str, str]], Region, list[str]]:
+        """Parse players given as Riot IDs or mentions of registered users.
+
+        Returns:
+            The distinct (name, tagline) to look up, their region and the
+            arguments that could not be resolved.
+        """
+        region = Region.euw
+        if players and players[-1].lower() in Region.__members__:
+            region = Region[players[-1].lower()]
+            players = players[:-1]
+
+        riot_ids: dict[str, tuple[str, str]] = {}
+        unresolved = []
+        for player in players:
+            if match := MENTION.fullmatch(player):
+                profile = await self._summoner_service.find_profile(
+                    discord_id=match.group(1)
+                )
+                if profile is None:
+                    unresolved.append(f"{player} is not registered")
+                    continue
+                name, tagline = profile.account.summoner_name, profile.account.tagline
+            elif "#" in player:
+                name, tagline = (part.strip() for part in player.split("#", 1))
+            else:
+                unresolved.append(f"{player} is not a name#tag")
+                continue
+            riot_ids.setdefault(f"{name}#{tagline}".casefold(), (name, tagline))
+        return list(riot_ids.values()), region, unresolved
+
+    async def _send_players(
+        self, ctx: commands.Context, players: tuple[str, ...], team: bool
+    ) -> None:
+        """Look up players concurrently and send one combined embed."""
+        if not players:
+            await ctx.send(f"Usage: `!{ctx.command.name} name#tag @user ... [region]`")
+            return
+        riot_ids, region, unresolved = await self._resolve(players)
+        if len(riot_ids) > MAX_PLAYERS:
+            await ctx.send(f"❌ At most {MAX_PLAYERS} players at once")
+            return
+
+        async with ctx.typing():
+            results = await self._summoner_service.lookup_many(riot_ids, region)
+
+        found: list[PlayerRanks] = []
+        for (name, tagline), result in zip(riot_ids, results, strict=True):
+            if isinstance(result, PlayerRanks):
+                found.append(result)
+            elif isinstance(result, SummonerNotFoundError):
+                unresolved.append(f"{name}#{tagline} not found in {region.name}")
+            elif isinstance(result, CircuitOpenError):
+                unresolved.append(f"{name}#{tagline}: Riot servers are having issues")
+            else:
+                logger.error("Failed to look up %s#%s: %s", name, tagline, result)
+                unresolved.append(f"{name}#{tagline}: lookup failed")
+
+        embed = self._build_embed(found, unresolved, team)
+        await ctx.send(embed=embed)
+
+    @staticmethod
+    def _build_embed(
+        players: list[PlayerRanks], unresolved: list[str], team: bool
+    ) -> nextcord.Embed:
+        """Build the embed listing players from best to worst Solo/Duo rank."""
+        embed = nextcord.Embed(
+            title="🛡️ Team" if team else "⚔️ Comparison", color=0x2B2D31
+        )
+        players = sorted(players, key=_solo_score, reverse=True)
+        for index, player in enumerate(players, 1):
+            profile = player.profile
+            solo = player.ranks.get(QueueType.RANKED_SOLO.value)
+            flex = player.ranks.get(QueueType.RANKED_FLEX.value)
+            stale = " ⚠️" if player.stale else ""
+            embed.add_field(
+                name=f"{index}. {profile.summoner_name}#{profile.tagline}{stale}",
+                value=f"**Solo:** {_format_rank(solo)}\n**Flex:** {_format_rank(flex)}",
+                inline=False,
+            )
+
+        ranked = [score for score in map(_solo_score, players) if score >= 0]
+        if team and ranked:
+            embed.add_field(
+                name="📊 Average Solo/Duo",
+                value=(
+                    f"{_format_score(sum(ranked) / len(ranked))} "
+                    f"({len(ranked)}/{len(players)} ranked)"
+                ),
+                inline=False,
+            )
+        if unresolved:
+            embed.add_field(
+                name="❌ Skipped", value="\n".join(unresolved)[:1024], inline=False
+            )
+        if any(player.stale for player in players):
+            embed.set_footer(text="⚠️ Could not refresh, showing last known ranks")
+        return embed
@@ -0,0 +1,73 @@
+"""Module with cogs related to guild statistics."""
+
+import logging
+
+import nextcord
+from asgiref.sync import sync_to_async
+from nextcord.ext import commands
+
+from player_tracker.models import SummonerProfile
+from player_tracker.services.guild import stats as guild_stats
+from player_tracker.services.riot.constants import QueueType
+
+logger = logging.getLogger("nextcord")
+
+STATS_QUEUES = {"solo": QueueType.RANKED_SOLO, "flex": QueueType.RANKED_FLEX}
+
+
+class GuildStatsCog(commands.Cog):
+    """Rank distribution of the players registered in a guild."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    @commands.command(name="stats")
+    @commands.guild_only()
+    async def stats(self, ctx: commands.Context, queue: str = "solo") -> None:
+        """Show the rank distribution, average LP and win rate per tier.
+
+        Read from precomputed aggregates, whatever the size of the server.
+
+        Usage:
+            !stats [solo|flex]
+        """
+        if queue not in STATS_QUEUES:
+            await ctx.send(f"Queue must be one of {', '.join(STATS_QUEUES)}")
+            return
+        queue_type = STATS_QUEUES[queue]
+        rows = await sync_to_async(guild_stats.distribution)(
+            str(ctx.guild.id), queue_type.value
+        )
+        if not rows:
+            await ctx.send("Nobody registered in this server has a rank yet")
+            return
+
+        total = sum(row.players for row in rows)
+        embed = nextcord.Embed(
+            title=f"📊 {ctx.guild.name} {queue.title()} ranks",
+            color=nextcord.Color.blue(),
+        )
+        for row in rows:
+            games = row.wins + row.losses
+            win_rate = f"{row.wins / games:.0%}" if games else "-"
+            embed.add_field(
+                name=row.tier.title(),
+                value=(
+                    f"{row.players} players ({row.players / total:.0%})\n"
+                    f"Avg {row.league_points / row.players:.0f} LP • {win_rate} WR"
+                ),
+                inline=True,
+            )
+        embed.set_footer(text=f"{total} players")
+        await ctx.send(embed=embed)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: nextcord.Member) -> None:
+        """Remove a member leaving the guild from its stats."""
+        profile = await SummonerProfile.objects.filter(
+            discord_id=str(member.id)
+        ).afirst()
+        if profile is not None:
+            await sync_to_async(guild_stats.remove_member)(
+                str(member.guild.id), profile
+            )
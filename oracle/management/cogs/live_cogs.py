@@ -0,0 +1,106 @@
+"""Module with cogs related to live games."""
+
+import logging
+import time
+
+import nextcord
+from django.conf import settings
+from nextcord.ext import commands
+
+from player_tracker.services.live.poller import LiveGamePoller, TrackedPlayer
+from player_tracker.services.riot.types import CurrentGameInfoDTO
+from player_tracker.services.static.store import StaticDataStore
+
+logger = logging.getLogger("nextcord")
+
+# Short names of common queues, others use the description from the static data.
+QUEUE_NAMES = {
+    400: "Normal Draft",
+    420: "Ranked Solo/Duo",
+    430: "Normal Blind",
+    440: "Ranked Flex",
+    450: "ARAM",
+    490: "Quickplay",
+    1700: "Arena",
+}
+
+
+def _describe_game(
+    game: CurrentGameInfoDTO, puuid: str, static_data: StaticDataStore
+) -> str:
+    """Describe a game as its queue name, the player's champion and duration."""
+    queue = (
+        QUEUE_NAMES.get(game.gameQueueConfigId)
+        or static_data.queue_name(game.gameQueueConfigId)
+        or game.gameMode.title()
+    )
+    description = queue
+    for participant in game.participants:
+        if participant.puuid == puuid:
+            champion = static_data.champion_name(participant.championId)
+            description = f"{queue} as {champion}"
+            break
+    if game.gameStartTime:
+        minutes = max(0, int(time.time() - game.gameStartTime / 1000) // 60)
+        return f"{description}, {minutes} min"
+    return description
+
+
+class LiveGameCog(commands.Cog):
+    """Commands showing which tracked players are in a game."""
+
+    def __init__(self, bot: commands.Bot, poller: LiveGamePoller) -> None:
+        self.bot = bot
+        self.poller = poller
+        self._static_data: StaticDataStore = bot.static_data
+
+    async def announce_game_start(
+        self, player: TrackedPlayer, game: CurrentGameInfoDTO
+    ) -> None:
+        """Post a message in the announcement channel when a game starts."""
+        if settings.LIVE_ANNOUNCE_CHANNEL_ID is None:
+            return
+        channel = self.bot.get_channel(settings.LIVE_ANNOUNCE_CHANNEL_ID)
+        if channel is None:
+            return
+        mentions = " ".join(f"<@{discord_id}>" for discord_id in player.discord_ids)
+        try:
+            await channel.send(
+                f"🎮 {mentions} ({player.riot_id}) just started a game: "
+                f"{_describe_game(game, player.puuid, self._static_data)}"
+            )
+        except nextcord.HTTPException as e:
+            logger.warning("Failed to announce live game: %s", e)
+
+    @commands.command(name="live")
+    @commands.guild_only()
+    async def live(self, ctx: commands.Context) -> None:
+        """List the members of this server currently in a game.
+
+        Answered from the poller's results, so it never calls the Riot API.
+
+        Usage:
+            !live
+        """
+        lines = []
+        for player in self.poller.live_players():
+            members = [
+                f"<@{discord_id}>"
+                for discord_id in sorted(player.discord_ids)
+                if ctx.guild.get_member(int(discord_id)) is not None
+            ]
+            if members:
+                lines.append(
+                    f"{' '.join(members)} ({player.riot_id}): "
+                    f"{_describe_game(player.game, player.puuid, self._static_data)}"
+                )
+        if not lines:
+            await ctx.send("Nobody from this server is in a game right now")
+            return
+
+        embed = nextcord.Embed(
+            title="🔴 In game right now",
+            description="\n".join(lines),
+            color=nextcord.Color.red(),
+        )
+        await ctx.send(embed=embed, allowed_mentions=nextcord.AllowedMentions.none())
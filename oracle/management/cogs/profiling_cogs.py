@@ -0,0 +1,38 @@
+"""Module with cogs controlling command profiling."""
+
+from nextcord.ext import commands
+
+from player_tracker.services.profiling.profiler import CommandProfiler
+
+
+class ProfilingCog(commands.Cog):
+    """Owner-only commands to sample command profiles at runtime."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self._profiler: CommandProfiler = bot.command_profiler
+
+    @commands.command(name="profiling")
+    @commands.is_owner()
+    async def profiling(self, ctx: commands.Context, rate: float | None = None) -> None:
+        """Show or set the share of commands profiled.
+
+        Usage:
+            !profiling [rate]
+            Example: !profiling 0.05 (profile 5% of commands), !profiling 0 (off)
+        """
+        if rate is not None:
+            if not 0 <= rate <= 1:
+                await ctx.send("Rate must be between 0 and 1")
+                return
+            self._profiler.sample_rate = rate
+            if rate == 0:
+                self._profiler.flush()
+        await ctx.send(f"Profiling {self._profiler.sample_rate:.1%} of commands")
+
+    @commands.command(name="profiling_flush")
+    @commands.is_owner()
+    async def profiling_flush(self, ctx: commands.Context) -> None:
+        """Write buffered command profiles to disk."""
+        self._profiler.flush()
+        await ctx.send("Command profiles flushed")
@@ -1,17 +1,55 @@
 """Module with cogs related to summoner actions."""
 
 import logging
+from collections.abc import Awaitable, Callable
+from contextvars import Token
+from datetime import timedelta
 
 import nextcord
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from nextcord.ext import commands
 
-from player_tracker.services.riot.constants import Region
-from player_tracker.services.riot.exceptions import RiotAPIError, SummonerNotFoundError
-from player_tracker.services.summoner.service import SummonerProfile, SummonerService
+from player_tracker.models import QueueRank, RiotAccount
+from player_tracker.services.guild import stats as guild_stats
+from player_tracker.services.ladder.index import LadderIndex
+from player_tracker.services.profiling.profiler import CommandProfiler, span
+from player_tracker.services.refresh import queue as refresh_queue
+from player_tracker.services.riot.constants import QueueType, Region
+from player_tracker.services.riot.exceptions import (
+    CircuitOpenError,
+    RiotAPIError,
+    SummonerNotFoundError,
+)
+from player_tracker.services.summoner.service import SummonerService
+from player_tracker.services.summoner.types import ScoutedProfile
 
 logger = logging.getLogger("nextcord")
 
+# Replies through ``Context.send`` for prefix commands and through the
+# interaction followup for slash commands, which both take content and embed.
+Send = Callable[..., Awaitable[object]]
+
+RANK_ICONS = {
+    "IRON": "⚔️",
+    "BRONZE": "🟫",
+    "SILVER": "⚪",
+    "GOLD": "🟡",
+    "PLATINUM": "💠",
+    "EMERALD": "🟢",
+    "DIAMOND": "💎",
+    "MASTER": "🟣",
+    "GRANDMASTER": "🔴",
+    "CHALLENGER": "🏆",
+    "UNRANKED": "❔",
+}
+
+# Queues shown in rank embeds, with their field title and peak rank label.
+EMBED_QUEUES = (
+    (QueueType.RANKED_SOLO, "🎮 Solo/Duo Queue", "Solo"),
+    (QueueType.RANKED_FLEX, "👥 Flex Queue", "Flex"),
+)
+
 
 class SummonerProfileCog(commands.Cog):
     """Handles summoner profile related commands."""
@@ -19,6 +57,33 @@ class SummonerProfileCog(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self._summoner_service: SummonerService = bot.summoner_service
+        self._profiler: CommandProfiler = bot.command_profiler
+        self._ladder_index: LadderIndex = bot.ladder_index
+        self._profile_tokens: dict[int, Token] = {}
+
+    async def cog_before_invoke(self, ctx: commands.Context) -> None:
+        """Start profiling the command if it is sampled."""
+        token = self._profiler.start(ctx.command.qualified_name)
+        if token is not None:
+            self._profile_tokens[ctx.message.id] = token
+
+    async def cog_after_invoke(self, ctx: commands.Context) -> None:
+        """Record the command's profile, if it was sampled."""
+        self._profiler.finish(self._profile_tokens.pop(ctx.message.id, None))
+
+    async def cog_application_command_before_invoke(
+        self, interaction: nextcord.Interaction
+    ) -> None:
+        """Start profiling the slash command if it is sampled."""
+        token = self._profiler.start(f"/{interaction.application_command.name}")
+        if token is not None:
+            self._profile_tokens[interaction.id] = token
+
+    async def cog_application_command_after_invoke(
+        self, interaction: nextcord.Interaction
+    ) -> None:
+        """Record the slash command's profile, if it was sampled."""
+        self._profiler.finish(self._profile_tokens.pop(interaction.id, None))
 
     @commands.command(name="register")
     async def register(
@@ -30,31 +95,67 @@ class SummonerProfileCog(commands.Cog):
             !register <account_identification> [region]
             Example: !register Faker KR
         """
+        guild_id = str(ctx.guild.id) if ctx.guild is not None else None
+        await self._register(
+            ctx.send, str(ctx.author.id), guild_id, account_identification, region
+        )
+
+    @nextcord.slash_command(name="register", description="Register your League account")
+    async def register_slash(
+        self,
+        interaction: nextcord.Interaction,
+        riot_id: str = nextcord.SlashOption(description="Your Riot ID, e.g. name#tag"),
+        region: str = nextcord.SlashOption(
+            choices=list(Region.__members__), default="euw", required=False
+        ),
+    ) -> None:
+        """Register your League account, answering once Riot replied."""
+        await interaction.response.defer()
+        guild_id = str(interaction.guild_id) if interaction.guild_id else None
+        await self._register(
+            interaction.followup.send,
+            str(interaction.user.id),
+            guild_id,
+            riot_id,
+            region,
+        )
+
+    async def _register(
+        self,
+        send: Send,
+        discord_id: str,
+        guild_id: str | None,
+        account_identification: str,
+        region: str,
+    ) -> None:
+        """Register a user's account and answer through ``send``."""
         try:
             account_parts = account_identification.split("#")
             if len(account_parts) < 2:
-                await ctx.send("Wrong account format\nExample: summoner_name#tagline")
+                await send("Wrong account format\nExample: summoner_name#tagline")
                 return
 
             account_name = account_parts[0].strip()
             account_tagline = account_parts[1].strip()
-            await self._summoner_service.update_summoner_profile(
-                discord_id=str(ctx.author.id),
+            profile = await self._summoner_service.update_summoner_profile(
+                discord_id=discord_id,
                 name=account_name,
                 tagline=account_tagline,
                 region=Region[region],
             )
+            if guild_id is not None:
+                await sync_to_async(guild_stats.add_member)(guild_id, profile)
 
-            await ctx.send("Successfully registered account")
+            await send("Successfully registered account")
 
         except SummonerNotFoundError:
-            await ctx.send(
+            await send(
                 f"Could not find summoner {account_identification} in {region}. "
                 "Please check the name and region."
             )
-        except Exception as e:
-            print("Failed to register summoner: ", e)
-            await ctx.send(
+        except Exception:
+            logger.exception("Failed to register summoner")
+            await send(
                 "An error occurred while registering your summoner. "
                 "Please try again later."
             )
@@ -63,159 +164,241 @@ class SummonerProfileCog(commands.Cog):
         name="rank",
     )
     async def get_rank(
-        self, ctx: commands.Context, account_identification: str | None = None
+        self,
+        ctx: commands.Context,
+        account_identification: str | None = None,
+        region: str = "euw",
     ) -> None:
         """Check your current rank or another player's rank.
 
+        Players nobody registered are looked up without being tracked.
+
         Args:
             ctx: Command context
             account_identification: Optional summoner name with tag (e.g. name#tag)
+            region: Region of an untracked player, defaults to euw
         """
+        await self._rank(ctx.send, str(ctx.author.id), account_identification, region)
+
+    @nextcord.slash_command(
+        name="rank", description="Check your current rank or another player's rank"
+    )
+    async def rank_slash(
+        self,
+        interaction: nextcord.Interaction,
+        riot_id: str | None = nextcord.SlashOption(
+            description="Riot ID of another player, e.g. name#tag",
+            required=False,
+            default=None,
+        ),
+        region: str = nextcord.SlashOption(
+            description="Region of an untracked player",
+            choices=list(Region.__members__),
+            default="euw",
+            required=False,
+        ),
+    ) -> None:
+        """Check a rank, acknowledging at once and answering when data arrives."""
+        await interaction.response.defer()
+        await self._rank(
+            interaction.followup.send, str(interaction.user.id), riot_id, region
+        )
+
+    async def _rank(
+        self,
+        send: Send,
+        discord_id: str,
+        account_identification: str | None,
+        region: str,
+    ) -> None:
+        """Show a tracked or scouted player's rank through ``send``."""
         try:
             if account_identification is not None:
                 account_parts = account_identification.split("#")
                 name, tagline = account_parts[0].strip(), account_parts[1].strip()
-                try:
-                    # Check if already registered
-                    profile = await sync_to_async(SummonerProfile.objects.get)(
-                        summoner_name=name, tagline=tagline
-                    )
-                except SummonerProfile.DoesNotExist:
-                    # Register if not found
-                    await self.register(ctx, account_identification)
-                    profile = await sync_to_async(SummonerProfile.objects.get)(
-                        summoner_name=name, tagline=tagline
-                    )
+                profile = await self._summoner_service.find_profile(
+                    name=name, tagline=tagline
+                )
+                if profile is None:
+                    await self._send_scouted_rank(send, name, tagline, region)
+                    return
             else:
-                profile = await sync_to_async(SummonerProfile.objects.get)(
-                    discord_id=ctx.author.id
+                profile = await self._summoner_service.find_profile(
+                    discord_id=discord_id
                 )
-            routing_value = profile.server_region[1:-1].split(",")[0][1:-1]
-            platform_value = profile.server_region[1:-1].split(",")[1][2:-1]
+                if profile is None:
+                    await send(
+                        "❌ You haven't registered your summoner profile yet. "
+                        "Use `!register <summoner_name> <tagline>` to register."
+                    )
+                    return
+            # Accounts people look at get refreshed more often.
+            self._summoner_service.record_query(profile.account)
+            # Profiles are kept fresh by the refresh worker, only hit Riot when
+            # the stored data is too old.
+            stale = False
             try:
-                profile = await self._summoner_service.update_summoner_profile(
-                    discord_id=profile.discord_id,
-                    name=profile.summoner_name,
-                    tagline=profile.tagline,
-                    region=Region(routing_value, platform_value),
+                profile = await self._summoner_service.ensure_fresh(
+                    profile, timedelta(seconds=settings.PROFILE_FRESHNESS_SECONDS)
+                )
+            except CircuitOpenError:
+                # Riot is down, serve stored data without waiting on it
+                stale = True
+                checked = profile.account.last_check_timestamp
+                await send(
+                    "⚠️ Riot servers are having issues, showing ranks stale since "
+                    f"{nextcord.utils.format_dt(checked, 'R')}"
                 )
             except (RiotAPIError, SummonerNotFoundError) as e:
                 # Still show old data if update fails
+                stale = True
                 logger.error(f"Failed to update profile: {e}")
-                await ctx.send("⚠️ Could not fetch fresh data, showing last known ranks")
-            rank_icons = {
-                "IRON": "⚔️",
-                "BRONZE": "🟫",
-                "SILVER": "⚪",
-                "GOLD": "🟡",
-                "PLATINUM": "💠",
-                "EMERALD": "🟢",
-                "DIAMOND": "💎",
-                "MASTER": "🟣",
-                "GRANDMASTER": "🔴",
-                "CHALLENGER": "🏆",
-                "UNRANKED": "❔",
-            }
-
-            embed = nextcord.Embed(
-                title=f"{profile.summoner_name}#{profile.tagline}", color=0x2B2D31
+                await send("⚠️ Could not fetch fresh data, showing last known ranks")
+            with span("db"):
+                ranks = await sync_to_async(profile.account.ranks_by_queue)()
+            with span("render"):
+                embed = self._build_rank_embed(profile.account, ranks, stale=stale)
+            with span("send"):
+                await send(embed=embed)
+
+        except Exception:
+            logger.exception("Error fetching rank data")
+            await send(
+                "⚠️ An error occurred while fetching your rank data. "
+                "Please try again later."
             )
 
-            # Solo/Duo Queue stats
-            solo_rank = (
-                f"{rank_icons[profile.current_solo_rank]} {profile.current_solo_rank.title()} {profile.current_solo_division}"
-                if profile.current_solo_division
-                else f"{rank_icons[profile.current_solo_rank]} {profile.current_solo_rank.title()}"
+    async def _send_scouted_rank(
+        self, send: Send, name: str, tagline: str, region: str
+    ) -> None:
+        """Show the rank of a player nobody tracks, from the scouting cache."""
+        if region not in Region.__members__:
+            await send(f"Unknown region {region}")
+            return
+        try:
+            scouted = await self._summoner_service.scout(
+                name, tagline, region=Region[region]
             )
+        except SummonerNotFoundError:
+            await send(
+                f"Could not find summoner {name}#{tagline} in {region}. "
+                "Please check the name and region."
+            )
+            return
+        except CircuitOpenError:
+            await send("⚠️ Riot servers are having issues, try again later")
+            return
+        with span("render"):
+            embed = self._build_rank_embed(scouted, scouted.ranks)
+        with span("send"):
+            await send(embed=embed)
 
-            solo_stats = ""
-            if profile.current_solo_rank != "UNRANKED":
-                solo_stats = (
-                    f"**Rank:** {solo_rank}\n**LP:** {profile.current_solo_lp}\n"
-                )
-                if hasattr(profile, "solo_wins") and hasattr(profile, "solo_losses"):
-                    total_solo_games = profile.solo_wins + profile.solo_losses
-                    wr_solo = (
-                        (profile.solo_wins / total_solo_games * 100)
-                        if total_solo_games > 0
-                        else 0
-                    )
-                    solo_stats += f"**W/L:** {profile.solo_wins}/{profile.solo_losses} ({wr_solo:.1f}%)"
-            else:
-                solo_stats = f"{rank_icons['UNRANKED']} **Unranked**"
+    @staticmethod
+    def _format_queue_rank(rank: QueueRank | None) -> str:
+        """Format the rank, LP and W/L of a queue for an embed field."""
+        if rank is None or rank.tier == "UNRANKED":
+            return f"{RANK_ICONS['UNRANKED']} **Unranked**"
 
-            embed.add_field(name="🎮 Solo/Duo Queue", value=solo_stats, inline=True)
+        tier = f"{RANK_ICONS[rank.tier]} {rank.tier.title()}"
+        if rank.division:
+            tier = f"{tier} {rank.division}"
+        stats = f"**Rank:** {tier}\n**LP:** {rank.league_points}\n"
+        total_games = rank.wins + rank.losses
+        win_rate = (rank.wins / total_games * 100) if total_games > 0 else 0
+        stats += f"**W/L:** {rank.wins}/{rank.losses} ({win_rate:.1f}%)"
+        return stats
 
-            # Add a blank field for spacing
-            embed.add_field(name="\u200b", value="\u200b", inline=True)
+    def _build_rank_embed(
+        self,
+        profile: RiotAccount | ScoutedProfile,
+        ranks: dict[str, QueueRank],
+        stale: bool = False,
+    ) -> nextcord.Embed:
+        """Build the embed showing a player's ranks.
 
-            # Flex Queue stats
-            flex_rank = (
-                f"{rank_icons[profile.current_flex_rank]} {profile.current_flex_rank.title()} {profile.current_flex_division}"
-                if profile.current_flex_division
-                else f"{rank_icons[profile.current_flex_rank]} {profile.current_flex_rank.title()}"
-            )
+        Args:
+            profile: Tracked account or scouted player to show.
+            ranks: The player's queue ranks keyed by queue type.
+            stale: Whether the data could not be refreshed and may be outdated.
+        """
+        embed = nextcord.Embed(
+            title=f"{profile.summoner_name}#{profile.tagline}", color=0x2B2D31
+        )
+        region = (
+            profile.region
+            if isinstance(profile, ScoutedProfile)
+            else Region.from_platform(profile.server_region)
+        )
 
-            flex_stats = ""
-            if profile.current_flex_rank != "UNRANKED":
-                flex_stats = (
-                    f"**Rank:** {flex_rank}\n**LP:** {profile.current_flex_lp}\n"
+        peak_ranks = []
+        for index, (queue, title, label) in enumerate(EMBED_QUEUES):
+            if index:
+                # Add a blank field for spacing
+                embed.add_field(name="\u200b", value="\u200b", inline=True)
+            rank = ranks.get(queue.value)
+            value = self._format_queue_rank(rank)
+            if rank is not None:
+                top = self._ladder_index.top_percent(region, queue.value, rank.score)
+                if top is not None:
+                    share = f"{max(top, 0.01):.3g}%"
+                    value += f"\n**Ladder:** Top {share} of {region.name.upper()}"
+            embed.add_field(name=title, value=value, inline=True)
+            if rank is not None and rank.highest_achieved_tier != "UNRANKED":
+                peak_ranks.append(
+                    f"**{label}:** {RANK_ICONS[rank.highest_achieved_tier]} "
+                    f"{rank.highest_achieved_tier.title()}"
                 )
-                if hasattr(profile, "flex_wins") and hasattr(profile, "flex_losses"):
-                    total_flex_games = profile.flex_wins + profile.flex_losses
-                    wr_flex = (
-                        (profile.flex_wins / total_flex_games * 100)
-                        if total_flex_games > 0
-                        else 0
-                    )
-                    flex_stats += f"**W/L:** {profile.flex_wins}/{profile.flex_losses} ({wr_flex:.1f}%)"
-            else:
-                flex_stats = f"{rank_icons['UNRANKED']} **Unranked**"
 
-            embed.add_field(name="👥 Flex Queue", value=flex_stats, inline=True)
+        if peak_ranks:
+            embed.add_field(name="\u200b", value="\u200b", inline=False)
+            embed.add_field(
+                name="⭐ Peak Ranks", value="\n".join(peak_ranks), inline=False
+            )
 
-            # Peak Ranks (if any exist)
-            peak_ranks = []
-            if profile.highest_achieved_rank_solo != "UNRANKED":
-                peak_ranks.append(
-                    f"**Solo:** {rank_icons[profile.highest_achieved_rank_solo]} "
-                    f"{profile.highest_achieved_rank_solo.title()}"
-                )
-            if profile.highest_achieved_rank_flex != "UNRANKED":
-                peak_ranks.append(
-                    f"**Flex:** {rank_icons[profile.highest_achieved_rank_flex]} "
-                    f"{profile.highest_achieved_rank_flex.title()}"
-                )
+        embed.set_footer(text="⚠️ Stale since" if stale else "Last updated")
+        embed.timestamp = profile.last_check_timestamp
+        return embed
 
-            if peak_ranks:
-                embed.add_field(name="\u200b", value="\u200b", inline=False)
-                embed.add_field(
-                    name="⭐ Peak Ranks", value="\n".join(peak_ranks), inline=False
-                )
+    @commands.command(name="update")
+    async def update_profile(self, ctx: commands.Context) -> None:
+        """Queue a refresh of your profile data.
 
-            embed.set_footer(text="Last updated")
-            embed.timestamp = profile.last_check_timestamp
+        The refresh worker runs the queue, so the job survives bot restarts and
+        asking again only joins the pending job.
+        """
+        await self._update(ctx.send, str(ctx.author.id))
 
-            await ctx.send(embed=embed)
+    @nextcord.slash_command(name="update", description="Queue a refresh of your ranks")
+    async def update_slash(self, interaction: nextcord.Interaction) -> None:
+        """Queue a refresh of your profile data."""
+        await interaction.response.defer(ephemeral=True)
+        await self._update(interaction.followup.send, str(interaction.user.id))
 
-        except SummonerProfile.DoesNotExist:
-            await ctx.send(
+    async def _update(self, send: Send, discord_id: str) -> None:
+        """Queue a refresh of a user's account and answer through ``send``."""
+        profile = await self._summoner_service.find_profile(discord_id=discord_id)
+        if profile is None:
+            await send(
                 "❌ You haven't registered your summoner profile yet. "
                 "Use `!register <summoner_name> <tagline>` to register."
             )
-        except Exception as e:
-            logger.error("Error fetching rank data: %s", str(e))
-            print("oh shit ", e)
-            await ctx.send(
-                "⚠️ An error occurred while fetching your rank data. "
-                "Please try again later."
+            return
+        freshness = timedelta(seconds=settings.PROFILE_FRESHNESS_SECONDS)
+        if self._summoner_service.is_fresh(profile.account, freshness):
+            checked = profile.account.last_check_timestamp
+            await send(
+                "✅ Your profile is already up to date, last updated "
+                f"{nextcord.utils.format_dt(checked, 'R')}"
             )
+            return
 
-    @commands.command(name="update")
-    async def update_profile(self, ctx: commands.Context) -> None:
-        """Force an update of your profile data."""
-        # TODO: Implement once we have the update logic
-        await ctx.send("Profile updating coming soon!")
+        job = await sync_to_async(refresh_queue.enqueue)(
+            profile.account,
+            priority=refresh_queue.USER_PRIORITY,
+            requested_by=discord_id,
+        )
+        position = await sync_to_async(refresh_queue.position)(job)
+        await send(f"🔄 Update queued, position #{position} in the queue")
 
     @commands.command(name="deactivate")
     async def deactivate(self, ctx: commands.Context) -> None:
@@ -0,0 +1,289 @@
+"""End-to-end latency benchmark of the summoner commands."""
+
+import asyncio
+import contextlib
+import itertools
+import random
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from nextcord.ext import commands
+
+from oracle.management.cogs.summoner_cogs import SummonerProfileCog
+from player_tracker.models import QueueRank, RiotAccount, SummonerProfile
+from player_tracker.services.ladder.index import LadderIndex
+from player_tracker.services.profiling.profiler import CommandProfiler
+from player_tracker.services.riot.constants import QueueType, RankScore
+from player_tracker.services.riot.key_pool import DEFAULT_KEY_ID, ApiKey, KeyPool
+from player_tracker.services.riot.rate_limiter import RateLimiter
+from player_tracker.services.riot.service import RiotAPIService
+from player_tracker.services.riot.stub import PUUID_PREFIX, RiotStub
+from player_tracker.services.summoner.index import ProfileIndex
+from player_tracker.services.summoner.service import SummonerService
+
+BENCH_TAGLINE = "BENCH"
+# Discord ids of the simulated users, 20 digits so they never clash with real ones.
+DISCORD_ID_BASE = 10**19
+# statistics.quantiles needs at least two samples.
+MIN_SAMPLES = 2
+# Replies telling the user something went wrong.
+ERROR_PREFIXES = ("⚠️", "❌", "An error", "Could not")
+
+SCENARIOS = {
+    "rank": "!rank of the user's own profile, fresh enough to skip Riot",
+    "lookup": "!rank name#tag of another tracked player",
+    "refresh": "!rank of the user's own profile, refreshed from Riot every time",
+    "scout": "!rank name#tag of an untracked player, looked up on Riot",
+    "register": "!register of a new Riot ID",
+}
+
+
+class FakeContext:
+    """Just enough of ``commands.Context`` to invoke the summoner commands.
+
+    Replies are recorded instead of sent to Discord.
+    """
+
+    _message_ids = itertools.count(1)
+
+    def __init__(self, command: commands.Command, discord_id: int) -> None:
+        self.command = command
+        self.author = SimpleNamespace(id=discord_id)
+        self.guild = None
+        self.message = SimpleNamespace(id=next(self._message_ids))
+        self.sent: list[dict] = []
+
+    async def send(self, content: str | None = None, **kwargs) -> None:
+        """Record a reply."""
+        self.sent.append({"content": content, **kwargs})
+
+    def typing(self) -> contextlib.AbstractAsyncContextManager:
+        """Stand in for the typing indicator."""
+        return contextlib.nullcontext()
+
+    @property
+    def failed(self) -> bool:
+        """Whether any reply reported an error."""
+        return any(
+            (reply["content"] or "").startswith(ERROR_PREFIXES) for reply in self.sent
+        )
+
+
+class Command(BaseCommand):
+    """Django command measuring what commands cost inside the bot.
+
+    Seeds tracked players, then simulated users invoke ``SummonerProfileCog``
+    commands concurrently on one event loop, through the real services and
+    database, with a local stand-in answering for the Riot API. A sampler
+    task measures how late the event loop wakes it up, which is how long
+    blocking work stalls every other command.
+    """
+
+    help = "Runs concurrent simulated users against the summoner commands"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--scenario",
+            choices=sorted(SCENARIOS),
+            default="rank",
+            help="; ".join(f"{name}: {doc}" for name, doc in SCENARIOS.items()),
+        )
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument(
+            "--requests", type=int, default=25, help="Commands run by each user"
+        )
+        parser.add_argument(
+            "--profiles", type=int, default=500, help="Tracked players to seed"
+        )
+        parser.add_argument(
+            "--riot-latency",
+            type=float,
+            default=50.0,
+            help="Response time of the Riot stand-in, in milliseconds",
+        )
+        parser.add_argument(
+            "--rate-limit",
+            action="store_true",
+            help="Apply the API keys' rate limits to the stand-in",
+        )
+        parser.add_argument(
+            "--keys", type=int, default=1, help="API keys the requests are spread over"
+        )
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        self._seed(options["profiles"])
+        overrides = (
+            {"PROFILE_FRESHNESS_SECONDS": 0} if options["scenario"] == "refresh" else {}
+        )
+        try:
+            with override_settings(**overrides):
+                latencies, lags, failed, riot_requests, duration = asyncio.run(
+                    self._run(options)
+                )
+        finally:
+            RiotAccount.objects.filter(puuid__startswith=PUUID_PREFIX).delete()
+        self._report(latencies, lags, failed, riot_requests, duration)
+
+    @staticmethod
+    def _seed(count: int) -> None:
+        """Create tracked players with a Solo/Duo rank, one per simulated user."""
+        RiotAccount.objects.filter(puuid__startswith=PUUID_PREFIX).delete()
+        # Kept away from a running refresh worker, which would call the real Riot.
+        later = timezone.now() + timedelta(days=1)
+        accounts = RiotAccount.objects.bulk_create(
+            RiotAccount(
+                puuid=RiotStub.puuid(f"bench{i}", BENCH_TAGLINE),
+                summoner_id=f"summoner-bench{i}",
+                summoner_name=f"bench{i}",
+                tagline=BENCH_TAGLINE,
+                riot_id_normalized=RiotAccount.normalize_riot_id(
+                    f"bench{i}", BENCH_TAGLINE
+                ),
+                next_refresh_at=later,
+            )
+            for i in range(count)
+        )
+        SummonerProfile.objects.bulk_create(
+            SummonerProfile(discord_id=str(DISCORD_ID_BASE + i), account=account)
+            for i, account in enumerate(accounts)
+        )
+        QueueRank.objects.bulk_create(
+            QueueRank(
+                account=account,
+                queue_type=QueueType.RANKED_SOLO.value,
+                tier="GOLD",
+                division="II",
+                league_points=42,
+                wins=50,
+                losses=45,
+                score=RankScore.of("GOLD", "II", 42),
+            )
+            for account in accounts
+        )
+
+    async def _run(
+        self, options: dict
+    ) -> tuple[list[float], list[float], int, int, float]:
+        """Run the simulated users.
+
+        Returns:
+            Command latencies, event loop lags, failed commands, requests made
+            to the Riot stand-in and the wall time of the run.
+        """
+        stub = RiotStub(latency=options["riot_latency"] / 1000)
+        base_url = await stub.start()
+        # Seeded accounts belong to the default key, the others serve new ones.
+        key_pool = KeyPool(
+            [
+                ApiKey(
+                    f"bench{i}" if i else DEFAULT_KEY_ID,
+                    f"bench{i}",
+                    RateLimiter() if options["rate_limit"] else RateLimiter(()),
+                )
+                for i in range(options["keys"])
+            ]
+        )
+        riot_service = RiotAPIService(base_url=base_url, key_pool=key_pool)
+        profile_index = ProfileIndex()
+        await sync_to_async(profile_index.load)()
+        bot = SimpleNamespace(
+            summoner_service=SummonerService(riot_service, profile_index=profile_index),
+            command_profiler=CommandProfiler(
+                output_dir=Path(settings.COMMAND_PROFILING_DIR), sample_rate=0.0
+            ),
+            ladder_index=LadderIndex(Path(settings.LADDER_DIR)),
+        )
+        cog = SummonerProfileCog(bot)
+
+        latencies: list[float] = []
+        lags: list[float] = []
+        failed = 0
+
+        async def user(number: int) -> None:
+            nonlocal failed
+            for request in range(options["requests"]):
+                command, discord_id, args = self._invocation(
+                    cog, options, number, request
+                )
+                ctx = FakeContext(command, discord_id)
+                started = time.perf_counter()
+                await cog.cog_before_invoke(ctx)
+                try:
+                    await command.callback(cog, ctx, *args)
+                finally:
+                    await cog.cog_after_invoke(ctx)
+                latencies.append(time.perf_counter() - started)
+                failed += ctx.failed
+
+        sampler = asyncio.create_task(self._sample_lag(lags))
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(user(number) for number in range(options["users"])))
+        finally:
+            duration = time.perf_counter() - started
+            sampler.cancel()
+            await riot_service.close()
+            await stub.close()
+        return latencies, lags, failed, stub.requests, duration
+
+    @staticmethod
+    def _invocation(
+        cog: SummonerProfileCog, options: dict, user: int, request: int
+    ) -> tuple[commands.Command, int, tuple[str, ...]]:
+        """Get the command, author and arguments of a user's next command."""
+        scenario = options["scenario"]
+        discord_id = DISCORD_ID_BASE + user % options["profiles"]
+        if scenario == "lookup":
+            other = random.randrange(options["profiles"])
+            return cog.get_rank, discord_id, (f"bench{other}#{BENCH_TAGLINE}",)
+        if scenario == "scout":
+            return cog.get_rank, discord_id, (f"scout{user}x{request}#{BENCH_TAGLINE}",)
+        if scenario == "register":
+            # New users, so registering never moves a seeded profile.
+            discord_id = DISCORD_ID_BASE + options["profiles"] + user
+            return cog.register, discord_id, (f"new{user}x{request}#{BENCH_TAGLINE}",)
+        return cog.get_rank, discord_id, ()
+
+    @staticmethod
+    async def _sample_lag(lags: list[float], interval: float = 0.01) -> None:
+        """Record how late the event loop runs a task due every ``interval``."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    def _report(
+        self,
+        latencies: list[float],
+        lags: list[float],
+        failed: int,
+        riot_requests: int,
+        duration: float,
+    ) -> None:
+        """Print throughput, failures and latency and lag percentiles."""
+        self.stdout.write(
+            f"Commands: {len(latencies)} in {duration:.2f}s "
+            f"({len(latencies) / duration:.0f}/s), {failed} failed, "
+            f"{riot_requests} Riot requests"
+        )
+        for label, samples in (("Latency", latencies), ("Loop lag", lags)):
+            if len(samples) < MIN_SAMPLES:
+                continue
+            percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+            self.stdout.write(
+                f"{label} ms: "
+                f"p50={percentiles[49] * 1000:.2f} "
+                f"p95={percentiles[94] * 1000:.2f} "
+                f"p99={percentiles[98] * 1000:.2f} "
+                f"max={max(samples) * 1000:.2f}"
+            )
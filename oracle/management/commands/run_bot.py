@@ -1,14 +1,32 @@
 """Bot responsible for communicating with backend and Discord server."""
 
+import asyncio
 import logging
+import time
+from pathlib import Path
 
 import nextcord
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import DatabaseError
 from nextcord.ext import commands
 
-from oracle.management.cogs import summoner_cogs
+from oracle.management.cogs import (
+    analytics_cogs,
+    compare_cogs,
+    guild_cogs,
+    live_cogs,
+    profiling_cogs,
+    summoner_cogs,
+)
+from player_tracker.services.ladder.index import LadderIndex
+from player_tracker.services.live.poller import LiveGamePoller
+from player_tracker.services.profiling.profiler import CommandProfiler
+from player_tracker.services.riot.key_pool import KeyPool
 from player_tracker.services.riot.service import RiotAPIService
+from player_tracker.services.static.store import StaticDataStore
+from player_tracker.services.summoner.index import ProfileIndex
 from player_tracker.services.summoner.service import SummonerService
 
 logger = logging.getLogger("nextcord")
@@ -20,24 +38,144 @@ handler.setFormatter(
 logger.addHandler(handler)
 
 
-class OracleBot(commands.Bot):
-    """Main bot class for Oracle."""
+class OracleBot(commands.AutoShardedBot):
+    """Main bot class for Oracle.
+
+    Gateway work is sharded automatically; rank refreshes run in the separate
+    ``run_refresh_worker`` process so they never block this event loop.
+    """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.riot_service: RiotAPIService | None = None
         self.summoner_service: SummonerService | None = None
+        self.profile_index = ProfileIndex()
+        self.ladder_index = LadderIndex(Path(settings.LADDER_DIR))
+        self.static_data = StaticDataStore(Path(settings.STATIC_DATA_DIR))
+        self.command_profiler = CommandProfiler(
+            output_dir=Path(settings.COMMAND_PROFILING_DIR),
+            sample_rate=settings.COMMAND_PROFILING_SAMPLE_RATE,
+        )
+        self._created_at = time.perf_counter()
+        self._setup_done = False
+        self._ready_logged = False
+        self._first_command_logged = False
+        self._command_started: dict[int, float] = {}
+        self._live_task: asyncio.Task | None = None
+        self._static_data_task: asyncio.Task | None = None
+        self._query_flush_task: asyncio.Task | None = None
 
-    async def on_ready(self):
-        """Called when bot is ready."""
-        print(f"Bot ready and logged in as {self.user}")
-        print(settings.RIOT_API_KEY, "WTf")
-        self.riot_service = RiotAPIService(api_key=settings.RIOT_API_KEY)
-        self.summoner_service = SummonerService(self.riot_service)
-        print(self.summoner_service)
+    async def start(self, token: str, *, reconnect: bool = True) -> None:
+        """Run the one-time setup, then log in and connect to the gateway."""
+        await self.setup_hook()
+        await super().start(token, reconnect=reconnect)
+
+    async def setup_hook(self) -> None:
+        """Open the HTTP pool, build the services, warm caches and load cogs.
+
+        Runs once per process, unlike ``on_ready`` which fires again on every
+        gateway reconnect.
+        """
+        if self._setup_done:
+            return
+        started = time.perf_counter()
 
+        self.riot_service = await RiotAPIService.create(
+            key_pool=KeyPool.from_settings(settings.BOT_BUDGET_SHARE),
+        )
+        self.summoner_service = SummonerService(
+            self.riot_service, profile_index=self.profile_index
+        )
+        self._query_flush_task = asyncio.create_task(
+            self.summoner_service.flush_queries_forever(settings.QUERY_FLUSH_SECONDS)
+        )
+        indexed = await sync_to_async(self.profile_index.load)()
+        await asyncio.to_thread(self.static_data.reload)
+        self._static_data_task = asyncio.create_task(
+            self.static_data.watch(settings.STATIC_DATA_RELOAD_SECONDS)
+        )
         self.add_cog(summoner_cogs.SummonerProfileCog(self))
+        self.add_cog(profiling_cogs.ProfilingCog(self))
+        self.add_cog(guild_cogs.GuildStatsCog(self))
+        self.add_cog(analytics_cogs.TrendCog(self))
+        self.add_cog(compare_cogs.CompareCog(self))
+        if settings.LIVE_POLL_ENABLED:
+            self._start_live_poller()
+
+        self._setup_done = True
+        logger.info(
+            "Setup done in %.3fs, %d profiles indexed, static data %s",
+            time.perf_counter() - started,
+            indexed,
+            self.static_data.version,
+        )
+
+    def _start_live_poller(self) -> None:
+        """Run the live game poller on the bot's Riot client and rate budget."""
+        poller = LiveGamePoller(
+            self.riot_service,
+            min_interval=settings.LIVE_POLL_MIN_SECONDS,
+            active_interval=settings.LIVE_POLL_ACTIVE_SECONDS,
+            max_interval=settings.LIVE_POLL_MAX_SECONDS,
+            batch_size=settings.LIVE_POLL_BATCH_SIZE,
+        )
+        cog = live_cogs.LiveGameCog(self, poller)
+        poller.on_game_start = cog.announce_game_start
+        self.add_cog(cog)
+        self._live_task = asyncio.create_task(poller.run_forever())
+        self._live_task.add_done_callback(self._on_live_task_done)
+
+    @staticmethod
+    def _on_live_task_done(task: asyncio.Task) -> None:
+        """Log the live poller stopping other than by cancellation."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Live game poller stopped", exc_info=task.exception())
+
+    async def on_ready(self):
+        """Called when bot is ready, and again after every reconnect."""
+        if not self._ready_logged:
+            self._ready_logged = True
+            logger.info(
+                "Bot ready and logged in as %s after %.2fs",
+                self.user,
+                time.perf_counter() - self._created_at,
+            )
+        else:
+            logger.info("Bot reconnected as %s", self.user)
+
+    async def on_command(self, ctx: commands.Context) -> None:
+        """Record when a command starts, to log the first command's latency."""
+        if not self._first_command_logged:
+            self._command_started[ctx.message.id] = time.perf_counter()
+
+    async def on_command_completion(self, ctx: commands.Context) -> None:
+        """Log the latency of the first command handled by this process."""
+        started = self._command_started.pop(ctx.message.id, None)
+        if started is None or self._first_command_logged:
+            return
+        self._first_command_logged = True
+        self._command_started.clear()
+        logger.info(
+            "First command %s took %.3fs (%.2fs after start)",
+            ctx.command,
+            time.perf_counter() - started,
+            time.perf_counter() - self._created_at,
+        )
+
+    async def close(self) -> None:
+        """Disconnect from Discord and close the shared HTTP pool."""
+        for task in (self._live_task, self._static_data_task, self._query_flush_task):
+            if task is not None:
+                task.cancel()
+        if self.summoner_service is not None:
+            try:
+                await self.summoner_service.flush_queries()
+            except DatabaseError as e:
+                logger.warning("Failed to flush lookup counts: %s", e)
+        await super().close()
+        await RiotAPIService.close_shared_session()
+        self.command_profiler.flush()
 
 
 class Command(BaseCommand):
@@ -45,6 +183,22 @@ class Command(BaseCommand):
 
     help = "Runs the Discord bot"
 
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--shard-count",
+            type=int,
+            default=settings.DISCORD_SHARD_COUNT,
+            help="Total number of shards, defaults to Discord's recommendation",
+        )
+        parser.add_argument(
+            "--shard-ids",
+            type=int,
+            nargs="+",
+            default=None,
+            help="Shards run by this process, requires --shard-count",
+        )
+
     def handle(self, *args, **options):
         """Command execution."""
         intents = nextcord.Intents.default()
@@ -56,6 +210,13 @@ class Command(BaseCommand):
             command_prefix="!",
             intents=intents,
             description="Oracle - League Player Tracker",
+            shard_count=options["shard_count"],
+            shard_ids=options["shard_ids"],
+            # Slash commands register instantly on the development guild, global
+            # registration can take up to an hour to propagate.
+            default_guild_ids=(
+                [int(settings.DISCORD_GUILD_ID)] if settings.DISCORD_GUILD_ID else None
+            ),
         )
         try:
             bot.run(settings.DISCORD_BOT_TOKEN)
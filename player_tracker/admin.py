@@ -1,61 +1,234 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.utils.functional import cached_property
 
-from .models import SummonerProfile
+from .models import QueueRank, RefreshJob, RefreshWorker, RiotAccount, SummonerProfile
+from .services.refresh import queue as refresh_queue
+
+# Below this many rows, an exact COUNT(*) is cheap enough to keep.
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the planner's row estimate for unfiltered large tables.
+
+    An exact ``COUNT(*)`` scans the whole table on PostgreSQL. Filtered lists
+    still get exact counts, they are served by indexes.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        """Estimated number of rows, exact for small or filtered lists."""
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if not query.where and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [query.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row is not None and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+def _refresh_from_riot(
+    modeladmin: admin.ModelAdmin,
+    request: HttpRequest,
+    accounts: QuerySet[RiotAccount],
+) -> None:
+    """Queue refreshes of the accounts, stalest first, for the refresh workers."""
+    limit = settings.ADMIN_REFRESH_MAX_PROFILES
+    selected = list(accounts.order_by("last_check_timestamp")[: limit + 1])
+    skipped = len(selected) > limit
+    selected = selected[:limit]
+
+    for account in selected:
+        refresh_queue.enqueue(account, priority=refresh_queue.USER_PRIORITY)
+    modeladmin.message_user(
+        request,
+        f"Queued {len(selected)} accounts for a refresh from Riot",
+        messages.SUCCESS,
+    )
+    if skipped:
+        modeladmin.message_user(
+            request,
+            f"Only the {limit} stalest selected accounts were queued",
+            messages.WARNING,
+        )
+
+
+class QueueRankInline(admin.TabularInline):
+    model = QueueRank
+    extra = 0
+    fields = (
+        "queue_type",
+        "tier",
+        "division",
+        "league_points",
+        "wins",
+        "losses",
+        "highest_achieved_tier",
+        "updated_at",
+    )
+    readonly_fields = ("updated_at",)
 
 
 # Register your models here.
-@admin.register(SummonerProfile)
-class SummonerProfileAdmin(admin.ModelAdmin):
+@admin.register(RiotAccount)
+class RiotAccountAdmin(admin.ModelAdmin):
     list_display = (
         "summoner_name",
-        "discord_id",
-        "server_region",
-        "current_solo_rank",
-        "current_flex_rank",
-        "is_active",
-    )
-    list_filter = (
+        "tagline",
         "server_region",
-        "current_solo_rank",
-        "current_flex_rank",
-        "is_active",
+        "last_check_timestamp",
     )
+    list_filter = ("server_region",)
+    # Prefix and exact lookups, which can use the indexes of these columns.
     search_fields = (
-        "summoner_name",
-        "discord_id",
-        "puuid",
+        "^riot_id_normalized",
+        "=puuid",
     )
-    readonly_fields = ("last_check_timestamp",)
+    readonly_fields = (
+        "riot_id_normalized",
+        "api_key_id",
+        "last_check_timestamp",
+        "revision_date",
+        "activity",
+        "activity_at",
+    )
+    inlines = (QueueRankInline,)
+    actions = ("refresh_from_riot",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         (
-            "Player Information",
-            {"fields": ("discord_id", "summoner_name", "puuid", "server_region")},
-        ),
-        (
-            "Solo Queue",
+            "Account Information",
             {
                 "fields": (
-                    "current_solo_rank",
-                    "current_solo_division",
-                    "current_solo_lp",
-                    "highest_achieved_rank_solo",
+                    "summoner_name",
+                    "tagline",
+                    "riot_id_normalized",
+                    "puuid",
+                    "summoner_id",
+                    "api_key_id",
+                    "server_region",
                 )
             },
         ),
         (
-            "Flex Queue",
+            "Additional Information",
             {
                 "fields": (
-                    "current_flex_rank",
-                    "current_flex_division",
-                    "current_flex_lp",
-                    "highest_achieved_rank_flex",
+                    "last_check_timestamp",
+                    "revision_date",
+                    "activity",
+                    "activity_at",
+                    "next_refresh_at",
                 )
             },
         ),
-        (
-            "Additional Information",
-            {"fields": ("last_check_timestamp", "is_active")},
-        ),
     )
+
+    @admin.action(description="Refresh selected from Riot")
+    def refresh_from_riot(
+        self, request: HttpRequest, queryset: QuerySet[RiotAccount]
+    ) -> None:
+        """Queue refreshes of the selected accounts."""
+        _refresh_from_riot(self, request, queryset)
+
+
+@admin.register(SummonerProfile)
+class SummonerProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "discord_id",
+        "account",
+        "is_active",
+    )
+    list_filter = (
+        "account__server_region",
+        "is_active",
+    )
+    list_select_related = ("account",)
+    search_fields = (
+        "=discord_id",
+        "^account__riot_id_normalized",
+        "=account__puuid",
+    )
+    raw_id_fields = ("account",)
+    actions = ("refresh_from_riot",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.action(description="Refresh selected from Riot")
+    def refresh_from_riot(
+        self, request: HttpRequest, queryset: QuerySet[SummonerProfile]
+    ) -> None:
+        """Queue refreshes of the selected profiles' accounts, each account once."""
+        _refresh_from_riot(
+            self, request, RiotAccount.objects.filter(profiles__in=queryset).distinct()
+        )
+
+
+@admin.register(QueueRank)
+class QueueRankAdmin(admin.ModelAdmin):
+    list_display = (
+        "account",
+        "queue_type",
+        "tier",
+        "division",
+        "league_points",
+        "highest_achieved_tier",
+    )
+    list_filter = (
+        "queue_type",
+        "tier",
+    )
+    list_select_related = ("account",)
+    search_fields = ("^account__riot_id_normalized", "=account__puuid")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ("account",)
+    readonly_fields = ("score", "updated_at")
+
+
+@admin.register(RefreshJob)
+class RefreshJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "account",
+        "status",
+        "priority",
+        "attempts",
+        "worker_id",
+        "available_at",
+        "leased_until",
+    )
+    list_filter = ("status",)
+    list_select_related = ("account",)
+    search_fields = ("^account__riot_id_normalized", "=account__puuid")
+    ordering = ("status", "-priority", "created_at")
+    show_full_result_count = False
+    raw_id_fields = ("account",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(RefreshWorker)
+class RefreshWorkerAdmin(admin.ModelAdmin):
+    list_display = (
+        "worker_id",
+        "regions",
+        "slots",
+        "refreshed",
+        "failed",
+        "throughput",
+        "heartbeat_at",
+    )
+    ordering = ("regions", "worker_id")
+    # Written by the workers' heartbeats only.
+    readonly_fields = (*list_display, "started_at")
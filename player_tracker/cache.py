@@ -0,0 +1,77 @@
+"""In-process caches."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A rendered response body along with its validators."""
+
+    body: bytes
+    etag: str
+    last_modified: datetime | None
+
+
+class TTLCache[V]:
+    """Bounded LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached values.
+            ttl: Seconds a value stays valid.
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        # Invalidation runs from sync_to_async threads, readers from the event loop.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> V | None:
+        """Get a cached value if present and not expired."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: V) -> None:
+        """Cache a value, evicting the least recently used one if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        """Drop a cached value."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
+
+
+# API responses keyed by request path. Entries are dropped as soon as a profile is
+# saved in this process (see player_tracker.signals); writes made by other
+# processes, such as the refresh worker, are picked up once the TTL expires.
+response_cache = TTLCache[CachedResponse](
+    max_entries=settings.API_CACHE_MAX_ENTRIES, ttl=settings.API_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,120 @@
+"""Benchmark of concurrent writers against RiotAccount."""
+
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from player_tracker.models import RiotAccount
+
+BENCH_PREFIX = "bench-"
+# statistics.quantiles needs at least two samples.
+MIN_SAMPLES = 2
+
+
+class Command(BaseCommand):
+    """Django command measuring write throughput under contention.
+
+    Every writer thread holds its own database connection and repeatedly runs the
+    read-modify-write cycle SummonerService uses, inside a transaction.
+    """
+
+    help = "Runs concurrent writers against RiotAccount and reports contention"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--accounts", type=int, default=100)
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        vendor = connection.vendor
+        if vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+            self.stdout.write(f"Backend: sqlite (journal_mode={journal_mode})")
+        else:
+            self.stdout.write(f"Backend: {vendor}")
+
+        pks = self._seed(options["accounts"])
+        deadline = time.monotonic() + options["duration"]
+        try:
+            with ThreadPoolExecutor(max_workers=options["writers"]) as executor:
+                results = list(
+                    executor.map(
+                        lambda _: self._write_until(deadline, pks),
+                        range(options["writers"]),
+                    )
+                )
+        finally:
+            RiotAccount.objects.filter(puuid__startswith=BENCH_PREFIX).delete()
+
+        latencies = sorted(lat for lats, _ in results for lat in lats)
+        locked = sum(errors for _, errors in results)
+        self._report(latencies, locked, options["duration"])
+
+    @staticmethod
+    def _seed(count: int) -> list[int]:
+        """Create the accounts written to by the benchmark."""
+        RiotAccount.objects.filter(puuid__startswith=BENCH_PREFIX).delete()
+        RiotAccount.objects.bulk_create(
+            RiotAccount(
+                puuid=f"{BENCH_PREFIX}{i}",
+                summoner_name=f"bench{i}",
+                tagline="BENCH",
+                riot_id_normalized=f"bench{i}#bench",
+            )
+            for i in range(count)
+        )
+        return list(
+            RiotAccount.objects.filter(puuid__startswith=BENCH_PREFIX).values_list(
+                "pk", flat=True
+            )
+        )
+
+    @staticmethod
+    def _write_until(deadline: float, pks: list[int]) -> tuple[list[float], int]:
+        """Update random accounts until the deadline.
+
+        Returns:
+            Latencies of successful writes and the number of lock errors.
+        """
+        latencies: list[float] = []
+        locked = 0
+        try:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        account = RiotAccount.objects.get(pk=random.choice(pks))
+                        account.summoner_id = f"bench-{random.getrandbits(64):x}"
+                        account.save()
+                except OperationalError:
+                    locked += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+        return latencies, locked
+
+    def _report(self, latencies: list[float], locked: int, duration: float) -> None:
+        """Print throughput, error and latency statistics."""
+        self.stdout.write(
+            f"Writes: {len(latencies)} ({len(latencies) / duration:.0f}/s)"
+        )
+        self.stdout.write(f"Lock errors: {locked}")
+        if len(latencies) < MIN_SAMPLES:
+            return
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            "Latency ms: "
+            f"p50={percentiles[49] * 1000:.2f} "
+            f"p95={percentiles[94] * 1000:.2f} "
+            f"p99={percentiles[98] * 1000:.2f} "
+            f"max={latencies[-1] * 1000:.2f}"
+        )
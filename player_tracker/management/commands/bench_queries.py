@@ -0,0 +1,334 @@
+"""Benchmark of the hot database queries, with their query plans."""
+
+import json
+import random
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+
+from player_tracker.models import (
+    GuildMember,
+    QueueRank,
+    RankSnapshot,
+    RiotAccount,
+    SummonerProfile,
+)
+from player_tracker.services.analytics.trend import compute_trends
+from player_tracker.services.guild import stats as guild_stats
+from player_tracker.services.refresh.partition import (
+    OTHER_REGIONS,
+    HashRing,
+    Partition,
+)
+from player_tracker.services.refresh.runner import RefreshRunner
+from player_tracker.services.riot.constants import QueueType
+from player_tracker.services.riot.service import RiotAPIService
+from player_tracker.services.summoner.service import SummonerService
+from player_tracker.views import leaderboard_ranks
+
+# Accounts the queries are run against, picked at random.
+SAMPLES = 200
+# statistics.quantiles needs at least two samples.
+MIN_SAMPLES = 2
+PAGE_SIZE = 50
+# Refresh workers the partitioned due accounts query is run for.
+REFRESH_WORKERS = 4
+ADMIN_PAGE_SIZE = 100
+SOLO = QueueType.RANKED_SOLO.value
+# Plan steps worth a look: (kind, marker) for PostgreSQL and for SQLite, whose
+# SCAN lines only read a whole table when no index is used.
+PLAN_WARNINGS = (
+    ("full scan", "Seq Scan"),
+    ("sort", "Sort  ("),
+    ("sort", "USE TEMP B-TREE FOR ORDER BY"),
+)
+
+
+@dataclass(frozen=True)
+class QueryCase:
+    """A database operation of the bot, API or admin, run like its caller does.
+
+    ``max_queries`` is how many statements the operation should take; running
+    more, e.g. one per row, is reported as a likely N+1.
+    """
+
+    name: str
+    run: Callable[[SimpleNamespace], object]
+    max_queries: int = 1
+
+
+def _leaderboard_page(sample: SimpleNamespace, region: str | None = None) -> None:
+    """Read a leaderboard page and serialize its accounts, as the API does."""
+    ranks = leaderboard_ranks(SOLO, region).select_related("account")
+    for rank in ranks.order_by("-score", "pk")[: PAGE_SIZE + 1]:
+        _ = rank.account.summoner_name
+
+
+def _due_accounts(runner: RefreshRunner) -> Callable[[SimpleNamespace], object]:
+    """Load the refresh worker's next batch."""
+    return lambda sample: runner._due_accounts()
+
+
+def _cases() -> list[QueryCase]:
+    """The benchmarked operations."""
+    summoner_service = SummonerService(RiotAPIService(api_key=""))
+    runner = RefreshRunner(summoner_service)
+    workers = [f"bench-{worker}" for worker in range(REFRESH_WORKERS)]
+    partition = Partition()
+    partition.slots = {OTHER_REGIONS: HashRing(workers).slots_of(workers[0])}
+    partitioned_runner = RefreshRunner(summoner_service, partition=partition)
+    return [
+        QueryCase(
+            "profile by discord id",
+            lambda s: (
+                SummonerProfile.objects.select_related("account")
+                .filter(discord_id=s.discord_id)
+                .first()
+            ),
+        ),
+        QueryCase(
+            "profile by riot id",
+            lambda s: (
+                SummonerProfile.objects.select_related("account")
+                .filter(account__riot_id_normalized=s.riot_id)
+                .first()
+            ),
+        ),
+        QueryCase(
+            "account by puuid",
+            lambda s: RiotAccount.objects.filter(puuid=s.puuid).first(),
+        ),
+        QueryCase(
+            "ranks of account",
+            lambda s: RiotAccount(pk=s.account_id).ranks_by_queue(),
+        ),
+        QueryCase("leaderboard page", _leaderboard_page),
+        QueryCase(
+            "leaderboard page by region",
+            lambda s: _leaderboard_page(s, s.region),
+        ),
+        QueryCase(
+            "rank history page",
+            lambda s: list(
+                RankSnapshot.objects.filter(
+                    account_id=s.account_id, queue_type=SOLO
+                ).order_by("-created_at", "-pk")[: PAGE_SIZE + 1]
+            ),
+        ),
+        QueryCase(
+            "guild distribution",
+            lambda s: guild_stats.distribution(s.guild_id, SOLO),
+        ),
+        QueryCase(
+            "guild trend",
+            lambda s: compute_trends(
+                GuildMember.objects.filter(guild_id=s.guild_id).values(
+                    "profile__account_id"
+                ),
+                SOLO,
+            ),
+            max_queries=2,
+        ),
+        QueryCase("refresh due accounts", _due_accounts(runner)),
+        QueryCase("refresh due partition", _due_accounts(partitioned_runner)),
+        QueryCase(
+            "admin accounts by region",
+            lambda s: [
+                str(account)
+                for account in RiotAccount.objects.filter(
+                    server_region=s.region
+                ).order_by("-pk")[:ADMIN_PAGE_SIZE]
+            ],
+        ),
+        QueryCase(
+            "admin account search",
+            lambda s: list(
+                RiotAccount.objects.filter(
+                    riot_id_normalized__istartswith=s.riot_id[:6]
+                ).order_by("-pk")[:ADMIN_PAGE_SIZE]
+            ),
+        ),
+        QueryCase(
+            "admin profiles by region",
+            lambda s: [
+                str(profile.account)
+                for profile in SummonerProfile.objects.select_related("account")
+                .filter(account__server_region=s.region, is_active=True)
+                .order_by("-pk")[:ADMIN_PAGE_SIZE]
+            ],
+        ),
+        QueryCase(
+            "admin ranks by tier",
+            lambda s: [
+                str(rank.account)
+                for rank in QueueRank.objects.select_related("account")
+                .filter(queue_type=SOLO, tier=s.tier)
+                .order_by("-pk")[:ADMIN_PAGE_SIZE]
+            ],
+        ),
+    ]
+
+
+def _explain(sql: str, params: tuple) -> str:
+    """Get the query plan of a statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+def _plan_warnings(plan: str) -> list[str]:
+    """Plan steps reading a whole table or sorting every matched row."""
+    warnings = []
+    for step in map(str.strip, plan.splitlines()):
+        if step.startswith("SCAN ") and " USING " not in step:
+            warnings.append(f"full scan: {step}")
+        warnings.extend(
+            f"{kind}: {step}" for kind, marker in PLAN_WARNINGS if marker in step
+        )
+    return warnings
+
+
+class Command(BaseCommand):
+    """Django command timing hot queries and recording their plans.
+
+    Every operation runs against accounts picked at random, counting the SQL
+    statements it sends so that N+1 patterns show, and the plan of each
+    distinct statement is recorded so that full table scans and sorts show.
+    Run it on a database filled by ``seed_profiles`` to see how queries
+    behave at scale.
+    """
+
+    help = "Times the hot queries and records their EXPLAIN plans"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--case", action="append", help="Only run cases containing this text"
+        )
+        parser.add_argument(
+            "--plans", type=Path, help="Write timings and plans to this JSON file"
+        )
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        samples = self._samples()
+        if not samples:
+            raise CommandError("No profiles to query, run seed_profiles first")
+        cases = [
+            case
+            for case in _cases()
+            if not options["case"] or any(text in case.name for text in options["case"])
+        ]
+        self.stdout.write(
+            f"Backend: {connection.vendor}, "
+            f"{RiotAccount.objects.count()} accounts, "
+            f"{options['repeat']} runs per query"
+        )
+        self.stdout.write(
+            f"{'query':<28} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'queries':>8}"
+        )
+        report = []
+        for case in cases:
+            result = self._bench(case, samples, options["repeat"])
+            report.append(result)
+            latencies = result["latencies"]
+            percentiles = (
+                statistics.quantiles(latencies, n=100, method="inclusive")
+                if len(latencies) >= MIN_SAMPLES
+                else [latencies[0]] * 99
+            )
+            self.stdout.write(
+                f"{case.name:<28} {percentiles[49] * 1000:>8.2f} "
+                f"{percentiles[94] * 1000:>8.2f} {max(latencies) * 1000:>8.2f} "
+                f"{result['queries']:>8}"
+            )
+            if result["queries"] > case.max_queries:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  {result['queries']} queries, expected at most "
+                        f"{case.max_queries}: likely N+1"
+                    )
+                )
+            for statement in result["statements"]:
+                for warning in statement["warnings"]:
+                    self.stdout.write(self.style.WARNING(f"  {warning}"))
+
+        if options["plans"] is not None:
+            options["plans"].write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Plans written to {options['plans']}")
+
+    @staticmethod
+    def _samples() -> list[SimpleNamespace]:
+        """Pick random tracked accounts, with the values the queries look up."""
+        # Random ids rather than ORDER BY RANDOM(), which sorts the whole table.
+        last = SummonerProfile.objects.aggregate(last=Max("pk"))["last"]
+        if not last:
+            return []
+        pks = random.sample(range(1, last + 1), min(SAMPLES, last))
+        profiles = SummonerProfile.objects.select_related("account").filter(pk__in=pks)
+        guilds = dict(
+            GuildMember.objects.filter(profile__in=profiles).values_list(
+                "profile_id", "guild_id"
+            )
+        )
+        tiers = dict(
+            QueueRank.objects.filter(
+                account__profiles__in=profiles, queue_type=SOLO
+            ).values_list("account_id", "tier")
+        )
+        return [
+            SimpleNamespace(
+                discord_id=profile.discord_id,
+                riot_id=profile.account.riot_id_normalized,
+                puuid=profile.account.puuid,
+                account_id=profile.account_id,
+                region=profile.account.server_region,
+                guild_id=guilds.get(profile.pk, ""),
+                tier=tiers.get(profile.account_id, "GOLD"),
+            )
+            for profile in profiles
+        ]
+
+    @staticmethod
+    def _bench(case: QueryCase, samples: list[SimpleNamespace], repeat: int) -> dict:
+        """Time a case and explain the statements of its first run."""
+        statements: dict[str, tuple] = {}
+        queries = 0
+
+        def record(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            statements.setdefault(sql, params)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            case.run(samples[0])
+        first_run_queries = queries
+
+        latencies = []
+        for run in range(repeat):
+            sample = samples[run % len(samples)]
+            started = time.perf_counter()
+            case.run(sample)
+            latencies.append(time.perf_counter() - started)
+
+        explained = []
+        for sql, params in statements.items():
+            plan = _explain(sql, params)
+            explained.append(
+                {"sql": sql, "plan": plan, "warnings": _plan_warnings(plan)}
+            )
+        return {
+            "name": case.name,
+            "latencies": latencies,
+            "queries": first_run_queries,
+            "statements": explained,
+        }
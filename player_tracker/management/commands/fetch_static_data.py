@@ -0,0 +1,84 @@
+"""Download a Data Dragon version into the static data directory."""
+
+import asyncio
+import shutil
+from pathlib import Path
+
+import aiohttp
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from player_tracker.services.static.store import (
+    CHAMPIONS_FILE,
+    QUEUES_FILE,
+    StaticBundle,
+)
+
+DDRAGON_URL = "https://ddragon.leagueoflegends.com"
+QUEUES_URL = "https://static.developer.riotgames.com/docs/lol/queues.json"
+
+
+class Command(BaseCommand):
+    """Django command adding a static data bundle for the bot to pick up.
+
+    The bundle is written under a temporary name and renamed once complete, so
+    a running bot never sees it half written.
+    """
+
+    help = "Downloads champion and queue data of a Data Dragon version"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--version", default=None, help="Version to fetch, defaults to the latest"
+        )
+        parser.add_argument("--locale", default="en_US")
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        directory = Path(settings.STATIC_DATA_DIR)
+        version = asyncio.run(self._fetch(directory, options))
+        if version is None:
+            self.stdout.write("Static data is up to date")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fetched static data {version}"))
+
+    async def _fetch(self, directory: Path, options: dict) -> str | None:
+        """Download the bundle, returns None if it is already present."""
+        locale = options["locale"]
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with aiohttp.ClientSession(
+            timeout=timeout, raise_for_status=True
+        ) as session:
+            version = options["version"]
+            if version is None:
+                async with session.get(f"{DDRAGON_URL}/api/versions.json") as response:
+                    version = (await response.json())[0]
+            if (directory / version).exists():
+                return None
+
+            tmp = directory / f".{version}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            (tmp / "data" / locale).mkdir(parents=True)
+            downloads = {
+                tmp / "data" / locale / CHAMPIONS_FILE: (
+                    f"{DDRAGON_URL}/cdn/{version}/data/{locale}/{CHAMPIONS_FILE}"
+                ),
+                tmp / QUEUES_FILE: QUEUES_URL,
+            }
+            try:
+                for path, url in downloads.items():
+                    async with session.get(url) as response:
+                        path.write_bytes(await response.read())
+            except aiohttp.ClientError as e:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise CommandError(f"Download failed: {e}") from e
+
+            try:
+                StaticBundle.load(tmp, locale)
+            except (OSError, ValueError, KeyError) as e:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise CommandError(f"Invalid static data {version}: {e}") from e
+
+        tmp.rename(directory / version)
+        return version
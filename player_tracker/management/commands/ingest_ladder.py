@@ -0,0 +1,74 @@
+"""Download a region's ranked ladder for percentile lookups."""
+
+import asyncio
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from player_tracker.services.ladder.ingest import LadderIngest
+from player_tracker.services.riot.constants import QueueType, Region
+from player_tracker.services.riot.key_pool import KeyPool
+from player_tracker.services.riot.service import RiotAPIService
+
+QUEUES = {"solo": QueueType.RANKED_SOLO, "flex": QueueType.RANKED_FLEX}
+
+
+class Command(BaseCommand):
+    """Django command ingesting the ladder of a region and queue.
+
+    An interrupted ingest resumes from its checkpoint when run again.
+    """
+
+    help = "Pages through a region's league entries into a sorted score file"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("region", choices=list(Region.__members__))
+        parser.add_argument("--queue", choices=sorted(QUEUES), default="solo")
+        parser.add_argument(
+            "--budget-share",
+            type=float,
+            default=settings.LADDER_INGEST_BUDGET_SHARE,
+            help="Fraction of the API keys' rate limits this ingest may spend",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Discard the checkpoint of an interrupted ingest",
+        )
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        try:
+            asyncio.run(self._run(options))
+        except KeyboardInterrupt:
+            self.stdout.write("Ingest interrupted, run again to resume")
+
+    async def _run(self, options: dict) -> None:
+        """Build the Riot client and run the ingest."""
+        riot_service = RiotAPIService(
+            key_pool=KeyPool.from_settings(options["budget_share"]),
+        )
+        ingest = LadderIngest(
+            riot_service,
+            Region[options["region"]],
+            QUEUES[options["queue"]].value,
+            Path(settings.LADDER_DIR),
+        )
+        started = time.perf_counter()
+
+        def progress(league: str, players: int) -> None:
+            self.stdout.write(f"{league} done, {players} players")
+
+        try:
+            players = await ingest.run(restart=options["restart"], progress=progress)
+        finally:
+            await riot_service.close()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {players} players to {ingest.path} in "
+                f"{time.perf_counter() - started:.0f}s"
+            )
+        )
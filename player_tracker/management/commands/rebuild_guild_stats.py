@@ -0,0 +1,50 @@
+"""Recompute guild rank aggregates from the queue ranks they summarize."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from player_tracker.services.guild import stats as guild_stats
+
+
+class Command(BaseCommand):
+    """Django command to verify or rebuild guild rank aggregates."""
+
+    help = "Rebuilds the incrementally maintained guild rank aggregates"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("--guild", help="Only rebuild this guild id")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare stored aggregates with recomputed ones, exit 1 on drift",
+        )
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        guild_id = options["guild"]
+        expected = guild_stats.compute(guild_id)
+        actual = guild_stats.stored(guild_id)
+        drifted = sorted(
+            key
+            for key in expected.keys() | actual.keys()
+            if expected.get(key) != actual.get(key)
+        )
+        for guild, queue_type, tier in drifted:
+            self.stdout.write(
+                f"{guild} {queue_type} {tier}: "
+                f"stored {actual.get((guild, queue_type, tier))}, "
+                f"expected {expected.get((guild, queue_type, tier))}"
+            )
+
+        if options["check"]:
+            if drifted:
+                raise CommandError(f"{len(drifted)} aggregates drifted")
+            self.stdout.write(self.style.SUCCESS("Guild aggregates are consistent"))
+            return
+
+        written = guild_stats.rebuild(guild_id)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {written} aggregates ({len(drifted)} had drifted)"
+            )
+        )
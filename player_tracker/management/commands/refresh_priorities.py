@@ -0,0 +1,70 @@
+"""Report the distribution of learned refresh intervals, for tuning."""
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from player_tracker.models import RiotAccount, SummonerProfile
+from player_tracker.services.refresh import priority as refresh_priority
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Upper bounds in seconds of the histogram buckets.
+BUCKETS = (900, 1800, 3600, 7200, 14400, 28800, 86400)
+
+
+def _duration(seconds: float) -> str:
+    """Format a number of seconds as hours and minutes."""
+    hours, minutes = divmod(round(seconds / 60), 60)
+    return f"{hours}h{minutes:02d}" if hours else f"{minutes}m"
+
+
+class Command(BaseCommand):
+    """Django command summarizing how often tracked accounts get refreshed."""
+
+    help = "Shows the distribution of activity-based refresh intervals"
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        intervals = refresh_priority.intervals()
+        if not len(intervals):
+            self.stdout.write("No tracked accounts")
+            return
+
+        tracked = SummonerProfile.objects.filter(account=OuterRef("pk"), is_active=True)
+        due = RiotAccount.objects.filter(
+            Exists(tracked), next_refresh_at__lte=timezone.now()
+        ).count()
+        calls_per_hour = (3600 / intervals).sum()
+        self.stdout.write(
+            f"{len(intervals)} tracked accounts, {due} due now, "
+            f"~{calls_per_hour:.0f} refreshes/hour at current activity"
+        )
+        self.stdout.write(
+            f"Interval bounds {_duration(settings.REFRESH_MIN_INTERVAL_SECONDS)} to "
+            f"{_duration(settings.REFRESH_MAX_INTERVAL_SECONDS)}, activity half-life "
+            f"{_duration(settings.ACTIVITY_HALF_LIFE_SECONDS)}"
+        )
+
+        values = np.percentile(intervals, PERCENTILES)
+        self.stdout.write(
+            "Percentiles: "
+            + ", ".join(
+                f"p{p} {_duration(value)}"
+                for p, value in zip(PERCENTILES, values, strict=True)
+            )
+        )
+
+        counts = np.histogram(intervals, bins=(0, *BUCKETS, np.inf))[0]
+        width = max(counts.max(), 1)
+        lower = 0
+        for upper, count in zip((*BUCKETS, None), counts, strict=True):
+            label = (
+                f"{_duration(lower)}-{_duration(upper)}"
+                if upper is not None
+                else f">{_duration(lower)}"
+            )
+            bar = "#" * round(40 * count / width)
+            self.stdout.write(f"{label:>12} {count:>8} {bar}")
+            lower = upper
@@ -0,0 +1,177 @@
+"""Worker process refreshing tracked profiles outside of the bot."""
+
+import asyncio
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from player_tracker.services.refresh.partition import Partition, live_workers
+from player_tracker.services.refresh.runner import RefreshRunner
+from player_tracker.services.riot.constants import Region
+from player_tracker.services.riot.exceptions import InvalidRegionError
+from player_tracker.services.riot.key_pool import KeyPool
+from player_tracker.services.riot.service import RiotAPIService
+from player_tracker.services.summoner.service import SummonerService
+
+
+class Command(BaseCommand):
+    """Django command to run the profile refresh worker.
+
+    Any number of workers can run at once, on one host or several: they find
+    each other through their heartbeats in the database and split the due
+    accounts and the refresh budget between them, see
+    ``services.refresh.partition``.
+    """
+
+    help = "Runs queued refresh jobs and refreshes tracked Riot accounts when due"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=5)
+        parser.add_argument(
+            "--budget-share",
+            type=float,
+            default=settings.REFRESH_WORKER_BUDGET_SHARE,
+            help="Fraction of the API keys' rate limits all workers spend together",
+        )
+        parser.add_argument(
+            "--idle-interval",
+            type=float,
+            default=30.0,
+            help="Seconds to sleep when no job is queued and no account is due",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Run a single cycle and exit"
+        )
+        parser.add_argument(
+            "--regions",
+            default="",
+            help="Comma-separated platform ids, e.g. EUW1,NA1, to refresh only",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes to start on this host",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Print the running workers and their throughput, then exit",
+        )
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        if options["status"]:
+            self._print_status()
+            return
+        regions = self._regions(options["regions"])
+        try:
+            if options["processes"] > 1:
+                self._run_processes(options, regions)
+            else:
+                asyncio.run(self._run(options, regions))
+        except KeyboardInterrupt:
+            self.stdout.write("Refresh worker stopped")
+
+    @staticmethod
+    def _regions(value: str) -> tuple[str, ...]:
+        """Parse ``--regions`` into stored region values."""
+        try:
+            return tuple(
+                Region.from_platform(platform.strip()).stored_value
+                for platform in value.split(",")
+                if platform.strip()
+            )
+        except InvalidRegionError as e:
+            raise CommandError(str(e)) from e
+
+    def _run_processes(self, options: dict, regions: tuple[str, ...]) -> None:
+        """Run ``--processes`` workers, each in its own process, until they stop.
+
+        Children are forked with settings and apps loaded, but each opens its
+        own database connections.
+        """
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=self._run_child, args=(options, regions))
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # The children were interrupted too, let them hand over their slots.
+            for process in processes:
+                process.join(timeout=10)
+            raise
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+    def _run_child(self, options: dict, regions: tuple[str, ...]) -> None:
+        """Run one worker in a process started by ``_run_processes``."""
+        try:
+            asyncio.run(self._run(options, regions))
+        except KeyboardInterrupt:
+            pass
+
+    async def _run(self, options: dict, regions: tuple[str, ...]) -> None:
+        """Build the services and run the refresh loop."""
+        key_pool = KeyPool.from_settings(options["budget_share"])
+        riot_service = RiotAPIService(key_pool=key_pool)
+        runner = RefreshRunner(
+            SummonerService(riot_service),
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+            lease_seconds=settings.REFRESH_JOB_LEASE_SECONDS,
+            partition=Partition(
+                regions,
+                key_pool=key_pool,
+                budget_share=options["budget_share"],
+                lease_seconds=settings.REFRESH_JOB_LEASE_SECONDS,
+            ),
+        )
+        try:
+            if options["once"]:
+                await runner.sync_partition()
+                try:
+                    refreshed = await runner.run_cycle()
+                finally:
+                    await runner.leave_partition()
+                self.stdout.write(f"Processed {refreshed} queued jobs or due accounts")
+            else:
+                await runner.run_forever(options["idle_interval"])
+        finally:
+            await riot_service.close()
+
+    def _print_status(self) -> None:
+        """Print every live worker's partition and throughput."""
+        workers = live_workers(settings.REFRESH_JOB_LEASE_SECONDS)
+        if not workers:
+            self.stdout.write("No refresh worker is running")
+            return
+        now = timezone.now()
+        self.stdout.write(
+            f"{'worker':<32} {'regions':<12} {'slots':>6} {'refreshed':>10} "
+            f"{'failed':>7} {'per s':>7} {'seen':>6}"
+        )
+        for worker in workers:
+            self.stdout.write(
+                f"{worker.worker_id:<32} {worker.regions or 'all':<12} "
+                f"{worker.slots:>6} {worker.refreshed:>10} {worker.failed:>7} "
+                f"{worker.throughput:>7.2f} "
+                f"{(now - worker.heartbeat_at).total_seconds():>5.0f}s"
+            )
+        self.stdout.write(
+            f"Total: {len(workers)} workers, "
+            f"{sum(worker.throughput for worker in workers):.2f} refreshes/s"
+        )
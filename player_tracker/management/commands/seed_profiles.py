@@ -0,0 +1,354 @@
+"""Generate a large synthetic population of tracked players."""
+
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, Model
+from django.utils import timezone
+
+from player_tracker.cache import response_cache
+from player_tracker.models import (
+    GuildMember,
+    QueueRank,
+    RankSnapshot,
+    RefreshJob,
+    RiotAccount,
+    SummonerProfile,
+)
+from player_tracker.services.guild import stats as guild_stats
+from player_tracker.services.riot.constants import QueueType, RankScore
+from player_tracker.services.riot.key_pool import DEFAULT_KEY_ID
+
+SEED_PREFIX = "seed-"
+SEED_TAGLINE = "SEED"
+# Discord ids of seeded profiles, 20 digits so they never clash with real ones.
+DISCORD_ID_BASE = 2 * 10**19
+
+# Share of ranked players per tier, roughly the live Solo/Duo distribution.
+TIER_SHARES = {
+    "IRON": 0.06,
+    "BRONZE": 0.18,
+    "SILVER": 0.20,
+    "GOLD": 0.20,
+    "PLATINUM": 0.16,
+    "EMERALD": 0.13,
+    "DIAMOND": 0.065,
+    "MASTER": 0.004,
+    "GRANDMASTER": 0.0006,
+    "CHALLENGER": 0.0003,
+}
+# Share of players with a rank in each queue, the others are unranked in it.
+RANKED_SHARES = {QueueType.RANKED_SOLO.value: 0.8, QueueType.RANKED_FLEX.value: 0.4}
+# Share of players per region.
+REGION_SHARES = {"EUW1": 0.45, "NA1": 0.3, "KR": 0.25}
+PROGRESS_EVERY = 100_000
+
+
+class Command(BaseCommand):
+    """Django command seeding tracked players to benchmark queries at scale.
+
+    Accounts, profiles, queue ranks, guild memberships and optional rank
+    snapshots are drawn from realistic distributions in numpy and written
+    with batched inserts.
+    Seeded accounts are told apart by their puuid prefix, so ``--clear``
+    removes them without touching real data. Meant for a scratch database,
+    e.g. with SQLITE_PATH pointing to a copy.
+    """
+
+    help = "Bulk-generates synthetic SummonerProfile data"
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("--count", type=int, default=100_000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--guilds", type=int, default=100, help="Guilds the profiles join"
+        )
+        parser.add_argument(
+            "--snapshots", type=int, default=0, help="Rank snapshots per account"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously seeded players first",
+        )
+
+    def handle(self, *args, **options):
+        """Command execution."""
+        if options["clear"]:
+            deleted = self._clear()
+            self.stdout.write(f"Deleted {deleted} seeded accounts")
+
+        rng = np.random.default_rng(options["seed"])
+        # Continue numbering after earlier runs, puuids and discord ids are unique.
+        offset = RiotAccount.objects.filter(puuid__startswith=SEED_PREFIX).count()
+        count, batch_size = options["count"], options["batch_size"]
+        started = time.perf_counter()
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            self._seed_batch(rng, offset + start, size, options)
+            done = start + size
+            if done % PROGRESS_EVERY < batch_size or done == count:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{done}/{count} profiles ({done / elapsed:.0f}/s)")
+
+        # Ids were set explicitly, move PostgreSQL sequences past them.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [RiotAccount, SummonerProfile]
+            ):
+                cursor.execute(sql)
+        rebuilt = guild_stats.rebuild()
+        response_cache.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {count} profiles in {time.perf_counter() - started:.1f}s, "
+                f"rebuilt {rebuilt} guild aggregates"
+            )
+        )
+
+    @staticmethod
+    def _clear() -> int:
+        """Delete seeded players and everything attached to them.
+
+        Plain DELETE statements rather than ``QuerySet.delete``, which would
+        load every row to send per-row signals; guild aggregates are rebuilt
+        and the response cache invalidated afterwards instead.
+        """
+        quote = connection.ops.quote_name
+        accounts = (
+            f"SELECT id FROM {quote(RiotAccount._meta.db_table)} WHERE puuid LIKE %s"
+        )
+        profiles = (
+            f"SELECT id FROM {quote(SummonerProfile._meta.db_table)} "
+            f"WHERE account_id IN ({accounts})"
+        )
+        pattern = [f"{SEED_PREFIX}%"]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote(GuildMember._meta.db_table)} "
+                f"WHERE profile_id IN ({profiles})",
+                pattern,
+            )
+            for model in (QueueRank, RankSnapshot, RefreshJob, SummonerProfile):
+                cursor.execute(
+                    f"DELETE FROM {quote(model._meta.db_table)} "
+                    f"WHERE account_id IN ({accounts})",
+                    pattern,
+                )
+            cursor.execute(
+                f"DELETE FROM {quote(RiotAccount._meta.db_table)} WHERE puuid LIKE %s",
+                pattern,
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def _ranks(rng: np.random.Generator, size: int) -> list[tuple]:
+        """Draw queue ranks as (tier, division, lp, wins, losses, score)."""
+        tiers = rng.choice(
+            list(TIER_SHARES),
+            size=size,
+            p=np.array(list(TIER_SHARES.values())) / sum(TIER_SHARES.values()),
+        ).tolist()
+        divisions = rng.choice(RankScore.DIVISIONS, size=size).tolist()
+        league_points = rng.integers(0, 100, size=size).tolist()
+        # Apex LP is open ended, most players sit near the bottom.
+        apex_points = rng.exponential(300, size=size).astype(int).tolist()
+        games = rng.integers(10, 600, size=size)
+        wins = (games * rng.normal(0.5, 0.03, size=size).clip(0.3, 0.7)).astype(int)
+        losses = (games - wins).tolist()
+        ranks = []
+        for i, tier in enumerate(tiers):
+            if tier in RankScore.APEX_TIERS:
+                division, points = None, apex_points[i]
+            else:
+                division, points = divisions[i], league_points[i]
+            score = RankScore.of(tier, division, points)
+            ranks.append((tier, division, points, int(wins[i]), losses[i], score))
+        return ranks
+
+    @staticmethod
+    def _insert(cursor, model: type[Model], columns: tuple[str, ...], rows) -> None:
+        """Insert rows with one prepared statement."""
+        quote = connection.ops.quote_name
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} "
+            f"({', '.join(map(quote, columns))}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})",
+            rows,
+        )
+
+    def _seed_batch(
+        self, rng: np.random.Generator, first: int, size: int, options: dict
+    ) -> None:
+        """Insert one batch of players, numbered from ``first``.
+
+        Rows go through ``executemany`` with explicit ids rather than
+        ``bulk_create``, whose per-object overhead dominates at this scale.
+        """
+        now = timezone.now()
+        stamp = connection.ops.adapt_datetimefield_value(now)
+        regions = rng.choice(
+            list(REGION_SHARES), size=size, p=list(REGION_SHARES.values())
+        ).tolist()
+        # Spread due refreshes over the longest refresh interval.
+        next_refresh = rng.uniform(
+            0, settings.REFRESH_MAX_INTERVAL_SECONDS, size=size
+        ).tolist()
+        # Guild sizes follow a long tail, a few servers hold most players.
+        guilds = (rng.zipf(1.5, size=size) % options["guilds"]).tolist()
+        activity = rng.exponential(1.0, size=size).tolist()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            account_id = (
+                RiotAccount.objects.aggregate(last=Max("pk"))["last"] or 0
+            ) + 1
+            profile_id = (
+                SummonerProfile.objects.aggregate(last=Max("pk"))["last"] or 0
+            ) + 1
+            account_ids = range(account_id, account_id + size)
+            profile_ids = range(profile_id, profile_id + size)
+            names = [f"Player{first + i}" for i in range(size)]
+
+            self._insert(
+                cursor,
+                RiotAccount,
+                (
+                    "id",
+                    "puuid",
+                    "summoner_id",
+                    "api_key_id",
+                    "summoner_name",
+                    "tagline",
+                    "riot_id_normalized",
+                    "server_region",
+                    "last_check_timestamp",
+                    "activity",
+                    "activity_at",
+                    "next_refresh_at",
+                    "refresh_slot",
+                ),
+                (
+                    (
+                        account_ids[i],
+                        f"{SEED_PREFIX}{first + i}",
+                        f"{SEED_PREFIX}summoner-{first + i}",
+                        DEFAULT_KEY_ID,
+                        names[i],
+                        SEED_TAGLINE,
+                        RiotAccount.normalize_riot_id(names[i], SEED_TAGLINE),
+                        regions[i],
+                        stamp,
+                        activity[i],
+                        stamp,
+                        connection.ops.adapt_datetimefield_value(
+                            now + timedelta(seconds=next_refresh[i])
+                        ),
+                        RiotAccount.refresh_slot_of(f"{SEED_PREFIX}{first + i}"),
+                    )
+                    for i in range(size)
+                ),
+            )
+            self._insert(
+                cursor,
+                SummonerProfile,
+                ("id", "discord_id", "account_id", "is_active"),
+                (
+                    (
+                        profile_ids[i],
+                        str(DISCORD_ID_BASE + first + i),
+                        account_ids[i],
+                        True,
+                    )
+                    for i in range(size)
+                ),
+            )
+            self._insert(
+                cursor,
+                GuildMember,
+                ("guild_id", "profile_id", "joined_at"),
+                (
+                    (f"{SEED_PREFIX}{guilds[i]}", profile_ids[i], stamp)
+                    for i in range(size)
+                ),
+            )
+
+            # created_at is written directly, so snapshots go back one a day.
+            snapshot_stamps = [
+                connection.ops.adapt_datetimefield_value(now - timedelta(days=days))
+                for days in range(options["snapshots"])
+            ]
+            ranks = []
+            snapshots = []
+            for queue_type, share in RANKED_SHARES.items():
+                ranked = (rng.random(size) < share).tolist()
+                for i, rank in enumerate(self._ranks(rng, size)):
+                    if not ranked[i]:
+                        continue
+                    tier, division, points, wins, losses, score = rank
+                    ranks.append(
+                        (
+                            account_ids[i],
+                            queue_type,
+                            tier,
+                            division,
+                            points,
+                            wins,
+                            losses,
+                            tier,
+                            score,
+                            stamp,
+                        )
+                    )
+                    snapshots.extend(
+                        (
+                            account_ids[i],
+                            queue_type,
+                            tier,
+                            division,
+                            points,
+                            max(wins - days, 0),
+                            losses,
+                            created_at,
+                        )
+                        for days, created_at in enumerate(snapshot_stamps)
+                    )
+            self._insert(
+                cursor,
+                QueueRank,
+                (
+                    "account_id",
+                    "queue_type",
+                    "tier",
+                    "division",
+                    "league_points",
+                    "wins",
+                    "losses",
+                    "highest_achieved_tier",
+                    "score",
+                    "updated_at",
+                ),
+                ranks,
+            )
+            if snapshots:
+                self._insert(
+                    cursor,
+                    RankSnapshot,
+                    (
+                        "account_id",
+                        "queue_type",
+                        "tier",
+                        "division",
+                        "league_points",
+                        "wins",
+                        "losses",
+                        "created_at",
+                    ),
+                    snapshots,
+                )
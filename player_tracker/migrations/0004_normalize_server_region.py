@@ -0,0 +1,23 @@
+# Rewrites server_region values stored as "('europe', 'euw1')" into platform codes.
+
+import ast
+
+from django.db import migrations
+
+
+def normalize_server_region(apps, schema_editor):
+    SummonerProfile = apps.get_model("player_tracker", "SummonerProfile")
+    for profile in SummonerProfile.objects.filter(server_region__startswith="("):
+        _, platform = ast.literal_eval(profile.server_region)
+        profile.server_region = platform.upper()
+        profile.save(update_fields=["server_region"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0003_summonerprofile_flex_league_id_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_server_region, migrations.RunPython.noop),
+    ]
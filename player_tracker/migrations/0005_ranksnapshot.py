@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0004_normalize_server_region"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RankSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("queue_type", models.CharField(max_length=30)),
+                (
+                    "tier",
+                    models.CharField(
+                        choices=[
+                            ("IRON", "Iron"),
+                            ("BRONZE", "Bronze"),
+                            ("SILVER", "Silver"),
+                            ("GOLD", "Gold"),
+                            ("PLATINUM", "Platinum"),
+                            ("EMERALD", "Emerald"),
+                            ("DIAMOND", "Diamond"),
+                            ("MASTER", "Master"),
+                            ("GRANDMASTER", "Grandmaster"),
+                            ("CHALLENGER", "Challenger"),
+                            ("UNRANKED", "Unranked"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "division",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("I", "I"),
+                            ("II", "II"),
+                            ("III", "III"),
+                            ("IV", "IV"),
+                        ],
+                        max_length=20,
+                        null=True,
+                    ),
+                ),
+                ("league_points", models.IntegerField(default=0)),
+                ("wins", models.IntegerField(default=0)),
+                ("losses", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rank_snapshots",
+                        to="player_tracker.summonerprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Rank Snapshot",
+                "verbose_name_plural": "Rank Snapshots",
+                "indexes": [
+                    models.Index(
+                        fields=["profile", "queue_type", "-created_at"],
+                        name="snapshot_profile_queue_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,226 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Mirrors RankScore at the time of this migration.
+TIERS = ("IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND")
+APEX_TIERS = ("MASTER", "GRANDMASTER", "CHALLENGER")
+DIVISIONS = ("IV", "III", "II", "I")
+
+
+def rank_score(tier, division, league_points):
+    if tier in APEX_TIERS:
+        return len(TIERS) * len(DIVISIONS) * 100 + league_points
+    if tier not in TIERS or division not in DIVISIONS:
+        return -1
+    steps = TIERS.index(tier) * len(DIVISIONS) + DIVISIONS.index(division)
+    return steps * 100 + league_points
+
+
+def copy_queue_columns(apps, schema_editor):
+    SummonerProfile = apps.get_model("player_tracker", "SummonerProfile")
+    QueueRank = apps.get_model("player_tracker", "QueueRank")
+    ranks = []
+    for profile in SummonerProfile.objects.iterator():
+        for queue_type, prefix, short in (
+            ("RANKED_SOLO_5x5", "current_solo", "solo"),
+            ("RANKED_FLEX_SR", "current_flex", "flex"),
+        ):
+            tier = getattr(profile, f"{prefix}_rank")
+            peak = getattr(profile, f"highest_achieved_rank_{short}")
+            if tier == "UNRANKED" and peak == "UNRANKED":
+                continue
+            division = getattr(profile, f"{prefix}_division")
+            league_points = getattr(profile, f"{prefix}_lp")
+            ranks.append(
+                QueueRank(
+                    profile=profile,
+                    queue_type=queue_type,
+                    league_id=getattr(profile, f"{short}_league_id"),
+                    tier=tier,
+                    division=division,
+                    league_points=league_points,
+                    wins=getattr(profile, f"{short}_wins"),
+                    losses=getattr(profile, f"{short}_losses"),
+                    highest_achieved_tier=peak,
+                    score=rank_score(tier, division, league_points),
+                )
+            )
+    QueueRank.objects.bulk_create(ranks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0005_ranksnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueueRank",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "queue_type",
+                    models.CharField(
+                        choices=[
+                            ("RANKED_SOLO_5x5", "Solo/Duo"),
+                            ("RANKED_FLEX_SR", "Flex"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("league_id", models.CharField(max_length=200, null=True)),
+                (
+                    "tier",
+                    models.CharField(
+                        choices=[
+                            ("IRON", "Iron"),
+                            ("BRONZE", "Bronze"),
+                            ("SILVER", "Silver"),
+                            ("GOLD", "Gold"),
+                            ("PLATINUM", "Platinum"),
+                            ("EMERALD", "Emerald"),
+                            ("DIAMOND", "Diamond"),
+                            ("MASTER", "Master"),
+                            ("GRANDMASTER", "Grandmaster"),
+                            ("CHALLENGER", "Challenger"),
+                            ("UNRANKED", "Unranked"),
+                        ],
+                        default="UNRANKED",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "division",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("I", "I"),
+                            ("II", "II"),
+                            ("III", "III"),
+                            ("IV", "IV"),
+                        ],
+                        max_length=20,
+                        null=True,
+                    ),
+                ),
+                ("league_points", models.IntegerField(default=0)),
+                ("wins", models.IntegerField(default=0)),
+                ("losses", models.IntegerField(default=0)),
+                (
+                    "highest_achieved_tier",
+                    models.CharField(
+                        choices=[
+                            ("IRON", "Iron"),
+                            ("BRONZE", "Bronze"),
+                            ("SILVER", "Silver"),
+                            ("GOLD", "Gold"),
+                            ("PLATINUM", "Platinum"),
+                            ("EMERALD", "Emerald"),
+                            ("DIAMOND", "Diamond"),
+                            ("MASTER", "Master"),
+                            ("GRANDMASTER", "Grandmaster"),
+                            ("CHALLENGER", "Challenger"),
+                            ("UNRANKED", "Unranked"),
+                        ],
+                        default="UNRANKED",
+                        max_length=20,
+                    ),
+                ),
+                ("score", models.IntegerField(default=-1)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="queue_ranks",
+                        to="player_tracker.summonerprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Queue Rank",
+                "verbose_name_plural": "Queue Ranks",
+                "indexes": [
+                    models.Index(
+                        fields=["queue_type", "-score", "id"],
+                        name="queue_rank_ladder_idx",
+                    ),
+                    models.Index(
+                        fields=["queue_type", "tier"], name="queue_rank_tier_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("profile", "queue_type"), name="unique_profile_queue"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(copy_queue_columns, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="current_flex_division",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="current_flex_lp",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="current_flex_rank",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="current_solo_division",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="current_solo_lp",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="current_solo_rank",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="flex_league_id",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="flex_losses",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="flex_wins",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="highest_achieved_rank_flex",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="highest_achieved_rank_solo",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="solo_league_id",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="solo_losses",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="solo_wins",
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:45
+
+from django.db import migrations, models
+
+
+def backfill_riot_id_normalized(apps, schema_editor):
+    SummonerProfile = apps.get_model("player_tracker", "SummonerProfile")
+    profiles = list(SummonerProfile.objects.only("summoner_name", "tagline"))
+    for profile in profiles:
+        name = profile.summoner_name.strip()
+        tagline = (profile.tagline or "").strip()
+        profile.riot_id_normalized = f"{name}#{tagline}".casefold()
+    SummonerProfile.objects.bulk_update(
+        profiles, ["riot_id_normalized"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0006_queuerank"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="summonerprofile",
+            name="riot_id_normalized",
+            field=models.CharField(default="", max_length=201),
+        ),
+        migrations.RunPython(backfill_riot_id_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="summonerprofile",
+            index=models.Index(
+                fields=["riot_id_normalized", "server_region"],
+                name="profile_riot_id_idx",
+            ),
+        ),
+    ]
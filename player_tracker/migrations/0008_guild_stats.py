@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0007_summonerprofile_riot_id_normalized"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuildRankAggregate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("guild_id", models.CharField(max_length=100)),
+                (
+                    "queue_type",
+                    models.CharField(
+                        choices=[
+                            ("RANKED_SOLO_5x5", "Solo/Duo"),
+                            ("RANKED_FLEX_SR", "Flex"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "tier",
+                    models.CharField(
+                        choices=[
+                            ("IRON", "Iron"),
+                            ("BRONZE", "Bronze"),
+                            ("SILVER", "Silver"),
+                            ("GOLD", "Gold"),
+                            ("PLATINUM", "Platinum"),
+                            ("EMERALD", "Emerald"),
+                            ("DIAMOND", "Diamond"),
+                            ("MASTER", "Master"),
+                            ("GRANDMASTER", "Grandmaster"),
+                            ("CHALLENGER", "Challenger"),
+                            ("UNRANKED", "Unranked"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("players", models.IntegerField(default=0)),
+                ("league_points", models.IntegerField(default=0)),
+                ("wins", models.IntegerField(default=0)),
+                ("losses", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Guild Rank Aggregate",
+                "verbose_name_plural": "Guild Rank Aggregates",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("guild_id", "queue_type", "tier"),
+                        name="unique_guild_queue_tier",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="GuildMember",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("guild_id", models.CharField(max_length=100)),
+                ("joined_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="guild_memberships",
+                        to="player_tracker.summonerprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Guild Member",
+                "verbose_name_plural": "Guild Members",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("guild_id", "profile"), name="unique_guild_member"
+                    )
+                ],
+            },
+        ),
+    ]
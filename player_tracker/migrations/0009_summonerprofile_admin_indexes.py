@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0008_guild_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="summonerprofile",
+            index=models.Index(
+                fields=["server_region", "is_active"], name="profile_region_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="summonerprofile",
+            index=models.Index(
+                fields=["is_active", "last_check_timestamp"],
+                name="profile_active_checked_idx",
+            ),
+        ),
+    ]
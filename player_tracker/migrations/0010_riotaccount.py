@@ -0,0 +1,268 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+
+
+def split_riot_accounts(apps, schema_editor):
+    SummonerProfile = apps.get_model("player_tracker", "SummonerProfile")
+    RiotAccount = apps.get_model("player_tracker", "RiotAccount")
+    QueueRank = apps.get_model("player_tracker", "QueueRank")
+    RankSnapshot = apps.get_model("player_tracker", "RankSnapshot")
+
+    # Profiles sharing a puuid become one account, holding the data of the most
+    # recently checked one.
+    profiles = list(SummonerProfile.objects.order_by("-last_check_timestamp", "pk"))
+    owners = {}
+    for profile in profiles:
+        owners.setdefault(profile.puuid or f"legacy-{profile.pk}", profile)
+    accounts = {
+        puuid: RiotAccount(
+            puuid=puuid,
+            summoner_id=owner.summoner_id,
+            summoner_name=owner.summoner_name,
+            tagline=owner.tagline,
+            riot_id_normalized=owner.riot_id_normalized,
+            server_region=owner.server_region,
+        )
+        for puuid, owner in owners.items()
+    }
+    RiotAccount.objects.bulk_create(accounts.values(), batch_size=1000)
+    # bulk_create applies auto_now, bulk_update does not.
+    for puuid, owner in owners.items():
+        accounts[puuid].last_check_timestamp = owner.last_check_timestamp
+    RiotAccount.objects.bulk_update(
+        accounts.values(), ["last_check_timestamp"], batch_size=1000
+    )
+
+    for profile in profiles:
+        profile.account = accounts[profile.puuid or f"legacy-{profile.pk}"]
+    SummonerProfile.objects.bulk_update(profiles, ["account"], batch_size=1000)
+
+    # Ranks and history of duplicate profiles repeat the owner's, drop them.
+    owner_ids = [owner.pk for owner in owners.values()]
+    account_of_profile = Subquery(
+        SummonerProfile.objects.filter(pk=OuterRef("profile_id")).values("account_id")
+    )
+    for model in (QueueRank, RankSnapshot):
+        model.objects.exclude(profile_id__in=owner_ids).delete()
+        model.objects.update(account_id=account_of_profile)
+
+
+def rebuild_guild_aggregates(apps, schema_editor):
+    # Members sharing an account now count the owner's ranks.
+    GuildMember = apps.get_model("player_tracker", "GuildMember")
+    GuildRankAggregate = apps.get_model("player_tracker", "GuildRankAggregate")
+    rank = "profile__account__queue_ranks"
+    rows = GuildMember.objects.values(
+        "guild_id", f"{rank}__queue_type", f"{rank}__tier"
+    ).annotate(
+        players=Count(rank),
+        lp=Sum(f"{rank}__league_points"),
+        total_wins=Sum(f"{rank}__wins"),
+        total_losses=Sum(f"{rank}__losses"),
+    )
+    GuildRankAggregate.objects.all().delete()
+    GuildRankAggregate.objects.bulk_create(
+        [
+            GuildRankAggregate(
+                guild_id=row["guild_id"],
+                queue_type=row[f"{rank}__queue_type"],
+                tier=row[f"{rank}__tier"],
+                players=row["players"],
+                league_points=row["lp"],
+                wins=row["total_wins"],
+                losses=row["total_losses"],
+            )
+            for row in rows
+            if row[f"{rank}__queue_type"] is not None
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0009_summonerprofile_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RiotAccount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("puuid", models.CharField(max_length=100, unique=True)),
+                ("summoner_id", models.CharField(max_length=100, null=True)),
+                ("summoner_name", models.CharField(max_length=100)),
+                ("tagline", models.CharField(max_length=100, null=True)),
+                ("riot_id_normalized", models.CharField(default="", max_length=201)),
+                (
+                    "server_region",
+                    models.CharField(
+                        choices=[
+                            ("EUW1", "Europe West"),
+                            ("NA1", "North America"),
+                            ("KR", "Korea"),
+                        ],
+                        default="EUW1",
+                        max_length=5,
+                    ),
+                ),
+                ("last_check_timestamp", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Riot Account",
+                "verbose_name_plural": "Riot Accounts",
+                "indexes": [
+                    models.Index(
+                        fields=["riot_id_normalized", "server_region"],
+                        name="account_riot_id_idx",
+                    ),
+                    models.Index(
+                        fields=["last_check_timestamp"], name="account_checked_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="queuerank",
+            name="account",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="queue_ranks",
+                to="player_tracker.riotaccount",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ranksnapshot",
+            name="account",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="rank_snapshots",
+                to="player_tracker.riotaccount",
+            ),
+        ),
+        migrations.AddField(
+            model_name="summonerprofile",
+            name="account",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="profiles",
+                to="player_tracker.riotaccount",
+            ),
+        ),
+        migrations.RunPython(split_riot_accounts, migrations.RunPython.noop),
+        migrations.RunPython(rebuild_guild_aggregates, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="queuerank",
+            name="unique_profile_queue",
+        ),
+        migrations.RemoveIndex(
+            model_name="ranksnapshot",
+            name="snapshot_profile_queue_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="summonerprofile",
+            name="profile_riot_id_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="summonerprofile",
+            name="profile_region_active_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="summonerprofile",
+            name="profile_active_checked_idx",
+        ),
+        migrations.RemoveField(
+            model_name="queuerank",
+            name="profile",
+        ),
+        migrations.RemoveField(
+            model_name="ranksnapshot",
+            name="profile",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="last_check_timestamp",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="puuid",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="riot_id_normalized",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="server_region",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="summoner_id",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="summoner_name",
+        ),
+        migrations.RemoveField(
+            model_name="summonerprofile",
+            name="tagline",
+        ),
+        migrations.AlterField(
+            model_name="queuerank",
+            name="account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="queue_ranks",
+                to="player_tracker.riotaccount",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ranksnapshot",
+            name="account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="rank_snapshots",
+                to="player_tracker.riotaccount",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="summonerprofile",
+            name="account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="profiles",
+                to="player_tracker.riotaccount",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ranksnapshot",
+            index=models.Index(
+                fields=["account", "queue_type", "-created_at"],
+                name="snapshot_account_queue_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="riotaccount",
+            index=models.Index(fields=["server_region"], name="account_region_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="queuerank",
+            constraint=models.UniqueConstraint(
+                fields=("account", "queue_type"), name="unique_account_queue"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0010_riotaccount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefreshJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("priority", models.IntegerField(default=0)),
+                (
+                    "requested_by",
+                    models.CharField(blank=True, max_length=20, null=True),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("available_at", models.DateTimeField()),
+                ("worker_id", models.CharField(blank=True, max_length=100, null=True)),
+                ("leased_until", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="refresh_jobs",
+                        to="player_tracker.riotaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Refresh Job",
+                "verbose_name_plural": "Refresh Jobs",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-priority", "created_at"],
+                        name="refresh_job_claim_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "leased_until"], name="refresh_job_lease_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "pending")),
+                        fields=("account",),
+                        name="unique_pending_refresh_job",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:08
+
+from datetime import timedelta
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_existing_accounts(apps, schema_editor):
+    """Keep the former flat 30 minute schedule until each account's next refresh."""
+    RiotAccount = apps.get_model("player_tracker", "RiotAccount")
+    RiotAccount.objects.update(
+        next_refresh_at=F("last_check_timestamp") + timedelta(minutes=30)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0011_refreshjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="riotaccount",
+            name="activity",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name="riotaccount",
+            name="activity_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="riotaccount",
+            name="next_refresh_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="riotaccount",
+            name="revision_date",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="riotaccount",
+            index=models.Index(
+                fields=["next_refresh_at"], name="account_next_refresh_idx"
+            ),
+        ),
+        migrations.RunPython(schedule_existing_accounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0012_refresh_priorities"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="riotaccount",
+            name="api_key_id",
+            field=models.CharField(default="default", max_length=32),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:29
+
+import hashlib
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Mirrors RiotAccount.REFRESH_SLOTS at the time of this migration.
+REFRESH_SLOTS = 1024
+
+
+def backfill_refresh_slot(apps, schema_editor):
+    RiotAccount = apps.get_model("player_tracker", "RiotAccount")
+    accounts = list(RiotAccount.objects.only("puuid"))
+    for account in accounts:
+        digest = hashlib.blake2b(account.puuid.encode(), digest_size=8).digest()
+        account.refresh_slot = int.from_bytes(digest) % REFRESH_SLOTS
+    RiotAccount.objects.bulk_update(accounts, ["refresh_slot"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("player_tracker", "0013_riotaccount_api_key_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefreshWorker",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("worker_id", models.CharField(max_length=100, unique=True)),
+                ("regions", models.CharField(blank=True, default="", max_length=100)),
+                ("slots", models.PositiveSmallIntegerField(default=0)),
+                ("refreshed", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("throughput", models.FloatField(default=0.0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "heartbeat_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "verbose_name": "Refresh Worker",
+                "verbose_name_plural": "Refresh Workers",
+            },
+        ),
+        migrations.AddField(
+            model_name="riotaccount",
+            name="refresh_slot",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_refresh_slot, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,20 @@
+import hashlib
+
 from django.db import models
+from django.utils import timezone
 
 
-class SummonerProfile(models.Model):
-    """Represents a summoner related to a discord id."""
+class RiotAccount(models.Model):
+    """A Riot account and its ranks, shared by every user and guild tracking it."""
 
-    discord_id = models.CharField(max_length=20, unique=True, db_index=True)
-    summoner_name = models.CharField(max_length=100, db_index=True)
-    tagline = models.CharField(max_length=100, null=True)
+    puuid = models.CharField(max_length=100, unique=True)
     summoner_id = models.CharField(max_length=100, null=True)
-    puuid = models.CharField(max_length=100, db_index=True)
+    # Name of the API key that encrypted puuid and summoner_id, see RIOT_API_KEYS.
+    api_key_id = models.CharField(max_length=32, default="default")
+    summoner_name = models.CharField(max_length=100)
+    tagline = models.CharField(max_length=100, null=True)
+    # Casefolded "name#tagline", kept in sync by save().
+    riot_id_normalized = models.CharField(max_length=201, default="")
 
     REGIONS = [
         ("EUW1", "Europe West"),
@@ -17,8 +23,6 @@ class SummonerProfile(models.Model):
         # (TODO: add other regions)
     ]
 
-    flex_league_id = models.CharField(max_length=200, null=True)
-    solo_league_id = models.CharField(max_length=100, null=True)
     server_region = models.CharField(max_length=5, choices=REGIONS, default="EUW1")
 
     RANKS = [
@@ -42,54 +46,291 @@ class SummonerProfile(models.Model):
         ("IV", "IV"),
     ]
 
-    current_solo_rank = models.CharField(
-        max_length=20,
-        choices=RANKS,
-        default="UNRANKED",
-    )
+    last_check_timestamp = models.DateTimeField(auto_now=True)
+    # Summoner revisionDate from Riot, in epoch milliseconds.
+    revision_date = models.BigIntegerField(null=True, blank=True)
+    # Decaying activity score as of activity_at, see services.refresh.priority.
+    activity = models.FloatField(default=0.0)
+    activity_at = models.DateTimeField(null=True, blank=True)
+    next_refresh_at = models.DateTimeField(default=timezone.now)
+
+    # Accounts are hashed into this many slots, which refresh workers split.
+    REFRESH_SLOTS = 1024
+
+    # Hash slot of the puuid, kept in sync by save(), see services.refresh.partition.
+    refresh_slot = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.summoner_name}#{self.tagline} ({self.server_region})"
+
+    @classmethod
+    def refresh_slot_of(cls, puuid: str) -> int:
+        """Get the hash slot of a puuid, stable across processes."""
+        digest = hashlib.blake2b(puuid.encode(), digest_size=8).digest()
+        return int.from_bytes(digest) % cls.REFRESH_SLOTS
+
+    @staticmethod
+    def normalize_riot_id(name: str, tagline: str | None) -> str:
+        """Get the case-insensitive form of a Riot ID used for lookups."""
+        return f"{name.strip()}#{(tagline or '').strip()}".casefold()
+
+    def save(self, *args, **kwargs) -> None:
+        self.riot_id_normalized = self.normalize_riot_id(
+            self.summoner_name, self.tagline
+        )
+        self.refresh_slot = self.refresh_slot_of(self.puuid)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            {"summoner_name", "tagline"} & set(update_fields)
+        ):
+            kwargs["update_fields"] = {*update_fields, "riot_id_normalized"}
+        if update_fields is not None and "puuid" in update_fields:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "refresh_slot"}
+        super().save(*args, **kwargs)
+
+    def ranks_by_queue(self) -> dict[str, "QueueRank"]:
+        """Get the account's queue ranks keyed by queue type."""
+        return {rank.queue_type: rank for rank in self.queue_ranks.all()}
+
+    class Meta:
+        verbose_name = "Riot Account"
+        verbose_name_plural = "Riot Accounts"
+        indexes = [
+            models.Index(
+                fields=["riot_id_normalized", "server_region"],
+                name="account_riot_id_idx",
+            ),
+            # Admin changelist filter.
+            models.Index(fields=["server_region"], name="account_region_idx"),
+            # Stalest accounts, refreshed first by the admin action.
+            models.Index(fields=["last_check_timestamp"], name="account_checked_idx"),
+            # Due accounts, picked by the refresh worker.
+            models.Index(fields=["next_refresh_at"], name="account_next_refresh_idx"),
+        ]
+
+
+class SummonerProfile(models.Model):
+    """Link between a Discord user and the Riot account they registered."""
 
-    current_solo_division = models.CharField(
-        max_length=20,
-        choices=DIVISIONS,
-        null=True,
-        blank=True,
+    discord_id = models.CharField(max_length=20, unique=True, db_index=True)
+    account = models.ForeignKey(
+        RiotAccount, on_delete=models.CASCADE, related_name="profiles"
     )
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.account_id})"
+
+    class Meta:
+        verbose_name = "Summoner Profile"
+        verbose_name_plural = "Summoner Profiles"
+
 
-    highest_achieved_rank_solo = models.CharField(
-        max_length=20, choices=RANKS, default="UNRANKED"
+class QueueRank(models.Model):
+    """Rank of a summoner in one ranked queue."""
+
+    QUEUES = [
+        ("RANKED_SOLO_5x5", "Solo/Duo"),
+        ("RANKED_FLEX_SR", "Flex"),
+    ]
+
+    account = models.ForeignKey(
+        RiotAccount, on_delete=models.CASCADE, related_name="queue_ranks"
+    )
+    queue_type = models.CharField(max_length=30, choices=QUEUES)
+    league_id = models.CharField(max_length=200, null=True)
+    tier = models.CharField(
+        max_length=20, choices=RiotAccount.RANKS, default="UNRANKED"
+    )
+    division = models.CharField(
+        max_length=20, choices=RiotAccount.DIVISIONS, null=True, blank=True
     )
+    league_points = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    highest_achieved_tier = models.CharField(
+        max_length=20, choices=RiotAccount.RANKS, default="UNRANKED"
+    )
+    # Denormalized RankScore of tier/division/league_points, used for ordering.
+    score = models.IntegerField(default=-1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.account} {self.queue_type} {self.tier}"
 
-    current_solo_lp = models.IntegerField(default=0)
+    class Meta:
+        verbose_name = "Queue Rank"
+        verbose_name_plural = "Queue Ranks"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "queue_type"], name="unique_account_queue"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["queue_type", "-score", "id"], name="queue_rank_ladder_idx"
+            ),
+            models.Index(fields=["queue_type", "tier"], name="queue_rank_tier_idx"),
+        ]
 
-    current_flex_rank = models.CharField(
-        max_length=20,
-        choices=RANKS,
-        default="UNRANKED",
+
+class RankSnapshot(models.Model):
+    """Rank of a summoner in one queue at a point in time."""
+
+    account = models.ForeignKey(
+        RiotAccount, on_delete=models.CASCADE, related_name="rank_snapshots"
     )
-    solo_wins = models.IntegerField(default=0)
-    solo_losses = models.IntegerField(default=0)
-    flex_wins = models.IntegerField(default=0)
-    flex_losses = models.IntegerField(default=0)
-    current_flex_division = models.CharField(
-        max_length=20,
-        choices=DIVISIONS,
-        null=True,
-        blank=True,
+    queue_type = models.CharField(max_length=30)
+    tier = models.CharField(max_length=20, choices=RiotAccount.RANKS)
+    division = models.CharField(
+        max_length=20, choices=RiotAccount.DIVISIONS, null=True, blank=True
     )
-    highest_achieved_rank_flex = models.CharField(
-        max_length=20, choices=RANKS, default="UNRANKED"
+    league_points = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.account} {self.queue_type} {self.tier} ({self.created_at})"
+
+    class Meta:
+        verbose_name = "Rank Snapshot"
+        verbose_name_plural = "Rank Snapshots"
+        indexes = [
+            models.Index(
+                fields=["account", "queue_type", "-created_at"],
+                name="snapshot_account_queue_idx",
+            ),
+        ]
+
+
+class GuildMember(models.Model):
+    """Link between a Discord guild and a profile registered in it."""
+
+    guild_id = models.CharField(max_length=100)
+    profile = models.ForeignKey(
+        SummonerProfile, on_delete=models.CASCADE, related_name="guild_memberships"
     )
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.profile} in {self.guild_id}"
+
+    class Meta:
+        verbose_name = "Guild Member"
+        verbose_name_plural = "Guild Members"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["guild_id", "profile"], name="unique_guild_member"
+            ),
+        ]
+
+
+class GuildRankAggregate(models.Model):
+    """Counters of a guild's members in one tier of one queue.
+
+    Kept up to date incrementally by the guild stats service, so reading a
+    guild's rank distribution never scans its members.
+    """
+
+    guild_id = models.CharField(max_length=100)
+    queue_type = models.CharField(max_length=30, choices=QueueRank.QUEUES)
+    tier = models.CharField(max_length=20, choices=RiotAccount.RANKS)
+    players = models.IntegerField(default=0)
+    league_points = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.guild_id} {self.queue_type} {self.tier}: {self.players}"
+
+    class Meta:
+        verbose_name = "Guild Rank Aggregate"
+        verbose_name_plural = "Guild Rank Aggregates"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["guild_id", "queue_type", "tier"],
+                name="unique_guild_queue_tier",
+            ),
+        ]
+
+
+class RefreshJob(models.Model):
+    """A queued refresh of a Riot account, claimed by refresh workers.
 
-    current_flex_lp = models.IntegerField(default=0)
+    Running jobs are leased: a worker that stops heartbeating loses its jobs
+    once ``leased_until`` passes, and another worker claims them again.
+    """
 
-    last_check_timestamp = models.DateTimeField(
-        auto_now=True,
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    account = models.ForeignKey(
+        RiotAccount, on_delete=models.CASCADE, related_name="refresh_jobs"
     )
-    is_active = models.BooleanField(default=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    # Higher runs first.
+    priority = models.IntegerField(default=0)
+    requested_by = models.CharField(max_length=20, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField()
+    worker_id = models.CharField(max_length=100, null=True, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
-        return f"{self.summoner_name} ({self.server_region})"
+        return f"{self.account} ({self.status}, priority {self.priority})"
 
     class Meta:
-        verbose_name = "Summoner Profile"
-        verbose_name_plural = "Summoner Profiles"
+        verbose_name = "Refresh Job"
+        verbose_name_plural = "Refresh Jobs"
+        constraints = [
+            # Dedup key: requests for an account already queued join its job.
+            models.UniqueConstraint(
+                fields=["account"],
+                condition=models.Q(status="pending"),
+                name="unique_pending_refresh_job",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["status", "-priority", "created_at"],
+                name="refresh_job_claim_idx",
+            ),
+            models.Index(
+                fields=["status", "leased_until"], name="refresh_job_lease_idx"
+            ),
+        ]
+
+
+class RefreshWorker(models.Model):
+    """A running refresh worker process, and its throughput.
+
+    Workers heartbeat while they run. Those whose heartbeat is recent split
+    the tracked accounts between them, see ``services.refresh.partition``.
+    """
+
+    worker_id = models.CharField(max_length=100, unique=True)
+    # Comma-separated regions the worker refreshes, empty for every region.
+    regions = models.CharField(max_length=100, blank=True, default="")
+    # Hash slots of accounts the worker owns, out of RiotAccount.REFRESH_SLOTS.
+    slots = models.PositiveSmallIntegerField(default=0)
+    refreshed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Refreshes per second between the last two heartbeats.
+    throughput = models.FloatField(default=0.0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.worker_id} ({self.regions or 'all regions'})"
+
+    class Meta:
+        verbose_name = "Refresh Worker"
+        verbose_name_plural = "Refresh Workers"
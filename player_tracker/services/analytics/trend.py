@@ -0,0 +1,175 @@
+"""LP trends and projections computed over rank snapshots with NumPy."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from ...models import RankSnapshot
+from ..riot.constants import RankScore
+
+SECONDS_PER_DAY = 86400.0
+# Scores of one tier span its four divisions.
+TIER_POINTS = len(RankScore.DIVISIONS) * RankScore.DIVISION_POINTS
+# Shortest span used for per-day rates, so a single fresh snapshot does not
+# turn into an absurd rate.
+MIN_SPAN_DAYS = 1.0
+
+
+@dataclass(frozen=True)
+class TrendReport:
+    """Trend metrics of a set of accounts, one array element per account.
+
+    Players without snapshots in the window are left out. Metrics that cannot
+    be computed, like deltas of unranked players, are NaN.
+    """
+
+    account_ids: np.ndarray
+    score: np.ndarray
+    lp_delta: np.ndarray
+    games: np.ndarray
+    wins: np.ndarray
+    win_rate: np.ndarray
+    games_per_day: np.ndarray
+    lp_per_day: np.ndarray
+    next_tier_eta_days: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.account_ids)
+
+    def row(self, account_id: int) -> dict[str, float] | None:
+        """Get the metrics of one player, or None if they have no data."""
+        (matches,) = np.nonzero(self.account_ids == account_id)
+        if not len(matches):
+            return None
+        i = matches[0]
+        return {
+            "score": float(self.score[i]),
+            "lp_delta": float(self.lp_delta[i]),
+            "games": int(self.games[i]),
+            "win_rate": float(self.win_rate[i]),
+            "games_per_day": float(self.games_per_day[i]),
+            "lp_per_day": float(self.lp_per_day[i]),
+            "next_tier_eta_days": float(self.next_tier_eta_days[i]),
+        }
+
+
+def scores(tiers: np.ndarray, divisions: np.ndarray, lps: np.ndarray) -> np.ndarray:
+    """Vectorized ``RankScore.of``, with unranked rows as NaN."""
+    keys = np.char.add(np.char.add(tiers.astype(str), "|"), divisions.astype(str))
+    unique, inverse = np.unique(keys, return_inverse=True)
+    bases = np.array(
+        [
+            RankScore.base(tier, division if division != "None" else None)
+            for tier, division in np.char.split(unique, "|").tolist()
+        ],
+        dtype=np.float64,
+    )[inverse]
+    return np.where(bases == RankScore.UNRANKED, np.nan, bases + lps)
+
+
+def _load(
+    account_ids: Iterable[int], queue_type: str, since: datetime
+) -> tuple[list[tuple], dict[int, datetime]]:
+    """Load snapshots in the window, plus the last one before it per player.
+
+    The snapshot before the window is the player's state when it opened, since
+    snapshots are only stored when a rank changes. Timestamps are only fetched
+    once per player, converting them row by row costs more than the analytics.
+
+    Returns:
+        Rows of (account_id, tier, division, league_points, wins, losses) sorted
+        by player then time, and the first snapshot time of each player.
+    """
+    snapshots = RankSnapshot.objects.filter(
+        account_id__in=account_ids, queue_type=queue_type
+    )
+    baseline = (
+        snapshots.filter(created_at__lt=since)
+        .values("account_id")
+        .annotate(last=Max("pk"))
+        .values("last")
+    )
+    window = snapshots.filter(Q(created_at__gte=since) | Q(pk__in=baseline))
+    rows = list(
+        window.order_by("account_id", "created_at", "pk").values_list(
+            "account_id", "tier", "division", "league_points", "wins", "losses"
+        )
+    )
+    first_seen = dict(
+        window.values("account_id")
+        .annotate(first=Min("created_at"))
+        .values_list("account_id", "first")
+    )
+    return rows, first_seen
+
+
+def compute_trends(
+    account_ids: Iterable[int],
+    queue_type: str,
+    days: float = 14.0,
+    now: datetime | None = None,
+) -> TrendReport:
+    """Compute the trends of players over the last ``days``.
+
+    Args:
+        account_ids: Ids of the accounts, or a queryset of them.
+        queue_type: Queue of the snapshots, e.g. ``RANKED_SOLO_5x5``.
+        days: Length of the window.
+        now: End of the window, defaults to the current time.
+
+    Returns:
+        Metrics per player, see ``TrendReport``.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=days)
+    rows, first_seen = _load(account_ids, queue_type, since)
+    if not rows:
+        empty = np.array([], dtype=np.float64)
+        return TrendReport(np.array([], dtype=np.int64), *([empty] * 8))
+
+    pids, tiers, divisions, lps, wins, losses = zip(*rows, strict=True)
+    pids = np.fromiter(pids, dtype=np.int64, count=len(rows))
+    score = scores(np.array(tiers), np.array(divisions), np.array(lps, np.float64))
+    wins = np.array(wins, dtype=np.int64)
+    games = wins + np.array(losses, dtype=np.int64)
+
+    # Rows are sorted by player, so each player is a contiguous segment.
+    starts = np.flatnonzero(np.r_[True, pids[1:] != pids[:-1]])
+    ends = np.r_[starts[1:], len(pids)] - 1
+
+    first_time = np.maximum(
+        [first_seen[pid].timestamp() for pid in pids[starts].tolist()],
+        since.timestamp(),
+    )
+    span_days = np.maximum(
+        (now.timestamp() - first_time) / SECONDS_PER_DAY, MIN_SPAN_DAYS
+    )
+    # W/L restart at zero on season resets, which must not count as games.
+    game_delta = np.clip(games[ends] - games[starts], 0, None)
+    win_delta = np.clip(wins[ends] - wins[starts], 0, None)
+    lp_delta = score[ends] - score[starts]
+    lp_per_day = lp_delta / span_days
+
+    current = score[ends]
+    next_tier = (np.floor(current / TIER_POINTS) + 1) * TIER_POINTS
+    # No next tier above the apex ladder, and no ETA without progress.
+    reachable = (current < RankScore.APEX_BASE) & (lp_per_day > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eta = np.where(reachable, (next_tier - current) / lp_per_day, np.nan)
+        win_rate = np.where(game_delta > 0, win_delta / game_delta, np.nan)
+
+    return TrendReport(
+        account_ids=pids[starts],
+        score=current,
+        lp_delta=lp_delta,
+        games=game_delta,
+        wins=win_delta,
+        win_rate=win_rate,
+        games_per_day=game_delta / span_days,
+        lp_per_day=lp_per_day,
+        next_tier_eta_days=eta,
+    )
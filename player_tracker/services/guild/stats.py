@@ -0,0 +1,212 @@
+"""Incrementally maintained rank distribution of Discord guilds."""
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from ...models import (
+    GuildMember,
+    GuildRankAggregate,
+    QueueRank,
+    RiotAccount,
+    SummonerProfile,
+)
+from ..riot.constants import RankScore
+
+# (tier, division, league_points, wins, losses), as in SummonerService._rank_state.
+RankState = tuple[str, str | None, int, int, int]
+# Change of a queue rank: (queue_type, previous state or None if new, new state).
+RankChange = tuple[str, RankState | None, RankState]
+# Counter deltas keyed by (queue_type, tier): [players, league_points, wins, losses].
+Deltas = dict[tuple[str, str], list[int]]
+
+TIER_ORDER = {
+    tier: i for i, tier in enumerate((*RankScore.TIERS, *RankScore.APEX_TIERS))
+}
+
+
+def _accumulate(deltas: Deltas, queue_type: str, state: RankState, sign: int) -> None:
+    tier, _, league_points, wins, losses = state
+    counters = deltas[(queue_type, tier)]
+    counters[0] += sign
+    counters[1] += sign * league_points
+    counters[2] += sign * wins
+    counters[3] += sign * losses
+
+
+def _apply(guild_ids: Iterable[str], deltas: Deltas) -> None:
+    """Add counter deltas to the aggregates of the given guilds."""
+    deltas = {key: counters for key, counters in deltas.items() if any(counters)}
+    if not deltas:
+        return
+    for guild_id in guild_ids:
+        GuildRankAggregate.objects.bulk_create(
+            [
+                GuildRankAggregate(guild_id=guild_id, queue_type=queue_type, tier=tier)
+                for queue_type, tier in deltas
+            ],
+            ignore_conflicts=True,
+        )
+        for (queue_type, tier), (players, lp, wins, losses) in deltas.items():
+            GuildRankAggregate.objects.filter(
+                guild_id=guild_id, queue_type=queue_type, tier=tier
+            ).update(
+                players=F("players") + players,
+                league_points=F("league_points") + lp,
+                wins=F("wins") + wins,
+                losses=F("losses") + losses,
+            )
+
+
+def _profile_deltas(profile: SummonerProfile, sign: int) -> Deltas:
+    """Get the deltas adding (1) or removing (-1) a profile's current ranks."""
+    deltas: Deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for rank in QueueRank.objects.filter(account_id=profile.account_id):
+        state = (rank.tier, rank.division, rank.league_points, rank.wins, rank.losses)
+        _accumulate(deltas, rank.queue_type, state, sign)
+    return deltas
+
+
+def apply_rank_changes(account: RiotAccount, changes: Iterable[RankChange]) -> None:
+    """Move an account's contribution in every guild tracking it.
+
+    An account counts once per guild member registered with it. Must run in the
+    transaction writing the queue ranks, so counters never drift from the ranks
+    they summarize.
+    """
+    deltas: Deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for queue_type, previous, state in changes:
+        if previous is not None:
+            _accumulate(deltas, queue_type, previous, -1)
+        _accumulate(deltas, queue_type, state, 1)
+    if not deltas:
+        return
+    guild_ids = GuildMember.objects.filter(profile__account=account).values_list(
+        "guild_id", flat=True
+    )
+    _apply(list(guild_ids), deltas)
+
+
+@transaction.atomic
+def add_member(guild_id: str, profile: SummonerProfile) -> bool:
+    """Link a profile to a guild and count its ranks in the guild's stats.
+
+    Returns:
+        True if the profile was not a member of the guild yet.
+    """
+    _, created = GuildMember.objects.get_or_create(guild_id=guild_id, profile=profile)
+    if created:
+        _apply([guild_id], _profile_deltas(profile, 1))
+    return created
+
+
+@transaction.atomic
+def remove_member(guild_id: str, profile: SummonerProfile) -> bool:
+    """Unlink a profile from a guild and remove its ranks from the guild's stats.
+
+    Returns:
+        True if the profile was a member of the guild.
+    """
+    deleted, _ = GuildMember.objects.filter(guild_id=guild_id, profile=profile).delete()
+    if deleted:
+        _apply([guild_id], _profile_deltas(profile, -1))
+    return bool(deleted)
+
+
+def add_profile(profile: SummonerProfile) -> None:
+    """Add a profile's ranks to the stats of all its guilds."""
+    guild_ids = GuildMember.objects.filter(profile=profile).values_list(
+        "guild_id", flat=True
+    )
+    _apply(list(guild_ids), _profile_deltas(profile, 1))
+
+
+def remove_profile(profile: SummonerProfile) -> None:
+    """Remove a profile's ranks from the stats of all its guilds."""
+    guild_ids = GuildMember.objects.filter(profile=profile).values_list(
+        "guild_id", flat=True
+    )
+    _apply(list(guild_ids), _profile_deltas(profile, -1))
+
+
+def distribution(guild_id: str, queue_type: str) -> list[GuildRankAggregate]:
+    """Get a guild's non-empty tiers in one queue, from best to worst."""
+    rows = GuildRankAggregate.objects.filter(
+        guild_id=guild_id, queue_type=queue_type, players__gt=0
+    )
+    return sorted(rows, key=lambda row: -TIER_ORDER.get(row.tier, -1))
+
+
+def compute(guild_id: str | None = None) -> dict[tuple[str, str, str], tuple]:
+    """Compute aggregates from scratch, with one grouped query.
+
+    Returns:
+        (players, league_points, wins, losses) keyed by (guild, queue, tier).
+    """
+    members = GuildMember.objects.all()
+    if guild_id is not None:
+        members = members.filter(guild_id=guild_id)
+    rank = "profile__account__queue_ranks"
+    rows = members.values("guild_id", f"{rank}__queue_type", f"{rank}__tier").annotate(
+        players=Count(rank),
+        lp=Sum(f"{rank}__league_points"),
+        total_wins=Sum(f"{rank}__wins"),
+        total_losses=Sum(f"{rank}__losses"),
+    )
+    return {
+        (row["guild_id"], row[f"{rank}__queue_type"], row[f"{rank}__tier"]): (
+            row["players"],
+            row["lp"],
+            row["total_wins"],
+            row["total_losses"],
+        )
+        for row in rows
+        if row[f"{rank}__queue_type"] is not None
+    }
+
+
+def stored(guild_id: str | None = None) -> dict[tuple[str, str, str], tuple]:
+    """Get the stored non-empty aggregates, keyed like ``compute``."""
+    rows = GuildRankAggregate.objects.filter(players__gt=0)
+    if guild_id is not None:
+        rows = rows.filter(guild_id=guild_id)
+    return {
+        (row.guild_id, row.queue_type, row.tier): (
+            row.players,
+            row.league_points,
+            row.wins,
+            row.losses,
+        )
+        for row in rows
+    }
+
+
+@transaction.atomic
+def rebuild(guild_id: str | None = None) -> int:
+    """Replace stored aggregates with freshly computed ones.
+
+    Returns:
+        Number of aggregate rows written.
+    """
+    existing = GuildRankAggregate.objects.all()
+    if guild_id is not None:
+        existing = existing.filter(guild_id=guild_id)
+    existing.delete()
+    rows = [
+        GuildRankAggregate(
+            guild_id=guild,
+            queue_type=queue_type,
+            tier=tier,
+            players=players,
+            league_points=lp,
+            wins=wins,
+            losses=losses,
+        )
+        for (guild, queue_type, tier), (players, lp, wins, losses) in compute(
+            guild_id
+        ).items()
+    ]
+    GuildRankAggregate.objects.bulk_create(rows)
+    return len(rows)
@@ -0,0 +1,70 @@
+"""Percentile lookups against ladders written by ``ingest_ladder``."""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from ..riot.constants import RankScore, Region
+
+logger = logging.getLogger(__name__)
+
+# Scores top out a few thousand points above APEX_BASE, well within int16.
+SCORE_DTYPE = np.dtype(np.int16)
+
+
+def ladder_path(directory: Path, region: Region, queue_type: str) -> Path:
+    """Get the file of the ladder of a region and queue."""
+    return directory / f"{region.platform}_{queue_type}.npy"
+
+
+class LadderIndex:
+    """Memory-maps sorted ladder score arrays to place a score on the ladder.
+
+    Lookups are a binary search over the mapped file, so only the few pages it
+    touches are read. A ladder rewritten by a new ingest is mapped again on the
+    next lookup.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """Initialize the index.
+
+        Args:
+            directory: Directory of the ladder files.
+        """
+        self._directory = directory
+        self._ladders: dict[Path, tuple[float, np.ndarray]] = {}
+
+    def _ladder(self, region: Region, queue_type: str) -> np.ndarray | None:
+        """Get the mapped ladder of a region and queue, None if not ingested."""
+        path = ladder_path(self._directory, region, queue_type)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        loaded = self._ladders.get(path)
+        if loaded is None or loaded[0] != mtime:
+            try:
+                ladder = np.load(path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning("Could not load ladder %s: %s", path, e)
+                return None
+            loaded = self._ladders[path] = (mtime, ladder)
+        return loaded[1]
+
+    def top_percent(self, region: Region, queue_type: str, score: int) -> float | None:
+        """Get the share of the ladder at or above a score, in percent.
+
+        Returns:
+            The "top X%" of the score, None if the score is unranked or the
+            ladder wasn't ingested.
+        """
+        if score == RankScore.UNRANKED:
+            return None
+        ladder = self._ladder(region, queue_type)
+        if ladder is None or not len(ladder):
+            return None
+        # The player is on the ladder already, tied players share their place.
+        at_or_above = len(ladder) - int(np.searchsorted(ladder, score, side="left"))
+        # A score above the whole ladder, e.g. a climb since the ingest, is first.
+        return max(at_or_above, 1) / len(ladder) * 100
@@ -0,0 +1,167 @@
+"""Resumable download of a region's whole ranked ladder into a score array."""
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from ..riot.constants import RankScore, Region
+from ..riot.exceptions import CircuitOpenError, RateLimitError, ServiceUnavailableError
+from ..riot.service import RiotAPIService
+from ..riot.types import LadderEntryDTO
+from .index import SCORE_DTYPE, ladder_path
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed attempts at a page before giving up, the checkpoint keeps
+# the work done so far.
+MAX_RETRIES = 5
+RETRY_SECONDS = 10.0
+
+# Every league of a queue, from the top: (tier, division), no division for apex.
+STEPS: tuple[tuple[str, str | None], ...] = (
+    *((tier, None) for tier in reversed(RankScore.APEX_TIERS)),
+    *(
+        (tier, division)
+        for tier in reversed(RankScore.TIERS)
+        for division in reversed(RankScore.DIVISIONS)
+    ),
+)
+
+
+class LadderIngest:
+    """Streams every ranked player of a region and queue into a sorted array.
+
+    Scores are appended to a part file page by page, and a checkpoint records
+    how far the ingest went after every page, so an interrupted ingest resumes
+    where it stopped. Once every league is read the part file is sorted into
+    the ``.npy`` file read by ``LadderIndex``. The ladder moves while it is
+    paged through, so a player who promotes or demotes meanwhile may be counted
+    twice or missed; at ladder scale that doesn't show in a percentile.
+    """
+
+    def __init__(
+        self,
+        riot_api: RiotAPIService,
+        region: Region,
+        queue_type: str,
+        directory: Path,
+    ) -> None:
+        """Initialize the ingest.
+
+        Args:
+            riot_api: Client used for the league endpoints, and its rate limits.
+            region: Region of the ladder.
+            queue_type: Queue of the ladder, e.g. RANKED_SOLO_5x5.
+            directory: Directory of the ladder files.
+        """
+        self._riot_api = riot_api
+        self._region = region
+        self._queue_type = queue_type
+        self.path = ladder_path(directory, region, queue_type)
+        self._part = self.path.with_suffix(".part")
+        self._checkpoint = self.path.with_suffix(".checkpoint.json")
+
+    def _load_checkpoint(self) -> dict:
+        """Read where an interrupted ingest stopped, or start from the top."""
+        if not self._checkpoint.exists() or not self._part.exists():
+            return {"step": 0, "page": 1, "count": 0}
+        return json.loads(self._checkpoint.read_text())
+
+    def _save_checkpoint(self, state: dict) -> None:
+        """Write the checkpoint atomically."""
+        tmp = self._checkpoint.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self._checkpoint)
+
+    async def _fetch(
+        self, tier: str, division: str | None, page: int
+    ) -> list[LadderEntryDTO]:
+        """Fetch one page of a league, waiting out rate limits and outages."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if division is None:
+                    return await self._riot_api.get_apex_league(
+                        self._queue_type, tier, region=self._region
+                    )
+                return await self._riot_api.get_league_page(
+                    self._queue_type, tier, division, page, region=self._region
+                )
+            except CircuitOpenError as e:
+                if attempt >= MAX_RETRIES:
+                    raise
+                delay = max(e.retry_after, RETRY_SECONDS)
+            except (RateLimitError, ServiceUnavailableError):
+                if attempt >= MAX_RETRIES:
+                    raise
+                delay = RETRY_SECONDS * attempt
+            logger.info("Retrying %s %s page %d in %.0fs", tier, division, page, delay)
+            await asyncio.sleep(delay)
+
+    async def run(
+        self,
+        restart: bool = False,
+        progress: Callable[[str, int], None] | None = None,
+    ) -> int:
+        """Ingest the ladder, resuming a previous run unless ``restart``.
+
+        Args:
+            restart: Discard the checkpoint of an interrupted ingest.
+            progress: Called with the league done and the players read so far.
+
+        Returns:
+            Number of players in the written ladder.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if restart:
+            self._checkpoint.unlink(missing_ok=True)
+            self._part.unlink(missing_ok=True)
+        state = self._load_checkpoint()
+        if state["count"] or state["step"] or state["page"] > 1:
+            logger.info("Resuming %s ingest at %s", self.path.name, state)
+
+        with self._part.open("ab") as part:
+            # Drop scores written after the last checkpoint was saved.
+            part.truncate(state["count"] * SCORE_DTYPE.itemsize)
+            while state["step"] < len(STEPS):
+                tier, division = STEPS[state["step"]]
+                entries = await self._fetch(tier, division, state["page"])
+                scores = np.fromiter(
+                    (
+                        RankScore.of(entry.tier, entry.rank, entry.leaguePoints)
+                        for entry in entries
+                    ),
+                    dtype=SCORE_DTYPE,
+                    count=len(entries),
+                )
+                part.write(scores.tobytes())
+                part.flush()
+                state["count"] += len(scores)
+                if division is None or not entries:
+                    state["step"] += 1
+                    state["page"] = 1
+                    if progress is not None:
+                        progress(f"{tier} {division or ''}".strip(), state["count"])
+                else:
+                    state["page"] += 1
+                self._save_checkpoint(state)
+
+        return self._finish()
+
+    def _finish(self) -> int:
+        """Sort the part file into the ladder file and clean up."""
+        scores = np.fromfile(self._part, dtype=SCORE_DTYPE)
+        scores.sort()
+        # np.save appends .npy to names without it.
+        tmp = self.path.with_suffix(".tmp.npy")
+        np.save(tmp, scores)
+        os.replace(tmp, self.path)
+        self._part.unlink()
+        self._checkpoint.unlink()
+        return len(scores)
@@ -0,0 +1,220 @@
+"""Detection of tracked players currently in a game."""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+
+from ...models import SummonerProfile
+from ..riot.constants import APIEndpoint, Region
+from ..riot.exceptions import InvalidRegionError, RiotAPIError
+from ..riot.service import RiotAPIService
+from ..riot.types import CurrentGameInfoDTO
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrackedPlayer:
+    """Polling state of a tracked Riot account."""
+
+    puuid: str
+    riot_id: str
+    region: Region
+    interval: float
+    next_poll: float
+    # Name of the API key that encrypted the puuid.
+    key_id: str
+    last_in_game: float | None = None
+    game: CurrentGameInfoDTO | None = None
+    # Discord users who registered the account.
+    discord_ids: set[str] = field(default_factory=set)
+
+
+GameStartCallback = Callable[[TrackedPlayer, CurrentGameInfoDTO], Awaitable[None]]
+
+
+class LiveGamePoller:
+    """Polls Spectator-V5 for tracked players at adaptive intervals.
+
+    Players in a game are polled every ``min_interval`` to notice the game end,
+    players seen in a game within ``active_window`` every ``active_interval``,
+    and the interval of everyone else doubles after each idle poll up to
+    ``max_interval``. Only a small batch is polled per tick, through the shared
+    RiotAPIService and its rate limiter, so commands keep most of the budget.
+    Results are served from memory: ``live_players`` never calls Riot.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        riot_api: RiotAPIService,
+        *,
+        min_interval: float = 60.0,
+        active_interval: float = 180.0,
+        max_interval: float = 1800.0,
+        active_window: float = 2 * 3600.0,
+        batch_size: int = 10,
+        concurrency: int = 2,
+        on_game_start: GameStartCallback | None = None,
+    ) -> None:
+        """Initialize the poller.
+
+        Args:
+            riot_api: Service used for Spectator-V5 requests.
+            min_interval: Poll interval of players in a game.
+            active_interval: Poll interval of recently active players.
+            max_interval: Longest poll interval of idle players.
+            active_window: How long a player counts as active after a game.
+            batch_size: Maximum number of players polled per tick.
+            concurrency: Maximum number of spectator requests in flight.
+            on_game_start: Coroutine called when a player enters a game.
+        """
+        self._riot_api = riot_api
+        self._min_interval = min_interval
+        self._active_interval = active_interval
+        self._max_interval = max_interval
+        self._active_window = active_window
+        self._batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.on_game_start = on_game_start
+        self._players: dict[str, TrackedPlayer] = {}
+
+    def _load_profiles(self) -> list[SummonerProfile]:
+        return list(
+            SummonerProfile.objects.filter(is_active=True)
+            .select_related("account")
+            .only(
+                "discord_id",
+                "account__puuid",
+                "account__api_key_id",
+                "account__summoner_name",
+                "account__tagline",
+                "account__server_region",
+            )
+        )
+
+    async def reload_players(self) -> int:
+        """Sync the tracked players with active profiles, keeping known state.
+
+        Accounts registered by several users are polled once.
+
+        Returns:
+            Number of tracked players.
+        """
+        now = time.monotonic()
+        players: dict[str, TrackedPlayer] = {}
+        for profile in await sync_to_async(self._load_profiles)():
+            account = profile.account
+            player = players.get(account.puuid)
+            if player is None:
+                try:
+                    region = Region.from_platform(account.server_region)
+                except InvalidRegionError:
+                    continue
+                riot_id = f"{account.summoner_name}#{account.tagline}"
+                player = self._players.get(account.puuid)
+                if player is None:
+                    player = TrackedPlayer(
+                        puuid=account.puuid,
+                        riot_id=riot_id,
+                        region=region,
+                        key_id=account.api_key_id,
+                        interval=self._active_interval,
+                        # Spread the first polls instead of bursting at startup.
+                        next_poll=now + random.uniform(0, self._active_interval),
+                    )
+                else:
+                    # Riot IDs are renamed and accounts move to other API keys.
+                    player.riot_id = riot_id
+                    player.region = region
+                    player.key_id = account.api_key_id
+                player.discord_ids = set()
+                players[account.puuid] = player
+            player.discord_ids.add(profile.discord_id)
+        self._players = players
+        return len(players)
+
+    def live_players(self) -> list[TrackedPlayer]:
+        """Get the tracked players last seen in a game, from memory only."""
+        return [player for player in self._players.values() if player.game]
+
+    def _next_interval(self, player: TrackedPlayer, now: float) -> float:
+        if player.game is not None:
+            return self._min_interval
+        if player.last_in_game and now - player.last_in_game < self._active_window:
+            return self._active_interval
+        return min(max(player.interval * 2, self._active_interval), self._max_interval)
+
+    async def _poll(self, player: TrackedPlayer) -> None:
+        """Poll one player and reschedule them."""
+        async with self._semaphore:
+            try:
+                game = await self._riot_api.get_active_game(
+                    player.puuid, region=player.region, key_id=player.key_id
+                )
+            except (RiotAPIError, aiohttp.ClientError, TimeoutError) as e:
+                logger.warning("Failed to poll %s: %s", player.riot_id, e)
+                game = player.game
+            else:
+                started = game is not None and (
+                    player.game is None or player.game.gameId != game.gameId
+                )
+                player.game = game
+                if game is not None:
+                    player.last_in_game = time.monotonic()
+                if started and self.on_game_start is not None:
+                    await self.on_game_start(player, game)
+
+        now = time.monotonic()
+        player.interval = self._next_interval(player, now)
+        player.next_poll = now + player.interval * random.uniform(0.9, 1.1)
+
+    async def poll_due(self) -> int:
+        """Poll the players whose interval elapsed, most overdue first.
+
+        Returns:
+            Number of players polled.
+        """
+        now = time.monotonic()
+        due = sorted(
+            (
+                player
+                for player in self._players.values()
+                if player.next_poll <= now
+                and not self._riot_api.circuit_open(
+                    player.region, (APIEndpoint.ACTIVE_GAME_BY_PUUID,)
+                )
+            ),
+            key=lambda player: player.next_poll,
+        )[: self._batch_size]
+        await asyncio.gather(*(self._poll(player) for player in due))
+        return len(due)
+
+    async def run_forever(self, tick: float = 5.0, reload_every: float = 300.0) -> None:
+        """Poll due players until cancelled.
+
+        Args:
+            tick: Seconds between two polling rounds.
+            reload_every: Seconds between two reloads of the tracked players.
+        """
+        last_reload = float("-inf")
+        while True:
+            # A failed round, e.g. on a locked database, is retried next tick
+            # rather than stopping live polling.
+            try:
+                if time.monotonic() - last_reload >= reload_every:
+                    count = await self.reload_players()
+                    last_reload = time.monotonic()
+                    logger.debug("Tracking %d players for live games", count)
+                await self.poll_due()
+            except DatabaseError as e:
+                logger.warning("Live polling round failed: %s", e)
+            except Exception:
+                logger.exception("Live polling round failed")
+            await asyncio.sleep(tick)
@@ -0,0 +1,151 @@
+"""Sampled, span-based profiling of bot commands."""
+
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CommandProfile:
+    """Spans recorded during one command invocation."""
+
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    # (stack, duration) pairs, the stack being the names of the enclosing spans.
+    spans: list[tuple[tuple[str, ...], float]] = field(default_factory=list)
+
+
+_profile: ContextVar[CommandProfile | None] = ContextVar("profile", default=None)
+_stack: ContextVar[tuple[str, ...]] = ContextVar("profile_stack", default=())
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block as part of the command being profiled, if any.
+
+    Costs a single context variable lookup when the current command isn't sampled.
+    Context variables follow ``sync_to_async`` into its worker threads, so spans
+    can be opened from ORM code as well.
+    """
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+    stack = (*_stack.get(), name)
+    token = _stack.set(stack)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans.append((stack, time.perf_counter() - started))
+        _stack.reset(token)
+
+
+class CommandProfiler:
+    """Profiles a sample of command invocations and dumps them to disk.
+
+    For each sampled invocation the time spent per span category (api, db,
+    render, send...) is appended as a JSON line to ``commands.jsonl``, and the
+    self time of every span stack to ``commands.folded`` in the collapsed stack
+    format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        sample_rate: float = 0.0,
+        flush_every: int = 50,
+    ) -> None:
+        """Initialize the profiler.
+
+        Args:
+            output_dir: Directory the profiles are written to.
+            sample_rate: Share of invocations profiled, 0 disables profiling.
+            flush_every: Number of profiles buffered before writing to disk.
+        """
+        self._output_dir = output_dir
+        self.sample_rate = sample_rate
+        self._flush_every = flush_every
+        self._records: list[dict] = []
+        self._folded: defaultdict[str, int] = defaultdict(int)
+
+    def start(self, name: str) -> Token | None:
+        """Start profiling a command if it is sampled.
+
+        Returns:
+            A token to pass to ``finish``, None if the command isn't sampled.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        return _profile.set(CommandProfile(name))
+
+    def finish(self, token: Token | None) -> None:
+        """Stop profiling the current command and record its spans."""
+        if token is None:
+            return
+        profile = _profile.get()
+        try:
+            _profile.reset(token)
+        except ValueError:
+            # Finished from another context than the one it started in.
+            _profile.set(None)
+        if profile is None:
+            return
+        total = time.perf_counter() - profile.started
+        self._record(profile, total)
+        if len(self._records) >= self._flush_every:
+            self.flush()
+
+    def _record(self, profile: CommandProfile, total: float) -> None:
+        """Aggregate a finished profile into the buffers."""
+        children: defaultdict[tuple[str, ...], float] = defaultdict(float)
+        for stack, duration in profile.spans:
+            children[stack[:-1]] += duration
+
+        categories: defaultdict[str, float] = defaultdict(float)
+        for stack, duration in profile.spans:
+            self_time = max(duration - children[stack], 0.0)
+            categories[stack[-1]] += self_time
+            self._folded[";".join((profile.name, *stack))] += int(self_time * 1e6)
+        other = max(total - children[()], 0.0)
+        self._folded[profile.name] += int(other * 1e6)
+
+        self._records.append(
+            {
+                "command": profile.name,
+                "at": datetime.now(UTC).isoformat(),
+                "total_ms": round(total * 1000, 3),
+                "spans_ms": {
+                    name: round(duration * 1000, 3)
+                    for name, duration in sorted(categories.items())
+                },
+                "other_ms": round(other * 1000, 3),
+            }
+        )
+
+    def flush(self) -> None:
+        """Write buffered profiles to disk."""
+        if not self._records:
+            return
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._output_dir / "commands.jsonl", "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in self._records)
+        with open(self._output_dir / "commands.folded", "a", encoding="utf-8") as f:
+            f.writelines(
+                f"{stack} {weight}\n"
+                for stack, weight in self._folded.items()
+                if weight > 0
+            )
+        logger.info("Flushed %d command profiles", len(self._records))
+        self._records.clear()
+        self._folded.clear()
@@ -0,0 +1,254 @@
+"""Split of the tracked accounts between refresh worker processes.
+
+Accounts are hashed by puuid into ``RiotAccount.REFRESH_SLOTS`` slots. Live
+workers, those with a recent heartbeat in the ``RefreshWorker`` table, are
+placed on a consistent hash ring and own the slots falling to them, so a worker
+joining or leaving only moves the slots next to its points on the ring.
+Each region has its own ring, holding the workers limited to subsets naming it
+and the workers of every region, so overlapping subsets never claim the same
+account. Regions no subset names share a ring of the all-regions workers.
+
+Workers learn about each other at their next heartbeat. Until then, two of
+them may own the same slots and refresh a few accounts twice, which only
+costs requests.
+"""
+
+import bisect
+import hashlib
+import logging
+import operator
+import time
+from collections.abc import Iterable
+from datetime import timedelta
+from functools import cache, reduce
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from ...models import RefreshWorker, RiotAccount
+from ..riot.key_pool import KeyPool
+
+logger = logging.getLogger(__name__)
+
+# Points of each worker on the ring, more evens out the partition sizes.
+VIRTUAL_NODES = 64
+# Key of the slots in the regions no region subset names.
+OTHER_REGIONS = ""
+
+
+def _hash(value: str) -> int:
+    """Position of a value on the ring."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest())
+
+
+@cache
+def _slot_positions() -> list[int]:
+    """Position of every slot on the ring."""
+    return [_hash(f"slot:{slot}") for slot in range(RiotAccount.REFRESH_SLOTS)]
+
+
+class HashRing:
+    """Consistent hash ring assigning account slots to workers."""
+
+    def __init__(self, workers: Iterable[str], virtual_nodes: int = VIRTUAL_NODES):
+        """Place the workers on the ring.
+
+        Args:
+            workers: Ids of the workers sharing the slots.
+            virtual_nodes: Points of each worker on the ring.
+        """
+        points = sorted(
+            (_hash(f"{worker}#{node}"), worker)
+            for worker in set(workers)
+            for node in range(virtual_nodes)
+        )
+        self._positions = [position for position, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, slot: int) -> str | None:
+        """Get the worker owning a slot, the next one clockwise on the ring."""
+        if not self._workers:
+            return None
+        index = bisect.bisect(self._positions, _slot_positions()[slot])
+        return self._workers[index % len(self._workers)]
+
+    def slots_of(self, worker: str) -> frozenset[int]:
+        """Get the slots a worker owns."""
+        return frozenset(
+            slot
+            for slot in range(RiotAccount.REFRESH_SLOTS)
+            if self.owner(slot) == worker
+        )
+
+
+class Partition:
+    """A refresh worker's share of the tracked accounts and of the API budget.
+
+    The worker calls ``heartbeat`` regularly, which records its throughput and
+    recomputes its slots in each region from the workers alive at that moment.
+    The refresh budget is split evenly between the regions with a ring, then
+    between their workers in proportion to the slots they own.
+
+    ``slots`` maps each region the worker refreshes to its slots there, with
+    the regions no subset names under ``OTHER_REGIONS``.
+    """
+
+    def __init__(
+        self,
+        regions: Iterable[str] = (),
+        key_pool: KeyPool | None = None,
+        budget_share: float = 1.0,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        """Initialize the partition, empty until the first heartbeat.
+
+        Args:
+            regions: Platform ids of the regions the worker refreshes.
+                Defaults to every region.
+            key_pool: Keys the worker spends, resized to its share of
+                ``budget_share`` at every rebalance.
+            budget_share: Share (0-1] of the keys' budget all refresh workers
+                spend together.
+            lease_seconds: How long a worker counts as alive after a heartbeat.
+        """
+        self.regions = tuple(sorted(regions))
+        self._key_pool = key_pool
+        self._budget_share = budget_share
+        self._lease_seconds = lease_seconds
+        self.slots: dict[str, frozenset[int]] = {}
+        self.workers = 0
+        self.share: float | None = None
+        self._last_heartbeat: tuple[float, int] | None = None
+
+    def filter(self, accounts: QuerySet[RiotAccount]) -> QuerySet[RiotAccount]:
+        """Restrict accounts to the ones this worker refreshes."""
+        named = [region for region in self.slots if region != OTHER_REGIONS]
+        owned = []
+        for region, slots in self.slots.items():
+            if not slots:
+                continue
+            if len(slots) < RiotAccount.REFRESH_SLOTS:
+                condition = Q(refresh_slot__in=sorted(slots))
+            else:
+                condition = Q()
+            if region != OTHER_REGIONS:
+                condition &= Q(server_region=region)
+            elif named:
+                condition &= ~Q(server_region__in=named)
+            if not condition:
+                # Every slot of every region.
+                return accounts
+            owned.append(condition)
+        if not owned:
+            return accounts.none()
+        return accounts.filter(reduce(operator.or_, owned))
+
+    def heartbeat(self, worker_id: str, refreshed: int, failed: int) -> bool:
+        """Record that a worker is alive and rebalance the slots.
+
+        Args:
+            worker_id: Identifies the worker.
+            refreshed: Accounts the worker refreshed since it started.
+            failed: Refreshes of the worker that failed since it started.
+
+        Returns:
+            Whether the worker's slots changed.
+        """
+        now = timezone.now()
+        clock = time.monotonic()
+        throughput = 0.0
+        if self._last_heartbeat is not None:
+            since, previous = self._last_heartbeat
+            throughput = (refreshed - previous) / max(clock - since, 1e-9)
+        self._last_heartbeat = (clock, refreshed)
+        regions = ",".join(self.regions)
+
+        RefreshWorker.objects.update_or_create(
+            worker_id=worker_id,
+            defaults={
+                "regions": regions,
+                "refreshed": refreshed,
+                "failed": failed,
+                "throughput": throughput,
+                "heartbeat_at": now,
+            },
+        )
+        # Workers that stopped heartbeating lose their slots.
+        expired = now - timedelta(seconds=self._lease_seconds)
+        RefreshWorker.objects.filter(heartbeat_at__lt=expired).delete()
+        live = list(RefreshWorker.objects.values_list("worker_id", "regions"))
+        rings = _rings(
+            (worker, tuple(filter(None, subset.split(",")))) for worker, subset in live
+        )
+
+        if self.regions:
+            mine = {region: rings[region] for region in self.regions}
+        else:
+            mine = rings
+        slots = {region: ring.slots_of(worker_id) for region, ring in mine.items()}
+        changed = slots != self.slots
+        self.slots, self.workers = slots, len(live)
+        owned = sum(map(len, slots.values()))
+        if changed:
+            RefreshWorker.objects.filter(worker_id=worker_id).update(slots=owned)
+        # Regions gaining or losing a ring change the share without moving slots.
+        share = self._budget_share * owned / RiotAccount.REFRESH_SLOTS / len(rings)
+        share = max(share, 1 / RiotAccount.REFRESH_SLOTS)
+        if share != self.share:
+            self.share = share
+            if self._key_pool is not None:
+                self._key_pool.set_share(share)
+            logger.info(
+                "Worker %s owns %d slots in %d regions of %d workers, "
+                "budget share %.3f",
+                worker_id,
+                owned,
+                len(slots),
+                len(live),
+                share,
+            )
+        logger.info(
+            "Worker %s: %d refreshed, %d failed, %.2f/s",
+            worker_id,
+            refreshed,
+            failed,
+            throughput,
+        )
+        return changed
+
+    @staticmethod
+    def leave(worker_id: str) -> None:
+        """Hand a stopping worker's slots to the others right away."""
+        RefreshWorker.objects.filter(worker_id=worker_id).delete()
+
+
+def _rings(workers: Iterable[tuple[str, tuple[str, ...]]]) -> dict[str, HashRing]:
+    """Build the ring of every region from the workers and their region subsets.
+
+    Regions named by a subset get a ring of the workers naming them and of the
+    all-regions workers. If any all-regions worker is alive, the other regions
+    get a ring of those workers under ``OTHER_REGIONS``.
+    """
+    members: dict[str, list[str]] = {}
+    everywhere = []
+    for worker, regions in workers:
+        if not regions:
+            everywhere.append(worker)
+        for region in regions:
+            members.setdefault(region, []).append(worker)
+    rings = {
+        region: HashRing([*peers, *everywhere]) for region, peers in members.items()
+    }
+    if everywhere:
+        rings[OTHER_REGIONS] = HashRing(everywhere)
+    return rings
+
+
+def live_workers(lease_seconds: float) -> list[RefreshWorker]:
+    """Get the workers with a recent heartbeat, by regions and id."""
+    expired = timezone.now() - timedelta(seconds=lease_seconds)
+    return list(
+        RefreshWorker.objects.filter(heartbeat_at__gte=expired).order_by(
+            "regions", "worker_id"
+        )
+    )
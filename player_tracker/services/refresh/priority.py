@@ -0,0 +1,104 @@
+"""Refresh intervals learned from how active each account is.
+
+Every account carries an activity score. It grows by ``CHANGE_WEIGHT`` each
+time a refresh finds new ranks, W/L or summoner revision, and by
+``QUERY_WEIGHT`` each time someone looks the account up, counted in batches by
+the bot. The score halves every ``ACTIVITY_HALF_LIFE_SECONDS``, so accounts
+that stop playing drift back to the longest refresh interval while grinders
+converge on the shortest one.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from ...models import RiotAccount, SummonerProfile
+
+CHANGE_WEIGHT = 1.0
+QUERY_WEIGHT = 0.25
+
+
+def decayed(activity: float, since: datetime | None, now: datetime) -> float:
+    """Get the value at ``now`` of an activity score recorded at ``since``."""
+    if since is None:
+        return activity
+    elapsed = max((now - since).total_seconds(), 0.0)
+    return activity * 0.5 ** (elapsed / settings.ACTIVITY_HALF_LIFE_SECONDS)
+
+
+def interval(activity: float) -> timedelta:
+    """Get the refresh interval of an account with the given activity score."""
+    seconds = settings.REFRESH_MAX_INTERVAL_SECONDS / (1.0 + activity)
+    return timedelta(seconds=max(seconds, settings.REFRESH_MIN_INTERVAL_SECONDS))
+
+
+def observe_refresh(account: RiotAccount, changed: bool, now: datetime) -> None:
+    """Update the activity of a refreshed account and schedule its next refresh.
+
+    Only sets the fields, the caller saves the account.
+
+    Args:
+        account: The account just refreshed.
+        changed: Whether the refresh found anything new.
+        now: Time of the refresh.
+    """
+    activity = decayed(account.activity, account.activity_at, now)
+    if changed:
+        activity += CHANGE_WEIGHT
+    account.activity = activity
+    account.activity_at = now
+    account.next_refresh_at = now + interval(activity)
+
+
+@transaction.atomic
+def record_queries(counts: Mapping[int, int]) -> None:
+    """Count lookups of accounts, moving their next refresh earlier if due.
+
+    Args:
+        counts: Number of lookups of each account, by account ID.
+    """
+    now = timezone.now()
+    accounts = list(
+        RiotAccount.objects.select_for_update()
+        .filter(pk__in=list(counts))
+        .only("activity", "activity_at", "last_check_timestamp", "next_refresh_at")
+    )
+    for account in accounts:
+        activity = (
+            decayed(account.activity, account.activity_at, now)
+            + QUERY_WEIGHT * counts[account.pk]
+        )
+        account.activity = activity
+        account.activity_at = now
+        account.next_refresh_at = min(
+            account.next_refresh_at,
+            account.last_check_timestamp + interval(activity),
+        )
+    RiotAccount.objects.bulk_update(
+        accounts, ["activity", "activity_at", "next_refresh_at"]
+    )
+
+
+def intervals() -> np.ndarray:
+    """Get the current refresh interval in seconds of every tracked account."""
+    tracked = SummonerProfile.objects.filter(account=OuterRef("pk"), is_active=True)
+    accounts = RiotAccount.objects.filter(Exists(tracked))
+    now = timezone.now()
+    half_life = settings.ACTIVITY_HALF_LIFE_SECONDS
+    rows = list(accounts.values_list("activity", "activity_at"))
+    activity = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+    elapsed = np.fromiter(
+        (0.0 if at is None else max((now - at).total_seconds(), 0.0) for _, at in rows),
+        dtype=np.float64,
+        count=len(rows),
+    )
+    activity *= 0.5 ** (elapsed / half_life)
+    return np.maximum(
+        settings.REFRESH_MAX_INTERVAL_SECONDS / (1.0 + activity),
+        settings.REFRESH_MIN_INTERVAL_SECONDS,
+    )
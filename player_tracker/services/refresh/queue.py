@@ -0,0 +1,187 @@
+"""Durable queue of account refreshes requested by users.
+
+Jobs live in the ``RefreshJob`` table so they survive restarts of the bot and
+of the workers. An account has at most one pending job: enqueueing it again
+only raises the job's priority. Claimed jobs are leased to a worker, which
+heartbeats while it works; jobs whose lease ran out are claimed again.
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, Q, QuerySet, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from ...models import RefreshJob, RiotAccount
+
+logger = logging.getLogger(__name__)
+
+# Priority of refreshes asked for by a user, above background requests.
+USER_PRIORITY = 10
+
+
+def _claimable(now) -> Q:
+    """Jobs due to run now, including those whose worker's lease expired."""
+    return Q(status=RefreshJob.PENDING, available_at__lte=now) | Q(
+        status=RefreshJob.RUNNING, leased_until__lt=now
+    )
+
+
+def enqueue(
+    account: RiotAccount, priority: int = 0, requested_by: str | None = None
+) -> RefreshJob:
+    """Queue a refresh of ``account``, or join its pending refresh.
+
+    Args:
+        account: Account to refresh.
+        priority: Jobs with a higher priority are claimed first.
+        requested_by: Discord ID of the user who asked for the refresh.
+
+    Returns:
+        The account's pending job.
+    """
+    now = timezone.now()
+    for _ in range(2):
+        # Jobs waiting out a retry backoff keep it, only new ones run sooner.
+        updated = RefreshJob.objects.filter(
+            account=account, status=RefreshJob.PENDING
+        ).update(
+            priority=Greatest("priority", priority),
+            available_at=Case(
+                When(attempts=0, then=Least("available_at", now)),
+                default=F("available_at"),
+            ),
+        )
+        if updated:
+            return RefreshJob.objects.get(account=account, status=RefreshJob.PENDING)
+        try:
+            with transaction.atomic():
+                return RefreshJob.objects.create(
+                    account=account,
+                    priority=priority,
+                    requested_by=requested_by,
+                    available_at=now,
+                )
+        except IntegrityError:
+            # Another process queued the account since the update, join its job.
+            continue
+    raise RuntimeError(f"Could not queue a refresh of {account}")
+
+
+def position(job: RefreshJob) -> int:
+    """Estimate the 1-based position of a pending job in the queue."""
+    ahead = RefreshJob.objects.filter(status=RefreshJob.PENDING).filter(
+        Q(priority__gt=job.priority)
+        | Q(priority=job.priority, created_at__lt=job.created_at)
+    )
+    return ahead.count() + 1
+
+
+def claim(worker_id: str, limit: int, lease_seconds: float) -> list[RefreshJob]:
+    """Lease up to ``limit`` due jobs to a worker, highest priority first.
+
+    The jobs are picked and leased in two queries whatever ``limit`` is. On
+    databases that support it, rows locked by a concurrent claim are skipped
+    rather than waited on.
+
+    Args:
+        worker_id: Identifies the worker in the leases it holds.
+        limit: Maximum number of jobs claimed.
+        lease_seconds: How long the jobs stay leased without a heartbeat.
+
+    Returns:
+        The claimed jobs, with their accounts loaded.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = RefreshJob.objects.filter(_claimable(now)).order_by(
+            "-priority", "created_at"
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        # An expired job and a newer pending one may share an account, refresh
+        # it once per batch.
+        rows = list(candidates.values_list("account_id", "pk")[:limit])
+        ids = list(dict(reversed(rows)).values())
+        if not ids:
+            return []
+        RefreshJob.objects.filter(_claimable(now), pk__in=ids).update(
+            status=RefreshJob.RUNNING,
+            worker_id=worker_id,
+            leased_until=now + timedelta(seconds=lease_seconds),
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        RefreshJob.objects.select_related("account").filter(
+            pk__in=ids, status=RefreshJob.RUNNING, worker_id=worker_id
+        )
+    )
+
+
+def heartbeat(worker_id: str, jobs: Iterable[RefreshJob], lease_seconds: float) -> int:
+    """Extend the leases a worker still holds on ``jobs``.
+
+    Returns:
+        Number of leases extended. Jobs re-claimed by another worker after the
+        lease expired are not extended.
+    """
+    return RefreshJob.objects.filter(
+        pk__in=[job.pk for job in jobs],
+        status=RefreshJob.RUNNING,
+        worker_id=worker_id,
+    ).update(leased_until=timezone.now() + timedelta(seconds=lease_seconds))
+
+
+def finish(
+    worker_id: str,
+    succeeded: Iterable[RefreshJob],
+    failed: Iterable[RefreshJob],
+    deferred: Iterable[RefreshJob] = (),
+) -> None:
+    """Record the outcome of claimed jobs.
+
+    Succeeded jobs are removed. Failed jobs are retried with an exponential
+    backoff until they reach ``REFRESH_JOB_MAX_ATTEMPTS``, then kept as failed
+    for inspection. Deferred jobs, not attempted because Riot is down, are
+    retried after ``REFRESH_JOB_RETRY_SECONDS`` without spending an attempt.
+    A job put back is dropped instead if the account was queued again
+    meanwhile, since the newer pending job will refresh it.
+    """
+    held = RefreshJob.objects.filter(status=RefreshJob.RUNNING, worker_id=worker_id)
+    held.filter(pk__in=[job.pk for job in succeeded]).delete()
+
+    now = timezone.now()
+    for job in failed:
+        if job.attempts >= settings.REFRESH_JOB_MAX_ATTEMPTS:
+            held.filter(pk=job.pk).update(status=RefreshJob.FAILED, leased_until=None)
+            logger.warning("Giving up refreshing %s", job.account)
+            continue
+        delay = settings.REFRESH_JOB_RETRY_SECONDS * 2 ** (job.attempts - 1)
+        _put_back(held.filter(pk=job.pk), now + timedelta(seconds=delay))
+    for job in deferred:
+        _put_back(
+            held.filter(pk=job.pk),
+            now + timedelta(seconds=settings.REFRESH_JOB_RETRY_SECONDS),
+            attempts=F("attempts") - 1,
+        )
+
+
+def _put_back(
+    job: QuerySet[RefreshJob], available_at: datetime, **fields: object
+) -> None:
+    """Make a held job pending again, or drop it if its account was requeued."""
+    try:
+        with transaction.atomic():
+            job.update(
+                status=RefreshJob.PENDING,
+                worker_id=None,
+                leased_until=None,
+                available_at=available_at,
+                **fields,
+            )
+    except IntegrityError:
+        job.delete()
@@ -0,0 +1,232 @@
+"""Background refresh of tracked Riot accounts."""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections.abc import Iterable
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from ...models import RefreshJob, RiotAccount, SummonerProfile
+from ..riot.exceptions import CircuitOpenError, RiotAPIError
+from ..summoner.service import SummonerService
+from . import queue
+from .partition import Partition
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshRunner:
+    """Keeps tracked accounts fresh by refreshing due ones in batches.
+
+    Accounts are due at their ``next_refresh_at``, which the refresh priorities
+    in ``priority`` set from how active each account is.
+
+    Each account is refreshed once however many users and guilds track it. The
+    runner only talks to the bot through the database: it works through the
+    refresh jobs the bot queues, then rewrites ``RiotAccount`` rows, which the
+    bot serves without calling Riot.
+
+    Several runners, in as many processes, split the due accounts when each
+    is given a ``Partition``; queued jobs go to whichever runner claims them.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        summoner_service: SummonerService,
+        batch_size: int = 50,
+        concurrency: int = 5,
+        failure_backoff: float = 600.0,
+        *,
+        worker_id: str | None = None,
+        lease_seconds: float = 60.0,
+        partition: Partition | None = None,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            summoner_service: Service used to refresh each account.
+            batch_size: Maximum number of accounts refreshed per cycle.
+            concurrency: Maximum number of refreshes in flight at once.
+            failure_backoff: Seconds an account is skipped after a failed refresh,
+                so that broken accounts don't starve the rest of the queue.
+            worker_id: Identifies this runner in the job leases it holds,
+                defaults to the host name and process ID.
+            lease_seconds: How long claimed jobs stay leased without a heartbeat.
+            partition: This runner's share of the due accounts, heartbeated
+                every ``lease_seconds / 3``. Defaults to every due account.
+        """
+        self._summoner_service = summoner_service
+        self._batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._failure_backoff = failure_backoff
+        self._failed_until: dict[int, float] = {}
+        self._worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._lease_seconds = lease_seconds
+        self._partition = partition
+        self.refreshed = 0
+        self.failed = 0
+
+    def _due_accounts(self) -> list[RiotAccount]:
+        """Load the tracked accounts due for a refresh, most overdue first."""
+        now = time.monotonic()
+        self._failed_until = {
+            pk: until for pk, until in self._failed_until.items() if until > now
+        }
+        tracked = SummonerProfile.objects.filter(account=OuterRef("pk"), is_active=True)
+        due = RiotAccount.objects.filter(
+            Exists(tracked), next_refresh_at__lte=timezone.now()
+        )
+        if self._partition is not None:
+            due = self._partition.filter(due)
+        due = due.exclude(pk__in=list(self._failed_until))
+        return list(due.order_by("next_refresh_at")[: self._batch_size])
+
+    async def _refresh_one(self, account: RiotAccount) -> bool | None:
+        """Refresh a single account, logging instead of raising on failure.
+
+        Returns:
+            Whether the refresh succeeded, or None if it wasn't attempted
+            because Riot is down.
+        """
+        async with self._semaphore:
+            try:
+                await self._summoner_service.refresh_account(account)
+            except CircuitOpenError:
+                # Riot is down, not the account: retry it once the breaker closes.
+                return None
+            except (
+                RiotAPIError,
+                aiohttp.ClientError,
+                TimeoutError,
+                DatabaseError,
+            ) as e:
+                logger.warning("Failed to refresh %s: %s", account, e)
+                self._failed_until[account.pk] = (
+                    time.monotonic() + self._failure_backoff
+                )
+                self.failed += 1
+                return False
+            self.refreshed += 1
+            return True
+
+    async def refresh_batch(self, accounts: Iterable[RiotAccount]) -> int:
+        """Refresh the given accounts concurrently.
+
+        Returns:
+            Number of accounts refreshed successfully.
+        """
+        results = await asyncio.gather(
+            *(self._refresh_one(account) for account in accounts)
+        )
+        return sum(bool(result) for result in results)
+
+    async def _heartbeat(self, jobs: list[RefreshJob]) -> None:
+        """Keep the leases on ``jobs`` alive until cancelled."""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            try:
+                await sync_to_async(queue.heartbeat)(
+                    self._worker_id, jobs, self._lease_seconds
+                )
+            except DatabaseError as e:
+                logger.warning("Job lease heartbeat failed: %s", e)
+
+    async def sync_partition(self) -> None:
+        """Heartbeat the partition, taking over the slots of stopped workers."""
+        if self._partition is not None:
+            await sync_to_async(self._partition.heartbeat)(
+                self._worker_id, self.refreshed, self.failed
+            )
+
+    async def _keep_partition(self) -> None:
+        """Heartbeat the partition until cancelled."""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            try:
+                await self.sync_partition()
+            except DatabaseError as e:
+                logger.warning("Partition heartbeat failed: %s", e)
+
+    async def leave_partition(self) -> None:
+        """Hand this runner's slots to the other runners."""
+        if self._partition is not None:
+            await sync_to_async(self._partition.leave)(self._worker_id)
+
+    async def run_jobs(self) -> int:
+        """Claim one batch of queued refresh jobs and run them.
+
+        Returns:
+            Number of jobs claimed.
+        """
+        jobs = await sync_to_async(queue.claim)(
+            self._worker_id, self._batch_size, self._lease_seconds
+        )
+        if not jobs:
+            return 0
+        heartbeat = asyncio.create_task(self._heartbeat(jobs))
+        try:
+            results = await asyncio.gather(
+                *(self._refresh_one(job.account) for job in jobs)
+            )
+        finally:
+            heartbeat.cancel()
+        outcomes = list(zip(jobs, results, strict=True))
+        succeeded = [job for job, ok in outcomes if ok]
+        failed = [job for job, ok in outcomes if ok is False]
+        deferred = [job for job, ok in outcomes if ok is None]
+        await sync_to_async(queue.finish)(
+            self._worker_id, succeeded, failed, deferred=deferred
+        )
+        logger.info("Ran %d/%d queued refresh jobs", len(succeeded), len(jobs))
+        return len(jobs)
+
+    async def run_cycle(self) -> int:
+        """Run one batch of queued jobs, or refresh a batch of due accounts.
+
+        Queued jobs were asked for by users, so they go before due accounts.
+
+        Returns:
+            Number of jobs run or accounts refreshed successfully.
+        """
+        if ran := await self.run_jobs():
+            return ran
+        accounts = await sync_to_async(self._due_accounts)()
+        if not accounts:
+            return 0
+        refreshed = await self.refresh_batch(accounts)
+        logger.info("Refreshed %d/%d due accounts", refreshed, len(accounts))
+        return refreshed
+
+    async def run_forever(self, idle_interval: float) -> None:
+        """Run queued jobs and refresh due accounts until cancelled.
+
+        A cycle failing on the database, e.g. a locked SQLite database, is
+        retried after ``idle_interval`` rather than stopping the runner.
+
+        Args:
+            idle_interval: Seconds to sleep when there is nothing to refresh.
+        """
+        try:
+            await self.sync_partition()
+        except DatabaseError as e:
+            logger.warning("Partition heartbeat failed: %s", e)
+        keeper = asyncio.create_task(self._keep_partition())
+        try:
+            while True:
+                try:
+                    ran = await self.run_cycle()
+                except DatabaseError as e:
+                    logger.warning("Refresh cycle failed: %s", e)
+                    ran = 0
+                if not ran:
+                    await asyncio.sleep(idle_interval)
+        finally:
+            keeper.cancel()
+            await self.leave_partition()
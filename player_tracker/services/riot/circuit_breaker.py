@@ -0,0 +1,125 @@
+"""Circuit breaker guarding calls to the Riot API during outages."""
+
+import time
+from collections import deque
+from enum import Enum
+
+
+class BreakerState(Enum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calls to an endpoint once it fails or slows down too often.
+
+    The breaker opens when the share of failed or slow calls among the last
+    ``window`` calls reaches ``failure_rate``. After ``open_seconds`` it turns
+    half-open and lets ``probe_limit`` concurrent probes through: one success
+    closes it again, one failure reopens it.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        open_seconds: float = 30.0,
+        probe_limit: int = 1,
+    ) -> None:
+        """Initialize the breaker.
+
+        Args:
+            window: Number of recent calls the failure rate is computed over.
+            min_calls: Calls needed in the window before the breaker may open.
+            failure_rate: Share of failed or slow calls that opens the breaker.
+            slow_call_seconds: Calls slower than this count as failures.
+            open_seconds: Time spent open before probing for recovery.
+            probe_limit: Probes allowed in flight while half-open.
+        """
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_seconds = slow_call_seconds
+        self._open_seconds = open_seconds
+        self._probe_limit = probe_limit
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+    @property
+    def state(self) -> BreakerState:
+        """Current state, moving from open to half-open once the wait is over."""
+        if (
+            self._state == BreakerState.OPEN
+            and time.monotonic() - self._opened_at >= self._open_seconds
+        ):
+            self._state = BreakerState.HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets probes through, 0 if it already does."""
+        if self.state != BreakerState.OPEN:
+            return 0.0
+        return self._open_seconds - (time.monotonic() - self._opened_at)
+
+    def allow_request(self) -> bool:
+        """Check whether a call may be made, reserving a probe slot if half-open."""
+        state = self.state
+        if state == BreakerState.CLOSED:
+            return True
+        if (
+            state == BreakerState.HALF_OPEN
+            and self._probes_in_flight < self._probe_limit
+        ):
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back the probe slot of a call that ended without a verdict.
+
+        Used when a call reserved by ``allow_request`` is cancelled or never
+        sent, so that the slot isn't held forever.
+        """
+        if self._state == BreakerState.HALF_OPEN and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
+        """Record a completed call, slow calls count as failures."""
+        if latency >= self._slow_call_seconds:
+            self.record_failure()
+            return
+        if self._state == BreakerState.HALF_OPEN:
+            self._close()
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if needed."""
+        if self._state == BreakerState.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        if len(self._outcomes) < self._min_calls:
+            return
+        failures = self._outcomes.count(False)
+        if failures / len(self._outcomes) >= self._failure_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = BreakerState.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+
+    def _close(self) -> None:
+        self._state = BreakerState.CLOSED
+        self._outcomes.clear()
+        self._probes_in_flight = 0
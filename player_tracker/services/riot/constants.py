@@ -2,6 +2,8 @@
 
 from enum import Enum
 
+from .exceptions import InvalidRegionError
+
 
 class QueueType(Enum):
     """Represents the queue type (flex, ranked)."""
@@ -32,6 +34,70 @@ class Region(Enum):
         """Get the routing value."""
         return self.routing_value
 
+    @property
+    def stored_value(self) -> str:
+        """Get the value persisted in ``SummonerProfile.server_region``."""
+        return self.platform_value.upper()
+
+    @classmethod
+    def from_platform(cls, platform: str) -> "Region":
+        """Get the region matching a platform value (e.g. 'EUW1' or 'euw1')."""
+        for region in cls:
+            if region.platform_value == platform.lower():
+                return region
+        raise InvalidRegionError(f"Unknown platform {platform}")
+
+
+class RankScore:
+    """Maps ranks onto a single integer scale, higher is better."""
+
+    TIERS = (
+        "IRON",
+        "BRONZE",
+        "SILVER",
+        "GOLD",
+        "PLATINUM",
+        "EMERALD",
+        "DIAMOND",
+    )
+    APEX_TIERS = ("MASTER", "GRANDMASTER", "CHALLENGER")
+    DIVISIONS = ("IV", "III", "II", "I")
+    DIVISION_POINTS = 100
+    # Apex tiers share one ladder ordered by LP, right above Diamond I.
+    APEX_BASE = len(TIERS) * len(DIVISIONS) * DIVISION_POINTS
+    UNRANKED = -1
+
+    @classmethod
+    def base(cls, tier: str, division: str | None) -> int:
+        """Score of a tier/division at 0 LP."""
+        if tier in cls.APEX_TIERS:
+            return cls.APEX_BASE
+        if tier not in cls.TIERS or division not in cls.DIVISIONS:
+            return cls.UNRANKED
+        steps = cls.TIERS.index(tier) * len(cls.DIVISIONS)
+        return (steps + cls.DIVISIONS.index(division)) * cls.DIVISION_POINTS
+
+    @classmethod
+    def of(cls, tier: str, division: str | None, league_points: int) -> int:
+        """Score of a rank including its league points."""
+        base = cls.base(tier, division)
+        return base if base == cls.UNRANKED else base + league_points
+
+    @classmethod
+    def rank_of(cls, score: int) -> tuple[str, str | None, int]:
+        """Rank of a score as (tier, division, league points), reverse of ``of``.
+
+        Apex scores can't tell Master from Grandmaster or Challenger apart,
+        they all map to Master.
+        """
+        if score < 0:
+            return "UNRANKED", None, 0
+        if score >= cls.APEX_BASE:
+            return cls.APEX_TIERS[0], None, score - cls.APEX_BASE
+        steps, league_points = divmod(score, cls.DIVISION_POINTS)
+        tier, division = divmod(steps, len(cls.DIVISIONS))
+        return cls.TIERS[tier], cls.DIVISIONS[division], league_points
+
 
 class APIEndpoint:
     """API endpoints."""
@@ -50,6 +116,13 @@ class APIEndpoint:
 
     # league endpoint
     LEAGUE_BY_SUMMONER = "/lol/league/v4/entries/by-summoner/{encrypted_summoner_id}"
+    # Paged with ?page=, Iron IV to Diamond I.
+    LEAGUE_ENTRIES = "/lol/league/v4/entries/{queue}/{tier}/{division}"
+    # league is "master", "grandmaster" or "challenger".
+    APEX_LEAGUE = "/lol/league/v4/{league}leagues/by-queue/{queue}"
+
+    # Spectator endpoint
+    ACTIVE_GAME_BY_PUUID = "/lol/spectator/v5/active-games/by-summoner/{puuid}"
 
 
 class RateLimit:
@@ -63,6 +136,7 @@ class APIStatusCode(Enum):
     """HTTP status codes returned by Riot API."""
 
     TOO_MANY_REQUESTS = 429
+    UNAUTHORIZED = 401
     FORBIDDEN = 403
     SERVICE_UNAVAILABLE = 503
     OK = 200
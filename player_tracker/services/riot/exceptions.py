@@ -36,6 +36,10 @@ class AuthenticationError(RiotAPIResponseError):
     """Raised when there are API key issues."""
 
 
+class KeyUnavailableError(RiotAPIError):
+    """Raised when no configured API key can serve a request."""
+
+
 class SummonerNotFoundError(RiotAPIResponseError):
     """Raised when a summoner cannot be found."""
 
@@ -46,3 +50,17 @@ class InvalidRegionError(RiotAPIError):
 
 class ServiceUnavailableError(RiotAPIResponseError):
     """Raised when Riot's services are unavailable."""
+
+
+class CircuitOpenError(RiotAPIError):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float = 0.0) -> None:
+        """Initialize the exception.
+
+        Args:
+            message: The error message.
+            retry_after: Seconds until the endpoint is probed again.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,129 @@
+"""Pool of Riot API keys, each with its own rate limits."""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .exceptions import KeyUnavailableError
+from .rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Name of the key configured through RIOT_API_KEY alone.
+DEFAULT_KEY_ID = "default"
+
+
+@dataclass
+class ApiKey:
+    """An API key and the state of its rate limits."""
+
+    key_id: str
+    token: str
+    rate_limiter: RateLimiter
+    # time.monotonic() until which the key is not used, after a 401 or 403.
+    quarantined_until: float = 0.0
+
+    def usable(self, now: float) -> bool:
+        """Whether the key is out of quarantine."""
+        return now >= self.quarantined_until
+
+
+class KeyPool:
+    """Spreads requests over several API keys.
+
+    Every key has its own budget, so requests go to the least loaded one.
+    Riot encrypts puuids and summoner ids per key though: an id got through
+    one key is meaningless to another. Requests about a stored id are pinned
+    to the key that encrypted it, by its ``key_id``.
+
+    Keys answering 401 or 403 are quarantined for ``quarantine_seconds``,
+    then tried again.
+    """
+
+    def __init__(self, keys: list[ApiKey], quarantine_seconds: float = 600.0) -> None:
+        """Initialize the pool.
+
+        Args:
+            keys: Keys of the pool, with distinct ``key_id``.
+            quarantine_seconds: How long a rejected key is left out.
+        """
+        if not keys:
+            raise ValueError("A key pool needs at least one key")
+        self._keys = {key.key_id: key for key in keys}
+        self._quarantine_seconds = quarantine_seconds
+
+    @classmethod
+    def single(cls, token: str, rate_limiter: RateLimiter | None = None) -> "KeyPool":
+        """Build a pool of one key, named ``DEFAULT_KEY_ID``."""
+        return cls([ApiKey(DEFAULT_KEY_ID, token, rate_limiter or RateLimiter())])
+
+    @classmethod
+    def from_settings(cls, share: float = 1.0) -> "KeyPool":
+        """Build a pool of the RIOT_API_KEYS keys.
+
+        Args:
+            share: Share (0-1] of every key's budget owned by this process,
+                used when several processes spend the same keys.
+        """
+        return cls(
+            [
+                ApiKey(key_id, token, RateLimiter.with_share(share))
+                for key_id, token in settings.RIOT_API_KEYS.items()
+            ],
+            quarantine_seconds=settings.RIOT_KEY_QUARANTINE_SECONDS,
+        )
+
+    def set_share(self, share: float) -> None:
+        """Resize every key's limits to ``share`` (0-1] of its budget."""
+        for key in self._keys.values():
+            key.rate_limiter.set_share(share)
+
+    def usable(self, key_id: str | None) -> bool:
+        """Whether a key is in the pool and out of quarantine."""
+        key = self._keys.get(key_id)
+        return key is not None and key.usable(time.monotonic())
+
+    def choose(self, key_id: str | None = None) -> ApiKey:
+        """Get the key a request should use.
+
+        Args:
+            key_id: Key the request is pinned to. Defaults to the least loaded
+                usable key.
+
+        Raises:
+            KeyUnavailableError: If the pinned key is unknown or quarantined,
+                or no key is usable.
+        """
+        now = time.monotonic()
+        if key_id is not None:
+            key = self._keys.get(key_id)
+            if key is None:
+                raise KeyUnavailableError(f"API key {key_id} is not configured")
+            if not key.usable(now):
+                raise KeyUnavailableError(f"API key {key_id} is quarantined")
+            return key
+        usable = [key for key in self._keys.values() if key.usable(now)]
+        if not usable:
+            raise KeyUnavailableError("Every API key is quarantined")
+        return min(usable, key=lambda key: key.rate_limiter.load())
+
+    async def acquire(self, key_id: str | None = None) -> ApiKey:
+        """Choose a key and wait until its rate limits let a request through.
+
+        Raises:
+            KeyUnavailableError: If no key can serve the request.
+        """
+        key = self.choose(key_id)
+        await key.rate_limiter.acquire()
+        return key
+
+    def quarantine(self, key: ApiKey) -> None:
+        """Leave out a key Riot rejected."""
+        key.quarantined_until = time.monotonic() + self._quarantine_seconds
+        logger.warning(
+            "API key %s rejected, quarantined for %.0fs",
+            key.key_id,
+            self._quarantine_seconds,
+        )
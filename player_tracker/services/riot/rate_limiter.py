@@ -0,0 +1,94 @@
+"""Client-side rate limiting for the Riot API."""
+
+import asyncio
+import time
+from collections import deque
+
+from .constants import RateLimit
+
+
+class RateLimiter:
+    """Sliding-window limiter enforcing Riot's application rate limits.
+
+    Every window is a ``(limit, period)`` pair; a request is only let through
+    once all windows have room for it.
+    """
+
+    def __init__(
+        self,
+        windows: tuple[tuple[int, float], ...] = (
+            (RateLimit.REQUESTS_PER_SECOND, 1.0),
+            (RateLimit.REQUESTS_PER_TWO_MINUTES, 120.0),
+        ),
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            windows: ``(limit, period_seconds)`` pairs to enforce together.
+        """
+        self._windows = [(limit, period, deque[float]()) for limit, period in windows]
+        self._full_limits = [limit for limit, _ in windows]
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+
+    @classmethod
+    def with_share(cls, share: float) -> "RateLimiter":
+        """Build a limiter owning ``share`` (0-1] of the default budget.
+
+        Used when several processes spend the same API key.
+        """
+        limiter = cls()
+        limiter.set_share(share)
+        return limiter
+
+    def set_share(self, share: float) -> None:
+        """Own ``share`` (0-1] of the windows' limits from now on.
+
+        Used when the number of processes spending the same API key changes.
+        Requests already sent keep counting towards the resized windows.
+        """
+        if not 0 < share <= 1:
+            raise ValueError("share must be in (0, 1]")
+        self._windows = [
+            (max(1, int(full_limit * share)), period, stamps)
+            for full_limit, (_, period, stamps) in zip(
+                self._full_limits, self._windows, strict=True
+            )
+        ]
+
+    def _delay(self, now: float) -> float:
+        """Seconds to wait before the next request fits in every window."""
+        delay = 0.0
+        for limit, period, stamps in self._windows:
+            while stamps and now - stamps[0] >= period:
+                stamps.popleft()
+            if len(stamps) >= limit:
+                delay = max(delay, period - (now - stamps[0]))
+        return delay
+
+    def load(self) -> float:
+        """Fraction of the fullest window in use, counting waiting requests.
+
+        Above 1 when requests queue for room.
+        """
+        self._delay(time.monotonic())
+        return max(
+            (
+                (len(stamps) + self._waiting) / limit
+                for limit, _, stamps in self._windows
+            ),
+            default=0.0,
+        )
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent and record it."""
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while (delay := self._delay(time.monotonic())) > 0:
+                    await asyncio.sleep(delay)
+                now = time.monotonic()
+                for _, _, stamps in self._windows:
+                    stamps.append(now)
+        finally:
+            self._waiting -= 1
@@ -1,18 +1,34 @@
 """Service for interacting with Riot API."""
 
+import asyncio
+import time
+from collections.abc import Iterable
 from typing import ClassVar
 
 import aiohttp
 
+from ..profiling.profiler import span
+from .circuit_breaker import BreakerState, CircuitBreaker
 from .constants import APIEndpoint, APIStatusCode, Region
 from .exceptions import (
     AuthenticationError,
+    CircuitOpenError,
     RateLimitError,
-    RiotAPIError,
+    RiotAPIResponseError,
     ServiceUnavailableError,
     SummonerNotFoundError,
 )
-from .types import LeagueEntryDTO, RiotAccountDTO, SummonerDTO
+from .key_pool import KeyPool
+from .rate_limiter import RateLimiter
+from .types import (
+    CurrentGameInfoDTO,
+    LadderEntryDTO,
+    LeagueEntryDTO,
+    RiotAccountDTO,
+    SummonerDTO,
+)
+
+SERVER_ERROR_STATUS = 500
 
 
 class RiotAPIService:
@@ -20,31 +36,63 @@ class RiotAPIService:
 
     _shared_session: ClassVar[aiohttp.ClientSession | None] = None
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
-        api_key: str,
+        api_key: str | None = None,
         region: Region = Region.euw,
         session: aiohttp.ClientSession | None = None,
+        rate_limiter: RateLimiter | None = None,
+        base_url: str = APIEndpoint.BASE_URL,
+        *,
+        key_pool: KeyPool | None = None,
     ) -> None:
         """Service Initializer.
         Args:
-            api_key: The Riot API key.
+            api_key: The Riot API key, when a single key is used.
             region: The region to make requests to. Defaults to EUW.
             session: Optional aiohttp session. If not provided, one will be created.
+            rate_limiter: Optional limiter of ``api_key``. Defaults to one
+                owning the key's whole budget.
+            base_url: URL template of the API with a ``{region}`` placeholder,
+                overridden to point at a local stand-in in benchmarks.
+            key_pool: Keys the requests are spread over, instead of ``api_key``.
         """
-        self._API_KEY = api_key
+        if key_pool is None:
+            if api_key is None:
+                raise ValueError("Either api_key or key_pool is required")
+            key_pool = KeyPool.single(api_key, rate_limiter)
+        self.key_pool = key_pool
+        self._base_url = base_url
         self._session: aiohttp.ClientSession = session
         self._region = region
+        self._breakers: dict[tuple[str, str], CircuitBreaker] = {}
         # Don't set base_url in init as it depends on the endpoint
 
     @classmethod
     async def create(
-        cls, api_key: str, region: Region = Region.euw
+        cls,
+        api_key: str | None = None,
+        region: Region = Region.euw,
+        rate_limiter: RateLimiter | None = None,
+        key_pool: KeyPool | None = None,
     ) -> "RiotAPIService":
         """Create a service instance with shared session management."""
         if cls._shared_session is None or cls._shared_session.closed:
             cls._shared_session = aiohttp.ClientSession()
-        return cls(api_key, region, session=cls._shared_session)
+        return cls(
+            api_key,
+            region,
+            session=cls._shared_session,
+            rate_limiter=rate_limiter,
+            key_pool=key_pool,
+        )
+
+    @classmethod
+    async def close_shared_session(cls) -> None:
+        """Close the session shared by instances built with ``create``."""
+        if cls._shared_session is not None and not cls._shared_session.closed:
+            await cls._shared_session.close()
+        cls._shared_session = None
 
     @property
     def session(self) -> aiohttp.ClientSession:
@@ -56,22 +104,53 @@ class RiotAPIService:
                 self._session = aiohttp.ClientSession()
         return self._session
 
-    def _get_base_url(self, use_routing: bool = False) -> str:
+    def _get_base_url(
+        self, use_routing: bool = False, region: Region | None = None
+    ) -> str:
         """Get the appropriate base URL based on endpoint type.
 
         Args:
             use_routing: If True, use routing value (e.g., 'europe'),
                         otherwise use platform value (e.g., 'euw1')
+            region: Region of the request. Defaults to the service region.
+        """
+        region = region or self._region
+        region_value = region.routing if use_routing else region.platform
+        return self._base_url.format(region=region_value)
+
+    def _breaker(self, route: str, host: str) -> CircuitBreaker:
+        """Get the circuit breaker of an endpoint in a region."""
+        key = (route, host)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker()
+        return self._breakers[key]
+
+    def circuit_open(self, region: Region, routes: Iterable[str]) -> bool:
+        """Check whether an endpoint of a region is cut off by its breaker.
+
+        Half-open breakers don't count, their probes are what detects recovery.
+
+        Args:
+            region: Region of the requests.
+            routes: Endpoint templates the caller is about to request.
         """
-        region_value = self._region.routing if use_routing else self._region.platform
-        return APIEndpoint.BASE_URL.format(region=region_value)
+        hosts = {region.routing, region.platform}
+        routes = set(routes)
+        return any(
+            breaker.state == BreakerState.OPEN
+            for (route, host), breaker in self._breakers.items()
+            if host in hosts and route in routes
+        )
 
-    async def _make_request(
+    async def _make_request(  # noqa: PLR0913
         self,
         endpoint: str,
         *,
         use_routing: bool = False,
         params: dict | None = None,
+        region: Region | None = None,
+        route: str | None = None,
+        key_id: str | None = None,
     ) -> dict:
         """Make a request to the Riot API.
 
@@ -79,22 +158,73 @@ class RiotAPIService:
             endpoint: The API endpoint to request.
             use_routing: Whether to use routing value instead of platform.
             params: Optional query parameters.
+            region: Region of the request. Defaults to the service region.
+            route: Endpoint template the circuit breaker is keyed on.
+                Defaults to ``endpoint``.
+            key_id: Key the request is pinned to, the one that encrypted the
+                ids it carries. Defaults to the least loaded key.
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit breaker is open.
+            KeyUnavailableError: If no key can serve the request.
         """
+        region = region or self._region
+        host = region.routing if use_routing else region.platform
+        breaker = self._breaker(route or endpoint, host)
+        if not breaker.allow_request():
+            raise CircuitOpenError(
+                f"Circuit open for {route or endpoint} on {host}",
+                retry_after=breaker.retry_after,
+            )
+
+        base_url = self._get_base_url(use_routing, region)
+        url = f"{base_url}{endpoint}"
+        try:
+            with span("rate_limit"):
+                api_key = await self.key_pool.acquire(key_id)
+        except BaseException:
+            # No request was sent, the endpoint gets no verdict.
+            breaker.release()
+            raise
         headers = {
-            "X-Riot-Token": self._API_KEY,
+            "X-Riot-Token": api_key.token,
         }
-        print(self._API_KEY)
-        base_url = self._get_base_url(use_routing)
-        url = f"{base_url}{endpoint}"
-        print("base_url", url)
-        print("We try?")
+        started = time.monotonic()
+        try:
+            with span("api"):
+                data = await self._send(url, headers, params)
+        except RiotAPIResponseError as e:
+            if isinstance(e, AuthenticationError):
+                self.key_pool.quarantine(api_key)
+            # Client errors such as 404 or 429 still prove the endpoint is up.
+            if e.status_code is not None and e.status_code < SERVER_ERROR_STATUS:
+                breaker.record_success(time.monotonic() - started)
+            else:
+                breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by the caller, e.g. a command timeout or a shutdown,
+            # which says nothing about the endpoint.
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.monotonic() - started)
+        return data
+
+    async def _send(self, url: str, headers: dict, params: dict | None) -> dict:
+        """Send a GET request and map error statuses to exceptions."""
         async with self.session.get(url, headers=headers, params=params) as response:
             if response.status == APIStatusCode.TOO_MANY_REQUESTS.value:
                 raise RateLimitError(
                     "Rate limit exceeded",
                     status_code=response.status,
                 )
-            elif response.status == APIStatusCode.FORBIDDEN.value:
+            elif response.status in {
+                APIStatusCode.UNAUTHORIZED.value,
+                APIStatusCode.FORBIDDEN.value,
+            }:
                 raise AuthenticationError(
                     "Invalid API key",
                     status_code=response.status,
@@ -105,26 +235,39 @@ class RiotAPIService:
                     status_code=response.status,
                 )
             elif response.status != APIStatusCode.OK.value:
-                raise RiotAPIError(
+                raise RiotAPIResponseError(
                     f"API request failed with status {response.status}",
                     status_code=response.status,
                 )
             return await response.json()
 
     async def get_summoner_account(
-        self, summoner_name: str, tagline: str, region: Region
+        self,
+        summoner_name: str,
+        tagline: str,
+        region: Region,
+        key_id: str | None = None,
     ) -> RiotAccountDTO:
-        """Gets account data and puuid using name and tagline."""
-        self._region = region  # Update region for this request
+        """Gets account data and puuid using name and tagline.
+
+        The puuid is encrypted for the key the request used, pass the same
+        ``key_id`` to the requests made with it.
+        """
         endpoint = APIEndpoint.ACCOUNT_BY_SUMMONER_NAME_WITH_TAGLINE.format(
             summoner_name=summoner_name, tagline=tagline
         )
 
         try:
-            data = await self._make_request(endpoint, use_routing=True)
+            data = await self._make_request(
+                endpoint,
+                use_routing=True,
+                region=region,
+                route=APIEndpoint.ACCOUNT_BY_SUMMONER_NAME_WITH_TAGLINE,
+                key_id=key_id,
+            )
             return RiotAccountDTO(**data)
-        except aiohttp.ClientResponseError as e:
-            if e.status == APIStatusCode.NOT_FOUND.value:
+        except RiotAPIResponseError as e:
+            if e.status_code == APIStatusCode.NOT_FOUND.value:
                 raise SummonerNotFoundError(
                     f"Summoner {summoner_name} not found"
                 ) from e
@@ -135,18 +278,25 @@ class RiotAPIService:
         puuid: str,
         name: str,
         tagline: str,
+        region: Region | None = None,
+        key_id: str | None = None,
     ) -> SummonerDTO:
         """Fetch summoner information by PUUID."""
         endpoint = APIEndpoint.SUMMONER_BY_PUUID.format(puuid=puuid)
 
         try:
-            data = await self._make_request(endpoint, use_routing=False)
-            print(data)
+            data = await self._make_request(
+                endpoint,
+                use_routing=False,
+                region=region,
+                route=APIEndpoint.SUMMONER_BY_PUUID,
+                key_id=key_id,
+            )
             data["name"] = name
             data["tagline"] = tagline
             return SummonerDTO(**data)
-        except aiohttp.ClientResponseError as e:
-            if e.status == APIStatusCode.NOT_FOUND.value:
+        except RiotAPIResponseError as e:
+            if e.status_code == APIStatusCode.NOT_FOUND.value:
                 raise SummonerNotFoundError(
                     f"Summoner with PUUID {puuid} not found"
                 ) from e
@@ -155,15 +305,93 @@ class RiotAPIService:
     async def get_league_entries(
         self,
         encrypted_summoner_id: str,
+        region: Region | None = None,
+        key_id: str | None = None,
     ) -> list[LeagueEntryDTO]:
         """Fetch league entries for a summoner."""
         endpoint = APIEndpoint.LEAGUE_BY_SUMMONER.format(
             encrypted_summoner_id=encrypted_summoner_id
         )
 
-        data = await self._make_request(endpoint, use_routing=False)
+        data = await self._make_request(
+            endpoint,
+            use_routing=False,
+            region=region,
+            route=APIEndpoint.LEAGUE_BY_SUMMONER,
+            key_id=key_id,
+        )
         return [LeagueEntryDTO(**entry) for entry in data]
 
+    async def get_league_page(
+        self,
+        queue: str,
+        tier: str,
+        division: str,
+        page: int,
+        region: Region | None = None,
+    ) -> list[LadderEntryDTO]:
+        """Fetch one page of the players of a tier and division.
+
+        Args:
+            queue: Queue type, e.g. RANKED_SOLO_5x5.
+            tier: Tier below the apex tiers, e.g. GOLD.
+            division: Division, I to IV.
+            page: Page number, starting at 1. Pages past the last are empty.
+            region: Region of the ladder. Defaults to the service region.
+        """
+        endpoint = APIEndpoint.LEAGUE_ENTRIES.format(
+            queue=queue, tier=tier, division=division
+        )
+        data = await self._make_request(
+            endpoint,
+            params={"page": page},
+            region=region,
+            route=APIEndpoint.LEAGUE_ENTRIES,
+        )
+        return [LadderEntryDTO.from_response(entry) for entry in data]
+
+    async def get_apex_league(
+        self, queue: str, tier: str, region: Region | None = None
+    ) -> list[LadderEntryDTO]:
+        """Fetch every player of an apex tier, which is a single league.
+
+        Args:
+            queue: Queue type, e.g. RANKED_SOLO_5x5.
+            tier: MASTER, GRANDMASTER or CHALLENGER.
+            region: Region of the ladder. Defaults to the service region.
+        """
+        endpoint = APIEndpoint.APEX_LEAGUE.format(league=tier.lower(), queue=queue)
+        data = await self._make_request(
+            endpoint, region=region, route=APIEndpoint.APEX_LEAGUE
+        )
+        return [
+            LadderEntryDTO.from_response(entry, tier=data.get("tier", tier))
+            for entry in data.get("entries", [])
+        ]
+
+    async def get_active_game(
+        self, puuid: str, region: Region | None = None, key_id: str | None = None
+    ) -> CurrentGameInfoDTO | None:
+        """Fetch the game a player is currently in.
+
+        Returns:
+            The live game, or None if the player isn't in one.
+        """
+        endpoint = APIEndpoint.ACTIVE_GAME_BY_PUUID.format(puuid=puuid)
+        try:
+            data = await self._make_request(
+                endpoint,
+                use_routing=False,
+                region=region,
+                route=APIEndpoint.ACTIVE_GAME_BY_PUUID,
+                key_id=key_id,
+            )
+        except RiotAPIResponseError as e:
+            if e.status_code == APIStatusCode.NOT_FOUND.value:
+                return None
+            raise
+        return CurrentGameInfoDTO.from_response(data)
+
     async def close(self) -> None:
         """Close the service's session if it's not the shared session."""
         if (
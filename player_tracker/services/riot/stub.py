@@ -0,0 +1,134 @@
+"""Local stand-in for the Riot API, for offline benchmarks."""
+
+import asyncio
+import hashlib
+import random
+
+from aiohttp import web
+
+from .constants import QueueType, RankScore
+
+# Prefix of the puuids of the stand-in's players.
+PUUID_PREFIX = "stub-"
+# Tiers handed out by the stand-in, apex tiers have a single division.
+TIERS = RankScore.TIERS + RankScore.APEX_TIERS
+
+
+class RiotStub:
+    """Serves the account, summoner and league endpoints with made-up players.
+
+    Every Riot ID exists, and always gets the same rank, derived from a hash of
+    the ID. Each response is delayed by ``latency`` plus up to ``jitter``
+    seconds to stand in for the network round trip to Riot.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02) -> None:
+        """Initialize the stand-in.
+
+        Args:
+            latency: Minimum delay of every response, in seconds.
+            jitter: Maximum random delay added to ``latency``, in seconds.
+        """
+        self._latency = latency
+        self._jitter = jitter
+        self._runner: web.AppRunner | None = None
+        self.requests = 0
+
+    @staticmethod
+    def puuid(name: str, tagline: str) -> str:
+        """Get the puuid the stand-in gives a Riot ID, to seed matching accounts."""
+        return f"{PUUID_PREFIX}{name}-{tagline}"
+
+    async def start(self) -> str:
+        """Start serving on a free local port.
+
+        Returns:
+            URL template to pass as ``RiotAPIService(base_url=...)``.
+        """
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get(
+                    "/{host}/riot/account/v1/accounts/by-riot-id/{name}/{tagline}",
+                    self._account,
+                ),
+                web.get(
+                    "/{host}/lol/summoner/v4/summoners/by-puuid/{puuid}",
+                    self._summoner,
+                ),
+                web.get(
+                    "/{host}/lol/league/v4/entries/by-summoner/{summoner_id}",
+                    self._league_entries,
+                ),
+            ]
+        )
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        port = self._runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}/{{region}}"
+
+    async def close(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self) -> None:
+        """Count the request and wait as long as Riot would take."""
+        self.requests += 1
+        await asyncio.sleep(self._latency + random.uniform(0, self._jitter))
+
+    async def _account(self, request: web.Request) -> web.Response:
+        """Account-V1 by Riot ID."""
+        await self._delay()
+        name = request.match_info["name"]
+        tagline = request.match_info["tagline"]
+        return web.json_response(
+            {"puuid": self.puuid(name, tagline), "gameName": name, "tagLine": tagline}
+        )
+
+    async def _summoner(self, request: web.Request) -> web.Response:
+        """Summoner-V4 by puuid."""
+        await self._delay()
+        puuid = request.match_info["puuid"]
+        return web.json_response(
+            {
+                "id": f"summoner-{puuid}",
+                "accountId": f"account-{puuid}",
+                "puuid": puuid,
+                "profileIconId": 1,
+                "revisionDate": 1_700_000_000_000,
+                "summonerLevel": 100,
+            }
+        )
+
+    async def _league_entries(self, request: web.Request) -> web.Response:
+        """League-V4 entries of a summoner, a Solo/Duo rank seeded by its id."""
+        await self._delay()
+        summoner_id = request.match_info["summoner_id"]
+        seed = int.from_bytes(hashlib.blake2b(summoner_id.encode()).digest()[:4])
+        tier = TIERS[seed % len(TIERS)]
+        division = (
+            "I"
+            if tier in RankScore.APEX_TIERS
+            else RankScore.DIVISIONS[seed % len(RankScore.DIVISIONS)]
+        )
+        return web.json_response(
+            [
+                {
+                    "leagueId": f"league-{tier}",
+                    "queueType": QueueType.RANKED_SOLO.value,
+                    "tier": tier,
+                    "rank": division,
+                    "summonerId": summoner_id,
+                    "leaguePoints": seed % 100,
+                    "wins": seed % 200,
+                    "losses": seed % 190,
+                    "veteran": False,
+                    "inactive": False,
+                    "freshBlood": False,
+                    "hotStreak": False,
+                }
+            ]
+        )
@@ -42,3 +42,66 @@ class LeagueEntryDTO:
     inactive: bool
     freshBlood: bool
     hotStreak: bool
+
+
+@dataclasses.dataclass
+class LadderEntryDTO:
+    """Represents the rank of one player of a League-V4 ladder page or league."""
+
+    tier: str
+    rank: str  # I, II, III, IV, always I in apex tiers
+    leaguePoints: int
+
+    @classmethod
+    def from_response(cls, data: dict, tier: str | None = None) -> "LadderEntryDTO":
+        """Build the DTO from a response entry, ignoring fields we don't use.
+
+        Args:
+            data: A league entry, or an entry of an apex league.
+            tier: Tier of the league, apex league entries don't repeat it.
+        """
+        return cls(
+            tier=data.get("tier", tier),
+            rank=data.get("rank", "I"),
+            leaguePoints=data["leaguePoints"],
+        )
+
+
+@dataclasses.dataclass
+class CurrentGameParticipantDTO:
+    """Represents a participant of a live game from Spectator-V5 API."""
+
+    puuid: str
+    championId: int
+    teamId: int
+
+
+@dataclasses.dataclass
+class CurrentGameInfoDTO:
+    """Represents a game in progress from Spectator-V5 API."""
+
+    gameId: int
+    gameMode: str
+    gameQueueConfigId: int
+    gameStartTime: int  # epoch milliseconds, 0 while in champion select
+    gameLength: int  # seconds
+    participants: list[CurrentGameParticipantDTO]
+
+    @classmethod
+    def from_response(cls, data: dict) -> "CurrentGameInfoDTO":
+        """Build the DTO from a response, ignoring fields we don't use."""
+        return cls(
+            gameId=data["gameId"],
+            gameMode=data["gameMode"],
+            gameQueueConfigId=data.get("gameQueueConfigId", 0),
+            gameStartTime=data.get("gameStartTime", 0),
+            gameLength=data.get("gameLength", 0),
+            participants=[
+                CurrentGameParticipantDTO(
+                    puuid=participant.get("puuid", ""),
+                    championId=participant["championId"],
+                    teamId=participant["teamId"],
+                )
+                for participant in data.get("participants", [])
+            ],
+        )
@@ -0,0 +1,139 @@
+"""Data Dragon static data, read from versioned bundles on disk."""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bundles use the layout of the Data Dragon archive, plus the queues list that
+# Riot publishes separately: <directory>/<version>/data/<locale>/champion.json
+# and <directory>/<version>/queues.json.
+CHAMPIONS_FILE = "champion.json"
+QUEUES_FILE = "queues.json"
+
+
+def _version_key(name: str) -> tuple[int, ...] | None:
+    """Sort key of a Data Dragon version such as 14.20.1, None if not one."""
+    try:
+        return tuple(int(part) for part in name.split("."))
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class StaticBundle:
+    """Lookup tables parsed from one version of the static data."""
+
+    version: str
+    champions: dict[int, str]
+    queues: dict[int, str]
+
+    @classmethod
+    def load(cls, path: Path, locale: str = "en_US") -> "StaticBundle":
+        """Parse the bundle of one version.
+
+        Args:
+            path: Directory of the version.
+            locale: Locale of the champion names.
+
+        Raises:
+            OSError: If the champion file can't be read.
+            ValueError: If a file isn't valid JSON.
+            KeyError: If the champion file lacks expected fields.
+        """
+        data = json.loads((path / "data" / locale / CHAMPIONS_FILE).read_bytes())
+        # Champions are keyed by their internal name, "key" holds the numeric id
+        # that match and spectator data refer to.
+        champions = {
+            int(champion["key"]): champion["name"] for champion in data["data"].values()
+        }
+        queues = {}
+        queues_path = path / QUEUES_FILE
+        if queues_path.exists():
+            queues = {
+                queue["queueId"]: queue["description"]
+                for queue in json.loads(queues_path.read_bytes())
+                if queue.get("description")
+            }
+        return cls(version=path.name, champions=champions, queues=queues)
+
+
+class StaticDataStore:
+    """Serves the newest static data bundle of a directory.
+
+    The bundle is parsed once into dictionaries, so lookups never touch the
+    disk or the network. ``reload`` swaps in a newer version when one appears,
+    replacing the bundle in a single assignment so concurrent lookups see
+    either the old or the new tables. Bundles should be copied in under a
+    temporary name and renamed, as ``fetch_static_data`` does; a bundle that
+    fails to parse is skipped and the current one kept.
+    """
+
+    def __init__(self, directory: Path, locale: str = "en_US") -> None:
+        """Initialize the store, empty until ``reload`` is called.
+
+        Args:
+            directory: Directory holding one subdirectory per version.
+            locale: Locale of the champion names.
+        """
+        self._directory = directory
+        self._locale = locale
+        self._bundle = StaticBundle(version="", champions={}, queues={})
+
+    @property
+    def version(self) -> str | None:
+        """Version of the loaded bundle, None if none was loaded."""
+        return self._bundle.version or None
+
+    def latest_version(self) -> str | None:
+        """Get the newest version present in the directory."""
+        try:
+            names = [path.name for path in self._directory.iterdir() if path.is_dir()]
+        except FileNotFoundError:
+            return None
+        versions = [name for name in names if _version_key(name) is not None]
+        return max(versions, key=_version_key, default=None)
+
+    def reload(self) -> bool:
+        """Load the newest bundle if it differs from the loaded one.
+
+        Returns:
+            Whether a new bundle was swapped in.
+        """
+        version = self.latest_version()
+        if version is None or version == self._bundle.version:
+            return False
+        try:
+            bundle = StaticBundle.load(self._directory / version, self._locale)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not load static data %s: %s", version, e)
+            return False
+        self._bundle = bundle
+        logger.info(
+            "Loaded static data %s: %d champions, %d queues",
+            version,
+            len(bundle.champions),
+            len(bundle.queues),
+        )
+        return True
+
+    async def watch(self, interval: float = 300.0) -> None:
+        """Reload whenever a new version appears, until cancelled.
+
+        Args:
+            interval: Seconds between two checks of the directory.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reload)
+
+    def champion_name(self, champion_id: int) -> str:
+        """Get the name of a champion, a placeholder if it's unknown."""
+        return self._bundle.champions.get(champion_id, f"Champion {champion_id}")
+
+    def queue_name(self, queue_id: int) -> str | None:
+        """Get the description of a queue, None if it's unknown."""
+        return self._bundle.queues.get(queue_id)
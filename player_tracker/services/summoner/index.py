@@ -0,0 +1,76 @@
+"""In-memory index of tracked summoner profiles."""
+
+from ...models import RiotAccount, SummonerProfile
+
+
+class ProfileIndex:
+    """Maps Discord ids and Riot IDs to active profiles.
+
+    Holds profile instances with their account loaded, so that commands can skip
+    the database entirely; callers are responsible for reloading an entry once
+    it is too old.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._by_discord_id: dict[str, SummonerProfile] = {}
+        # Several users can register the same account, hence one bucket per key.
+        self._by_riot_id: dict[str, dict[int, SummonerProfile]] = {}
+        self._riot_id_of: dict[int, str] = {}
+
+    @staticmethod
+    def riot_id_key(name: str, tagline: str | None) -> str:
+        """Get the key of a Riot ID in the index, ignoring case."""
+        return RiotAccount.normalize_riot_id(name, tagline)
+
+    def __len__(self) -> int:
+        return len(self._by_discord_id)
+
+    def load(self) -> int:
+        """Replace the index content with every active profile, in one query.
+
+        Returns:
+            Number of indexed profiles.
+        """
+        self._by_discord_id.clear()
+        self._by_riot_id.clear()
+        self._riot_id_of.clear()
+        for profile in SummonerProfile.objects.filter(is_active=True).select_related(
+            "account"
+        ):
+            self.add(profile)
+        return len(self)
+
+    def add(self, profile: SummonerProfile) -> None:
+        """Index a profile, replacing any previous entry for it."""
+        key = self.riot_id_key(profile.account.summoner_name, profile.account.tagline)
+        previous_key = self._riot_id_of.get(profile.pk)
+        if previous_key is not None and previous_key != key:
+            self._discard_riot_id(previous_key, profile.pk)
+        self._by_discord_id[profile.discord_id] = profile
+        self._by_riot_id.setdefault(key, {})[profile.pk] = profile
+        self._riot_id_of[profile.pk] = key
+
+    def _discard_riot_id(self, key: str, pk: int) -> None:
+        """Drop a profile from the bucket of a Riot ID."""
+        bucket = self._by_riot_id.get(key)
+        if bucket is not None:
+            bucket.pop(pk, None)
+            if not bucket:
+                del self._by_riot_id[key]
+
+    def remove(self, profile: SummonerProfile) -> None:
+        """Drop a profile from the index."""
+        self._by_discord_id.pop(profile.discord_id, None)
+        key = self._riot_id_of.pop(profile.pk, None)
+        if key is not None:
+            self._discard_riot_id(key, profile.pk)
+
+    def by_discord_id(self, discord_id: str) -> SummonerProfile | None:
+        """Get the profile registered by a Discord user."""
+        return self._by_discord_id.get(discord_id)
+
+    def by_riot_id(self, name: str, tagline: str | None) -> SummonerProfile | None:
+        """Get a profile registered with a Riot ID, ignoring case."""
+        bucket = self._by_riot_id.get(self.riot_id_key(name, tagline))
+        return next(iter(bucket.values()), None) if bucket else None
@@ -1,12 +1,46 @@
 """Facade for interactions between django models and Riot API service."""
 
+import asyncio
+import logging
+from collections import Counter
+from datetime import timedelta
 
+import aiohttp
 from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
-from ...models import SummonerProfile
-from ..riot.constants import QueueType, Region
+from ...cache import TTLCache
+from ...models import (
+    GuildMember,
+    QueueRank,
+    RankSnapshot,
+    RefreshJob,
+    RiotAccount,
+    SummonerProfile,
+)
+from ..guild import stats as guild_stats
+from ..profiling.profiler import span
+from ..refresh import priority as refresh_priority
+from ..riot.constants import APIEndpoint, RankScore, Region
+from ..riot.exceptions import CircuitOpenError, RiotAPIError
 from ..riot.service import RiotAPIService
 from ..riot.types import LeagueEntryDTO, RiotAccountDTO, SummonerDTO
+from .index import ProfileIndex
+from .types import PlayerRanks, ScoutedProfile
+
+logger = logging.getLogger(__name__)
+
+# Errors of a single player's lookup, which don't fail the others.
+LOOKUP_ERRORS = (RiotAPIError, aiohttp.ClientError, TimeoutError)
+# Endpoints a refresh of an account goes through.
+REFRESH_ROUTES = (
+    APIEndpoint.ACCOUNT_BY_SUMMONER_NAME_WITH_TAGLINE,
+    APIEndpoint.SUMMONER_BY_PUUID,
+    APIEndpoint.LEAGUE_BY_SUMMONER,
+)
 
 
 class SummonerService:
@@ -15,9 +49,27 @@ class SummonerService:
     def __init__(
         self,
         riot_api: RiotAPIService,
+        profile_index: ProfileIndex | None = None,
+        scout_cache: TTLCache[ScoutedProfile] | None = None,
     ) -> None:
-        """Intializes the instance with an instance of RiotAPIService."""
+        """Intializes the instance with an instance of RiotAPIService.
+
+        Args:
+            riot_api: Service used to fetch data from Riot.
+            profile_index: Optional in-memory index kept up to date with every
+                profile this service reads or writes.
+            scout_cache: Cache of players looked up without being tracked.
+                Defaults to one sized from the SCOUT_CACHE_* settings.
+        """
         self._riot_api = riot_api
+        self._profile_index = profile_index
+        if scout_cache is None:
+            scout_cache = TTLCache[ScoutedProfile](
+                max_entries=settings.SCOUT_CACHE_MAX_ENTRIES,
+                ttl=settings.SCOUT_CACHE_TTL_SECONDS,
+            )
+        self._scout_cache = scout_cache
+        self._query_counts: Counter[int] = Counter()
 
     async def update_summoner_profile(
         self,
@@ -26,87 +78,537 @@ class SummonerService:
         tagline: str,
         region: Region = Region.euw,
     ) -> SummonerProfile:
-        """Update or create a summoner profile with latest data from Riot.
+        """Link a Discord user to a Riot account, with latest data from Riot.
 
         Args:
             discord_id: Discord ID of the user.
-            summoner_name: Summoner name to look up.
+            name: Game name of the Riot ID to look up.
+            tagline: Tagline of the Riot ID.
             region: Game region for the summoner.
 
         Returns:
-            Updated SummonerProfile instance.
+            The user's SummonerProfile, with its account loaded.
 
         Raises:
             SummonerNotFoundError: If summoner doesn't exist.
             RiotAPIError: For other API-related errors.
         """
-        account_dto: RiotAccountDTO = await self._riot_api.get_summoner_account(
-            summoner_name=name, tagline=tagline, region=region
-        )
-        summoner_dto: SummonerDTO = await self._riot_api.get_summoner_by_puuid(
-            puuid=account_dto.puuid, name=name, tagline=tagline
+        account = await self.sync_account(name, tagline, region)
+        with span("db"):
+            profile = await sync_to_async(self._link_profile)(discord_id, account)
+        if self._profile_index is not None:
+            self._profile_index.add(profile)
+        return profile
+
+    async def sync_account(
+        self,
+        name: str,
+        tagline: str,
+        region: Region = Region.euw,
+        account: RiotAccount | None = None,
+    ) -> RiotAccount:
+        """Store the latest data of a Riot account, whoever tracks it.
+
+        The account's ids are fetched with the key that encrypted the stored
+        ones. When that key is gone or quarantined, another key is used and
+        the stored account moves to the ids it encrypts.
+
+        Args:
+            name: Game name of the Riot ID.
+            tagline: Tagline of the Riot ID.
+            region: Game region for the summoner.
+            account: Stored account of the Riot ID. Defaults to looking it up.
+
+        Raises:
+            SummonerNotFoundError: If summoner doesn't exist.
+            RiotAPIError: For other API-related errors.
+        """
+        if account is None:
+            with span("db"):
+                account = await sync_to_async(self._stored_account)(
+                    name, tagline, region
+                )
+        key_id = None
+        if account is not None and self._riot_api.key_pool.usable(account.api_key_id):
+            key_id = account.api_key_id
+        account_dto, summoner_dto, league_entries, key_id = await self._fetch_riot_data(
+            name, tagline, region, key_id
         )
-        league_entries: list[LeagueEntryDTO] = await self._riot_api.get_league_entries(
-            encrypted_summoner_id=summoner_dto.id,
+        rekeyed = account.pk if account and account.api_key_id != key_id else None
+        with span("db"):
+            return await sync_to_async(self._store_account)(
+                account_dto,
+                summoner_dto,
+                league_entries,
+                region,
+                key_id,
+                rekeyed=rekeyed,
+            )
+
+    @staticmethod
+    def _stored_account(name: str, tagline: str, region: Region) -> RiotAccount | None:
+        """Get the stored account of a Riot ID, with the key of its ids."""
+        return (
+            RiotAccount.objects.filter(
+                riot_id_normalized=RiotAccount.normalize_riot_id(name, tagline),
+                server_region=region.stored_value,
+            )
+            .only("pk", "api_key_id")
+            .first()
         )
-        profile, _ = await sync_to_async(SummonerProfile.objects.get_or_create)(
-            discord_id=discord_id,
+
+    @transaction.atomic
+    def _store_account(  # noqa: PLR0913
+        self,
+        account_dto: RiotAccountDTO,
+        summoner_dto: SummonerDTO,
+        league_entries: list[LeagueEntryDTO],
+        region: Region,
+        key_id: str,
+        *,
+        rekeyed: int | None = None,
+    ) -> RiotAccount:
+        """Write fetched data to the account of a puuid, creating it if needed.
+
+        Args:
+            key_id: Key that encrypted the fetched ids.
+            rekeyed: Stored account whose ids were encrypted by another key,
+                moved to the fetched puuid. If another account stores that
+                puuid, the rekeyed one is merged into it.
+        """
+        # Another key encrypts another puuid for the same player, the stored
+        # account takes it over, or merges into the account already storing it.
+        if rekeyed is not None:
+            existing = (
+                RiotAccount.objects.filter(puuid=account_dto.puuid)
+                .exclude(pk=rekeyed)
+                .first()
+            )
+            if existing is None:
+                RiotAccount.objects.filter(pk=rekeyed).update(puuid=account_dto.puuid)
+            else:
+                self._merge_account(rekeyed, existing)
+        # Locked until the ranks are written: concurrent refreshes of the account,
+        # e.g. by the bot and a worker, would both apply the same guild deltas.
+        account, _ = RiotAccount.objects.select_for_update().get_or_create(
+            puuid=account_dto.puuid,
             defaults={
-                "summoner_name": name,
-                "tagline": tagline,
-                "puuid": account_dto.puuid,
-                "server_region": region.value,
+                "summoner_name": account_dto.gameName,
+                "tagline": account_dto.tagLine,
             },
         )
-        # Reset ranks if no entries (unranked)
-        if not league_entries:
-            profile.current_solo_rank = "UNRANKED"
-            profile.current_solo_division = None
-            profile.current_solo_lp = 0
-            profile.solo_wins = 0
-            profile.solo_losses = 0
-            profile.solo_league_id = None
-
-            profile.current_flex_rank = "UNRANKED"
-            profile.current_flex_division = None
-            profile.current_flex_lp = 0
-            profile.flex_wins = 0
-            profile.flex_losses = 0
-            profile.flex_league_id = None
-
-            profile.summoner_id = summoner_dto.id
-        else:
-            profile.summoner_id = summoner_dto.id
-            for entry in league_entries:
-                if entry.queueType == QueueType.RANKED_SOLO.value:
-                    profile.solo_league_id = entry.leagueId
-                    profile.current_solo_division = entry.rank
-                    profile.current_solo_lp = entry.leaguePoints
-                    profile.current_solo_rank = entry.tier
-                    profile.solo_wins = entry.wins
-                    profile.solo_losses = entry.losses
-
-                    if self._is_rank_higher(
-                        entry.tier, profile.highest_achieved_rank_solo
-                    ):
-                        profile.highest_achieved_rank_solo = entry.tier
-
-                elif entry.queueType == QueueType.RANKED_FLEX.value:
-                    profile.flex_league_id = entry.leagueId
-                    profile.current_flex_division = entry.rank
-                    profile.current_flex_lp = entry.leaguePoints
-                    profile.current_flex_rank = entry.tier
-                    profile.flex_wins = entry.wins
-                    profile.flex_losses = entry.losses
-
-                    if self._is_rank_higher(
-                        entry.tier, profile.highest_achieved_rank_flex
-                    ):
-                        profile.highest_achieved_rank_flex = entry.tier
-
-        await sync_to_async(profile.save)()
+        # Riot IDs can be renamed, the puuid is what identifies the account.
+        account.summoner_name = account_dto.gameName
+        account.tagline = account_dto.tagLine
+        account.summoner_id = summoner_dto.id
+        account.api_key_id = key_id
+        account.server_region = region.stored_value
+        revised = account.revision_date not in {None, summoner_dto.revisionDate}
+        account.revision_date = summoner_dto.revisionDate
+        ranks_changed = self._apply_league_entries(account, league_entries)
+        refresh_priority.observe_refresh(
+            account, changed=ranks_changed or revised, now=timezone.now()
+        )
+        # Saved last so that last_check_timestamp and post_save listeners only
+        # see the account once its ranks are written.
+        account.save()
+        return account
+
+    @staticmethod
+    def _merge_account(source_pk: int, target: RiotAccount) -> None:
+        """Move the profiles, jobs and history of an account into another one.
+
+        Must run in the transaction storing the target. The guilds of the moved
+        profiles have their aggregates rebuilt, since their members now count
+        the target's ranks.
+        """
+        guild_ids = set(
+            GuildMember.objects.filter(profile__account_id=source_pk).values_list(
+                "guild_id", flat=True
+            )
+        )
+        SummonerProfile.objects.filter(account_id=source_pk).update(account=target)
+        RankSnapshot.objects.filter(account_id=source_pk).update(account=target)
+        # An account has one pending job, the target's takes the higher priority.
+        jobs = RefreshJob.objects.filter(account_id=source_pk)
+        pending = jobs.filter(status=RefreshJob.PENDING).first()
+        if pending is not None and RefreshJob.objects.filter(
+            account=target, status=RefreshJob.PENDING
+        ).update(priority=Greatest("priority", pending.priority)):
+            pending.delete()
+        jobs.update(account=target)
+        RiotAccount.objects.filter(pk=source_pk).delete()
+        for guild_id in sorted(guild_ids):
+            guild_stats.rebuild(guild_id)
+
+    @transaction.atomic
+    def _link_profile(self, discord_id: str, account: RiotAccount) -> SummonerProfile:
+        """Point a Discord user's profile at an account, moving guild stats."""
+        profile, created = SummonerProfile.objects.select_for_update().get_or_create(
+            discord_id=discord_id, defaults={"account": account}
+        )
+        if not created and profile.account_id != account.pk:
+            guild_stats.remove_profile(profile)
+            profile.account = account
+            profile.save(update_fields=["account"])
+            guild_stats.add_profile(profile)
+        profile.account = account
+        return profile
+
+    async def scout(
+        self, name: str, tagline: str, region: Region = Region.euw
+    ) -> ScoutedProfile:
+        """Look up a player nobody tracks, without storing anything.
+
+        Results are kept in a bounded cache for ``SCOUT_CACHE_TTL_SECONDS`` so
+        repeated lookups of the same player cost no API calls.
+
+        Raises:
+            SummonerNotFoundError: If summoner doesn't exist.
+            RiotAPIError: For other API-related errors.
+        """
+        key = f"{region.stored_value}:{RiotAccount.normalize_riot_id(name, tagline)}"
+        scouted = self._scout_cache.get(key)
+        if scouted is not None:
+            return scouted
+
+        account_dto, _, league_entries, _ = await self._fetch_riot_data(
+            name, tagline, region
+        )
+        ranks = {
+            entry.queueType: QueueRank(
+                queue_type=entry.queueType,
+                league_id=entry.leagueId,
+                tier=entry.tier,
+                division=entry.rank,
+                league_points=entry.leaguePoints,
+                wins=entry.wins,
+                losses=entry.losses,
+                score=RankScore.of(entry.tier, entry.rank, entry.leaguePoints),
+            )
+            for entry in league_entries
+        }
+        scouted = ScoutedProfile(
+            summoner_name=account_dto.gameName,
+            tagline=account_dto.tagLine,
+            puuid=account_dto.puuid,
+            region=region,
+            ranks=ranks,
+            last_check_timestamp=timezone.now(),
+        )
+        self._scout_cache.set(key, scouted)
+        return scouted
+
+    async def find_profile(
+        self,
+        *,
+        discord_id: str | None = None,
+        name: str | None = None,
+        tagline: str | None = None,
+    ) -> SummonerProfile | None:
+        """Find a profile by Discord id or by Riot ID.
+
+        Riot IDs are matched case-insensitively. The in-memory index is checked
+        first, the database only on a miss.
+
+        Returns:
+            The matching profile, or None if nobody registered it.
+        """
+        index = self._profile_index
+        if index is not None:
+            cached = (
+                index.by_discord_id(discord_id)
+                if discord_id is not None
+                else index.by_riot_id(name, tagline)
+            )
+            if cached is not None:
+                return cached
+
+        filters = (
+            {"discord_id": discord_id}
+            if discord_id is not None
+            else {
+                "account__riot_id_normalized": RiotAccount.normalize_riot_id(
+                    name, tagline
+                )
+            }
+        )
+        with span("db"):
+            profile = await sync_to_async(
+                SummonerProfile.objects.select_related("account")
+                .filter(**filters)
+                .first
+            )()
+        if profile is not None and index is not None:
+            index.add(profile)
+        return profile
+
+    async def ensure_fresh(
+        self, profile: SummonerProfile, max_age: timedelta
+    ) -> SummonerProfile:
+        """Get an up to date version of a profile.
+
+        The profile's account is reloaded from the database first, since the
+        refresh worker may have updated it; Riot is only called if the stored
+        data is too old.
+
+        Raises:
+            CircuitOpenError: If the refresh endpoints are failing in the
+                profile's region. No call is made and the stored profile is
+                the best data available.
+            SummonerNotFoundError: If summoner doesn't exist anymore.
+            RiotAPIError: For other API-related errors.
+        """
+        account = profile.account
+        if self.is_fresh(account, max_age):
+            return profile
+        with span("db"):
+            await sync_to_async(account.refresh_from_db)()
+        if self.is_fresh(account, max_age):
+            return profile
+        region = Region.from_platform(account.server_region)
+        if self._riot_api.circuit_open(region, REFRESH_ROUTES):
+            raise CircuitOpenError(f"Riot API is unavailable in {region.name}")
+        return await self.refresh_profile(profile)
+
+    async def lookup(self, name: str, tagline: str, region: Region) -> PlayerRanks:
+        """Get a player's ranks, tracked or not.
+
+        Tracked players are served from stored data when fresh enough, and
+        from stale data if the refresh fails. Other players are scouted, which
+        goes through the scouting cache.
+
+        Raises:
+            SummonerNotFoundError: If an untracked summoner doesn't exist.
+            RiotAPIError: For other API-related errors scouting a player.
+        """
+        profile = await self.find_profile(name=name, tagline=tagline)
+        if profile is None:
+            scouted = await self.scout(name, tagline, region=region)
+            return PlayerRanks(profile=scouted, ranks=scouted.ranks)
+
+        self.record_query(profile.account)
+        stale = False
+        try:
+            profile = await self.ensure_fresh(
+                profile, timedelta(seconds=settings.PROFILE_FRESHNESS_SECONDS)
+            )
+        except LOOKUP_ERRORS:
+            stale = True
+        with span("db"):
+            ranks = await sync_to_async(profile.account.ranks_by_queue)()
+        return PlayerRanks(profile=profile.account, ranks=ranks, stale=stale)
+
+    async def lookup_many(
+        self,
+        riot_ids: list[tuple[str, str]],
+        region: Region,
+        concurrency: int | None = None,
+    ) -> list[PlayerRanks | Exception]:
+        """Look up several players concurrently, at most ``concurrency`` at once.
+
+        Args:
+            riot_ids: (name, tagline) of each player.
+            region: Region of the untracked players.
+            concurrency: Maximum lookups in flight, defaults to the
+                LOOKUP_CONCURRENCY setting.
+
+        Returns:
+            The ranks of each player in order, or the error looking them up,
+            one of ``LOOKUP_ERRORS``.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.LOOKUP_CONCURRENCY)
+
+        async def bounded(name: str, tagline: str) -> PlayerRanks | Exception:
+            async with semaphore:
+                try:
+                    return await self.lookup(name, tagline, region)
+                except LOOKUP_ERRORS as e:
+                    return e
+
+        return await asyncio.gather(
+            *(bounded(name, tagline) for name, tagline in riot_ids)
+        )
+
+    def record_query(self, account: RiotAccount) -> None:
+        """Count a lookup of a tracked account towards its refresh priority.
+
+        Lookups are only counted in memory, ``flush_queries`` writes them out,
+        keeping database writes off the lookup path.
+        """
+        self._query_counts[account.pk] += 1
+
+    async def flush_queries(self) -> None:
+        """Write the lookups counted since the last flush to the database.
+
+        Counts that fail to write are kept for the next flush.
+        """
+        counts, self._query_counts = self._query_counts, Counter()
+        if not counts:
+            return
+        try:
+            await sync_to_async(refresh_priority.record_queries)(counts)
+        except BaseException:
+            self._query_counts.update(counts)
+            raise
+
+    async def flush_queries_forever(self, interval: float) -> None:
+        """Flush the counted lookups every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_queries()
+            except DatabaseError as e:
+                logger.warning("Failed to flush lookup counts: %s", e)
+
+    async def refresh_profile(self, profile: SummonerProfile) -> SummonerProfile:
+        """Refresh the account of a stored profile with the latest data from Riot.
+
+        Args:
+            profile: The profile to refresh.
+
+        Returns:
+            The profile, with its refreshed account.
+        """
+        profile.account = await self.refresh_account(profile.account)
         return profile
 
+    async def refresh_account(self, account: RiotAccount) -> RiotAccount:
+        """Refresh a stored account once, for every user and guild tracking it.
+
+        Args:
+            account: The account to refresh.
+
+        Returns:
+            The refreshed RiotAccount instance.
+        """
+        return await self.sync_account(
+            name=account.summoner_name,
+            tagline=account.tagline,
+            region=Region.from_platform(account.server_region),
+            account=account,
+        )
+
+    async def _fetch_riot_data(
+        self, name: str, tagline: str, region: Region, key_id: str | None = None
+    ) -> tuple[RiotAccountDTO, SummonerDTO, list[LeagueEntryDTO], str]:
+        """Fetch the account, summoner and league entries of a Riot ID.
+
+        Every request goes through the same key, since the puuid and summoner
+        id passed along are encrypted for it.
+
+        Args:
+            key_id: Key to use. Defaults to the least loaded one.
+
+        Returns:
+            The account, summoner and league entries, and the key used.
+        """
+        key_id = key_id or self._riot_api.key_pool.choose().key_id
+        account_dto = await self._riot_api.get_summoner_account(
+            summoner_name=name, tagline=tagline, region=region, key_id=key_id
+        )
+        summoner_dto = await self._riot_api.get_summoner_by_puuid(
+            puuid=account_dto.puuid,
+            name=name,
+            tagline=tagline,
+            region=region,
+            key_id=key_id,
+        )
+        league_entries = await self._riot_api.get_league_entries(
+            encrypted_summoner_id=summoner_dto.id,
+            region=region,
+            key_id=key_id,
+        )
+        return account_dto, summoner_dto, league_entries, key_id
+
+    @staticmethod
+    def _rank_state(rank: QueueRank) -> tuple[str, str | None, int, int, int]:
+        """Get the (tier, division, lp, wins, losses) of a queue rank."""
+        return (rank.tier, rank.division, rank.league_points, rank.wins, rank.losses)
+
+    @transaction.atomic
+    def _apply_league_entries(
+        self, account: RiotAccount, league_entries: list[LeagueEntryDTO]
+    ) -> bool:
+        """Write league entries to the account's queue ranks.
+
+        Queues missing from ``league_entries`` are reset to unranked, and a rank
+        snapshot is stored for every queue whose rank or W/L changed. The same
+        changes are applied as deltas to the aggregates of every guild tracking
+        the account. Must run with the account's row locked, so the ranks the
+        deltas start from can't change underneath.
+
+        Returns:
+            Whether any queue's rank or W/L changed.
+        """
+        ranks = account.ranks_by_queue()
+        entries = {entry.queueType: entry for entry in league_entries}
+        created, updated, snapshots, changes = [], [], [], []
+        for queue_type in ranks.keys() | entries.keys():
+            rank = ranks.get(queue_type) or QueueRank(
+                account=account, queue_type=queue_type
+            )
+            previous = self._rank_state(rank)
+            entry = entries.get(queue_type)
+            if entry is None:
+                rank.league_id = None
+                rank.tier = "UNRANKED"
+                rank.division = None
+                rank.league_points = rank.wins = rank.losses = 0
+            else:
+                rank.league_id = entry.leagueId
+                rank.tier = entry.tier
+                rank.division = entry.rank
+                rank.league_points = entry.leaguePoints
+                rank.wins = entry.wins
+                rank.losses = entry.losses
+                if self._is_rank_higher(entry.tier, rank.highest_achieved_tier):
+                    rank.highest_achieved_tier = entry.tier
+            rank.score = RankScore.of(rank.tier, rank.division, rank.league_points)
+
+            state = self._rank_state(rank)
+            if state == previous:
+                continue
+            rank.updated_at = timezone.now()  # bulk_update skips auto_now
+            changes.append((queue_type, None if rank.pk is None else previous, state))
+            (created if rank.pk is None else updated).append(rank)
+            tier, division, lp, wins, losses = state
+            snapshots.append(
+                RankSnapshot(
+                    account=account,
+                    queue_type=queue_type,
+                    tier=tier,
+                    division=division,
+                    league_points=lp,
+                    wins=wins,
+                    losses=losses,
+                )
+            )
+
+        QueueRank.objects.bulk_create(created)
+        QueueRank.objects.bulk_update(
+            updated,
+            [
+                "league_id",
+                "tier",
+                "division",
+                "league_points",
+                "wins",
+                "losses",
+                "highest_achieved_tier",
+                "score",
+                "updated_at",
+            ],
+        )
+        RankSnapshot.objects.bulk_create(snapshots)
+        guild_stats.apply_rank_changes(account, changes)
+        return bool(changes)
+
+    @staticmethod
+    def is_fresh(account: RiotAccount, max_age: timedelta) -> bool:
+        """Check whether an account was refreshed within ``max_age``."""
+        return timezone.now() - account.last_check_timestamp < max_age
+
     @staticmethod
     def _is_rank_higher(new_rank: str, current_rank: str) -> bool:
         """Compare two ranks to determine if new rank is higher.
@@ -0,0 +1,36 @@
+"""Defines types for the summoner service."""
+
+import dataclasses
+from datetime import datetime
+
+from ...models import QueueRank, RiotAccount
+from ..riot.constants import Region
+
+
+@dataclasses.dataclass(frozen=True)
+class ScoutedProfile:
+    """A player looked up without being tracked, never stored in the database.
+
+    ``ranks`` holds unsaved QueueRank instances so that scouted and tracked
+    players render the same way.
+    """
+
+    summoner_name: str
+    tagline: str
+    puuid: str
+    region: Region
+    ranks: dict[str, QueueRank]
+    last_check_timestamp: datetime
+
+
+@dataclasses.dataclass(frozen=True)
+class PlayerRanks:
+    """Ranks of one player of a multi-player lookup, tracked or scouted.
+
+    ``stale`` is set when a tracked player's stored data was too old but could
+    not be refreshed.
+    """
+
+    profile: RiotAccount | ScoutedProfile
+    ranks: dict[str, QueueRank]
+    stale: bool = False
@@ -0,0 +1,23 @@
+"""Signal handlers for the player tracker app."""
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import response_cache
+from .models import RiotAccount, SummonerProfile
+from .services.guild import stats as guild_stats
+
+
+@receiver(post_save, sender=SummonerProfile)
+@receiver(post_delete, sender=SummonerProfile)
+@receiver(post_save, sender=RiotAccount)
+@receiver(post_delete, sender=RiotAccount)
+def invalidate_response_cache(**kwargs) -> None:
+    """Drop cached API responses whenever tracked data changes."""
+    response_cache.invalidate()
+
+
+@receiver(pre_delete, sender=SummonerProfile)
+def remove_from_guild_stats(instance: SummonerProfile, **kwargs) -> None:
+    """Take a deleted profile's ranks out of its guilds' aggregates."""
+    guild_stats.remove_profile(instance)
@@ -1 +1,917 @@
-# Create your tests here.
+"""Tests of the player_tracker services."""
+
+import asyncio
+import base64
+import json
+import math
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from player_tracker.cache import TTLCache
+from player_tracker.models import (
+    QueueRank,
+    RankSnapshot,
+    RefreshJob,
+    RiotAccount,
+    SummonerProfile,
+)
+from player_tracker.services.analytics.trend import compute_trends
+from player_tracker.services.guild import stats as guild_stats
+from player_tracker.services.ladder.index import (
+    SCORE_DTYPE,
+    LadderIndex,
+    ladder_path,
+)
+from player_tracker.services.ladder.ingest import LadderIngest
+from player_tracker.services.refresh import priority as refresh_priority
+from player_tracker.services.refresh import queue as refresh_queue
+from player_tracker.services.refresh.partition import (
+    OTHER_REGIONS,
+    HashRing,
+    Partition,
+)
+from player_tracker.services.riot.circuit_breaker import BreakerState, CircuitBreaker
+from player_tracker.services.riot.constants import RankScore, Region
+from player_tracker.services.riot.exceptions import KeyUnavailableError
+from player_tracker.services.riot.key_pool import ApiKey, KeyPool
+from player_tracker.services.riot.rate_limiter import RateLimiter
+from player_tracker.services.riot.service import RiotAPIService
+from player_tracker.services.riot.types import (
+    LadderEntryDTO,
+    LeagueEntryDTO,
+    RiotAccountDTO,
+    SummonerDTO,
+)
+from player_tracker.services.static.store import StaticBundle, StaticDataStore
+from player_tracker.services.summoner.service import SummonerService
+
+STATIC_FIXTURES = Path(__file__).parent / "testdata" / "static"
+
+
+class StaticDataStoreTests(SimpleTestCase):
+    """Static data store, against the bundled Data Dragon fixtures."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        shutil.copytree(STATIC_FIXTURES / "14.1.1", self.directory / "14.1.1")
+
+    def _add_version(self, version: str, **renamed: str) -> None:
+        """Copy the fixture bundle as another version, renaming champions."""
+        path = self.directory / version
+        shutil.copytree(self.directory / "14.1.1", path)
+        champions = path / "data" / "en_US" / "champion.json"
+        data = json.loads(champions.read_text())
+        for champion in data["data"].values():
+            champion["name"] = renamed.get(champion["id"], champion["name"])
+        champions.write_text(json.dumps(data))
+
+    def test_load_bundle(self):
+        bundle = StaticBundle.load(STATIC_FIXTURES / "14.1.1")
+        self.assertEqual(bundle.version, "14.1.1")
+        self.assertEqual(bundle.champions, {103: "Ahri", 1: "Annie", 62: "Wukong"})
+        # Queues without a description, like custom games, are left out.
+        self.assertEqual(
+            bundle.queues, {420: "5v5 Ranked Solo games", 900: "ARURF games"}
+        )
+
+    def test_lookups(self):
+        store = StaticDataStore(self.directory)
+        self.assertTrue(store.reload())
+        self.assertEqual(store.version, "14.1.1")
+        self.assertEqual(store.champion_name(62), "Wukong")
+        self.assertEqual(store.champion_name(9999), "Champion 9999")
+        self.assertEqual(store.queue_name(900), "ARURF games")
+        self.assertIsNone(store.queue_name(9999))
+
+    def test_empty_store(self):
+        store = StaticDataStore(self.directory / "missing")
+        self.assertFalse(store.reload())
+        self.assertIsNone(store.version)
+        self.assertEqual(store.champion_name(103), "Champion 103")
+
+    def test_reload_without_new_version(self):
+        store = StaticDataStore(self.directory)
+        store.reload()
+        self.assertFalse(store.reload())
+
+    def test_hot_swap_to_newest_version(self):
+        store = StaticDataStore(self.directory)
+        store.reload()
+        # Versions compare numerically, 14.10 is newer than 14.9.
+        self._add_version("14.9.1")
+        self._add_version("14.10.1", Ahri="Ahri v2")
+        # Partial downloads and stray files are ignored.
+        (self.directory / ".14.11.1.tmp").mkdir()
+        self.assertTrue(store.reload())
+        self.assertEqual(store.version, "14.10.1")
+        self.assertEqual(store.champion_name(103), "Ahri v2")
+
+    def test_broken_version_keeps_current_bundle(self):
+        store = StaticDataStore(self.directory)
+        store.reload()
+        broken = self.directory / "14.2.1" / "data" / "en_US"
+        broken.mkdir(parents=True)
+        (broken / "champion.json").write_text("{")
+        self.assertFalse(store.reload())
+        self.assertEqual(store.version, "14.1.1")
+        self.assertEqual(store.champion_name(103), "Ahri")
+
+
+class KeyPoolTests(SimpleTestCase):
+    """API key selection and quarantine."""
+
+    def setUp(self):
+        self.pool = KeyPool(
+            [
+                ApiKey("main", "token-main", RateLimiter(((10, 1.0),))),
+                ApiKey("extra", "token-extra", RateLimiter(((10, 1.0),))),
+            ]
+        )
+
+    def test_least_loaded_key(self):
+        for _ in range(3):
+            asyncio.run(self.pool.acquire("main"))
+        self.assertEqual(self.pool.choose().key_id, "extra")
+        for _ in range(4):
+            asyncio.run(self.pool.acquire("extra"))
+        self.assertEqual(self.pool.choose().key_id, "main")
+
+    def test_quarantined_key_is_skipped(self):
+        self.pool.quarantine(self.pool.choose("main"))
+        self.assertFalse(self.pool.usable("main"))
+        self.assertEqual(self.pool.choose().key_id, "extra")
+        # Ids encrypted by a quarantined key can't go through another one.
+        with self.assertRaises(KeyUnavailableError):
+            self.pool.choose("main")
+
+    def test_no_usable_key(self):
+        self.pool.quarantine(self.pool.choose("main"))
+        self.pool.quarantine(self.pool.choose("extra"))
+        with self.assertRaises(KeyUnavailableError):
+            self.pool.choose()
+
+    def test_unknown_key(self):
+        self.assertFalse(self.pool.usable("removed"))
+        with self.assertRaises(KeyUnavailableError):
+            self.pool.choose("removed")
+
+
+class HashRingTests(SimpleTestCase):
+    """Split of the account slots between refresh workers."""
+
+    def test_slots_are_split(self):
+        ring = HashRing(["a", "b", "c"])
+        slots = [ring.slots_of(worker) for worker in ("a", "b", "c")]
+        self.assertEqual(sum(map(len, slots)), RiotAccount.REFRESH_SLOTS)
+        self.assertEqual(len(frozenset().union(*slots)), RiotAccount.REFRESH_SLOTS)
+
+    def test_join_only_moves_slots_to_new_worker(self):
+        before = HashRing(["a", "b", "c"])
+        after = HashRing(["a", "b", "c", "d"])
+        for slot in range(RiotAccount.REFRESH_SLOTS):
+            if after.owner(slot) != "d":
+                self.assertEqual(after.owner(slot), before.owner(slot))
+        self.assertTrue(after.slots_of("d"))
+
+    def test_empty_ring(self):
+        self.assertIsNone(HashRing([]).owner(0))
+        self.assertEqual(HashRing([]).slots_of("a"), frozenset())
+
+
+class PartitionTests(TestCase):
+    """Budget share of refresh workers in several region subsets."""
+
+    def setUp(self):
+        self.limiter = RateLimiter(((100, 1.0),))
+        self.euw = Partition(
+            ["EUW1"],
+            key_pool=KeyPool([ApiKey("main", "token-main", self.limiter)]),
+            budget_share=0.5,
+        )
+        self.na = Partition(["NA1"], budget_share=0.5)
+
+    def test_subset_joining_and_leaving_resizes_share(self):
+        self.euw.heartbeat("euw", 0, 0)
+        self.assertEqual(
+            self.euw.slots, {"EUW1": frozenset(range(RiotAccount.REFRESH_SLOTS))}
+        )
+        self.assertEqual(self.euw.share, 0.5)
+        # One request out of the 50 the worker may send per second.
+        asyncio.run(self.limiter.acquire())
+        self.assertEqual(self.limiter.load(), 1 / 50)
+
+        self.na.heartbeat("na", 0, 0)
+        self.assertFalse(self.euw.heartbeat("euw", 0, 0))
+        self.assertEqual(self.euw.share, 0.25)
+        self.assertEqual(self.limiter.load(), 1 / 25)
+
+        Partition.leave("na")
+        self.assertFalse(self.euw.heartbeat("euw", 0, 0))
+        self.assertEqual(self.euw.share, 0.5)
+        self.assertEqual(self.limiter.load(), 1 / 50)
+
+    def test_overlapping_subsets_split_shared_regions(self):
+        everywhere = Partition(budget_share=0.5)
+        everywhere.heartbeat("all", 0, 0)
+        self.euw.heartbeat("euw", 0, 0)
+        everywhere.heartbeat("all", 0, 0)
+        self.assertEqual(set(everywhere.slots), {"EUW1", OTHER_REGIONS})
+        self.assertFalse(everywhere.slots["EUW1"] & self.euw.slots["EUW1"])
+
+        accounts = [
+            RiotAccount.objects.create(
+                puuid=f"{region}-{n}", summoner_name="a", server_region=region
+            )
+            for n in range(40)
+            for region in ("EUW1", "NA1")
+        ]
+        claimed = [
+            set(
+                partition.filter(RiotAccount.objects.all()).values_list("pk", flat=True)
+            )
+            for partition in (everywhere, self.euw)
+        ]
+        self.assertFalse(claimed[0] & claimed[1])
+        self.assertEqual(claimed[0] | claimed[1], {account.pk for account in accounts})
+        self.assertFalse(
+            RiotAccount.objects.filter(pk__in=claimed[1], server_region="NA1").exists()
+        )
+
+
+def _league_entry(tier: str, league_points: int) -> LeagueEntryDTO:
+    return LeagueEntryDTO(
+        leagueId="league",
+        queueType="RANKED_SOLO_5x5",
+        tier=tier,
+        rank="II",
+        summonerId="summoner",
+        leaguePoints=league_points,
+        wins=10,
+        losses=8,
+        veteran=False,
+        inactive=False,
+        freshBlood=False,
+        hotStreak=False,
+    )
+
+
+class RekeyTests(TestCase):
+    """Accounts moving to the ids encrypted by another API key."""
+
+    def setUp(self):
+        self.service = SummonerService(riot_api=None)
+        self.old = RiotAccount.objects.create(
+            puuid="puuid-gone", api_key_id="gone", summoner_name="Faker", tagline="KR1"
+        )
+        QueueRank.objects.create(
+            account=self.old, queue_type="RANKED_SOLO_5x5", tier="GOLD", wins=3
+        )
+        self.profile = SummonerProfile.objects.create(discord_id="1", account=self.old)
+        guild_stats.add_member("guild", self.profile)
+        refresh_queue.enqueue(self.old, priority=refresh_queue.USER_PRIORITY)
+
+    def _store(self) -> RiotAccount:
+        return self.service._store_account(
+            RiotAccountDTO(puuid="puuid-main", gameName="Faker", tagLine="KR1"),
+            SummonerDTO(
+                id="summoner",
+                accountId="account",
+                puuid="puuid-main",
+                profileIconId=1,
+                revisionDate=1,
+                summonerLevel=30,
+            ),
+            [_league_entry("PLATINUM", 40)],
+            Region.euw,
+            "main",
+            rekeyed=self.old.pk,
+        )
+
+    def test_account_takes_new_puuid(self):
+        account = self._store()
+        self.assertEqual(account.pk, self.old.pk)
+        self.assertEqual(account.api_key_id, "main")
+
+    def test_collision_merges_into_stored_account(self):
+        existing = RiotAccount.objects.create(
+            puuid="puuid-main", api_key_id="main", summoner_name="Faker", tagline="KR1"
+        )
+        QueueRank.objects.create(
+            account=existing, queue_type="RANKED_SOLO_5x5", tier="SILVER"
+        )
+        refresh_queue.enqueue(existing)
+
+        account = self._store()
+        self.assertEqual(account.pk, existing.pk)
+        self.assertFalse(RiotAccount.objects.filter(pk=self.old.pk).exists())
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.account_id, existing.pk)
+        job = RefreshJob.objects.get()
+        self.assertEqual(job.account_id, existing.pk)
+        self.assertEqual(job.priority, refresh_queue.USER_PRIORITY)
+        self.assertEqual(guild_stats.stored("guild"), guild_stats.compute("guild"))
+        self.assertEqual(
+            guild_stats.stored("guild"),
+            {("guild", "RANKED_SOLO_5x5", "PLATINUM"): (1, 40, 10, 8)},
+        )
+
+
+class CursorTests(TestCase):
+    """Client-supplied pagination cursors."""
+
+    def setUp(self):
+        account = RiotAccount.objects.create(puuid="puuid", summoner_name="Faker")
+        SummonerProfile.objects.create(discord_id="1", account=account)
+
+    @staticmethod
+    def _cursor(values: object) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def test_invalid_cursors_are_bad_requests(self):
+        cases = {
+            "player_tracker:leaderboard": [[1], [1, "x"], ["x", 1], [1, True], {}],
+            "player_tracker:rank-history": [[1, 1], ["yesterday", 1], ["2024", "x"]],
+        }
+        for name, cursors in cases.items():
+            kwargs = {"discord_id": "1"} if name.endswith("history") else {}
+            for values in cursors:
+                with self.subTest(name=name, cursor=values):
+                    response = self.client.get(
+                        reverse(name, kwargs=kwargs), {"cursor": self._cursor(values)}
+                    )
+                    self.assertEqual(response.status_code, 400)
+
+    def test_leaderboard_etag_follows_page(self):
+        account = RiotAccount.objects.get()
+        rank = QueueRank.objects.create(
+            account=account, queue_type="RANKED_SOLO_5x5", tier="GOLD", score=1200
+        )
+        url = reverse("player_tracker:leaderboard")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        rank.score = 1300
+        rank.save()
+        account.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["rank"]["tier"], "GOLD")
+
+    def test_valid_cursors(self):
+        leaderboard = self.client.get(
+            reverse("player_tracker:leaderboard"), {"cursor": self._cursor([100, 1])}
+        )
+        self.assertEqual(leaderboard.status_code, 200)
+        history = self.client.get(
+            reverse("player_tracker:rank-history", kwargs={"discord_id": "1"}),
+            {"cursor": self._cursor(["2024-01-01T00:00:00+00:00", 1])},
+        )
+        self.assertEqual(history.status_code, 200)
+
+
+class GuildStatsTests(TestCase):
+    """Incremental guild aggregates, checked against a full recount."""
+
+    def setUp(self):
+        self.service = SummonerService(riot_api=None)
+        self.faker = self._account("faker", "GOLD", 50)
+        self.caps = self._account("caps", "SILVER", 20)
+        self.profile = SummonerProfile.objects.create(
+            discord_id="1", account=self.faker
+        )
+        self.other = SummonerProfile.objects.create(discord_id="2", account=self.caps)
+        guild_stats.add_member("guild", self.profile)
+        guild_stats.add_member("guild", self.other)
+        guild_stats.add_member("other guild", self.profile)
+
+    def _account(self, puuid: str, tier: str, league_points: int) -> RiotAccount:
+        account = RiotAccount.objects.create(puuid=puuid, summoner_name=puuid)
+        QueueRank.objects.create(
+            account=account,
+            queue_type="RANKED_SOLO_5x5",
+            tier=tier,
+            division="II",
+            league_points=league_points,
+            wins=10,
+            losses=8,
+        )
+        return account
+
+    def _assert_in_sync(self):
+        self.assertEqual(guild_stats.stored(), guild_stats.compute())
+
+    def test_add_member(self):
+        self._assert_in_sync()
+        self.assertEqual(
+            guild_stats.stored("guild"),
+            {
+                ("guild", "RANKED_SOLO_5x5", "GOLD"): (1, 50, 10, 8),
+                ("guild", "RANKED_SOLO_5x5", "SILVER"): (1, 20, 10, 8),
+            },
+        )
+        self.assertFalse(guild_stats.add_member("guild", self.profile))
+        self._assert_in_sync()
+
+    def test_remove_member(self):
+        self.assertTrue(guild_stats.remove_member("guild", self.profile))
+        self.assertFalse(guild_stats.remove_member("guild", self.profile))
+        self._assert_in_sync()
+
+    def test_rank_change(self):
+        self.service._store_account(
+            RiotAccountDTO(puuid="faker", gameName="faker", tagLine="KR1"),
+            SummonerDTO(
+                id="summoner",
+                accountId="account",
+                puuid="faker",
+                profileIconId=1,
+                revisionDate=1,
+                summonerLevel=30,
+            ),
+            [_league_entry("PLATINUM", 40)],
+            Region.euw,
+            "default",
+        )
+        self._assert_in_sync()
+        self.assertNotIn(("guild", "RANKED_SOLO_5x5", "GOLD"), guild_stats.stored())
+
+    def test_relink(self):
+        self.service._link_profile("1", self.caps)
+        self._assert_in_sync()
+        self.assertEqual(
+            guild_stats.stored("guild"),
+            {("guild", "RANKED_SOLO_5x5", "SILVER"): (2, 40, 20, 16)},
+        )
+
+    def test_profile_deletion(self):
+        self.profile.delete()
+        self._assert_in_sync()
+
+    def test_account_deletion(self):
+        self.faker.delete()
+        self._assert_in_sync()
+        self.assertEqual(
+            guild_stats.stored(),
+            {("guild", "RANKED_SOLO_5x5", "SILVER"): (1, 20, 10, 8)},
+        )
+
+
+@override_settings(REFRESH_JOB_RETRY_SECONDS=30.0, REFRESH_JOB_MAX_ATTEMPTS=2)
+class RefreshQueueTests(TestCase):
+    """Leased queue of refresh jobs."""
+
+    def setUp(self):
+        self.accounts = [
+            RiotAccount.objects.create(puuid=f"puuid-{i}", summoner_name=f"player{i}")
+            for i in range(3)
+        ]
+
+    def test_enqueue_joins_pending_job(self):
+        job = refresh_queue.enqueue(self.accounts[0])
+        again = refresh_queue.enqueue(self.accounts[0], priority=5, requested_by="1")
+        self.assertEqual(again.pk, job.pk)
+        self.assertEqual(again.priority, 5)
+        # A lower priority doesn't demote the pending job.
+        self.assertEqual(refresh_queue.enqueue(self.accounts[0]).priority, 5)
+        self.assertEqual(RefreshJob.objects.count(), 1)
+
+    def test_claim_highest_priority_first(self):
+        for account, priority in zip(self.accounts, (0, 10, 5), strict=True):
+            refresh_queue.enqueue(account, priority=priority)
+        jobs = refresh_queue.claim("worker", limit=2, lease_seconds=60)
+        self.assertEqual({job.account for job in jobs}, set(self.accounts[1:]))
+        self.assertEqual(refresh_queue.position(RefreshJob.objects.get(priority=0)), 1)
+        rest = refresh_queue.claim("other", limit=2, lease_seconds=60)
+        self.assertEqual([job.account for job in rest], self.accounts[:1])
+        self.assertEqual(refresh_queue.claim("other", limit=2, lease_seconds=60), [])
+
+    def test_reclaim_after_lease_expiry(self):
+        refresh_queue.enqueue(self.accounts[0])
+        (job,) = refresh_queue.claim("worker", limit=1, lease_seconds=60)
+        self.assertEqual(refresh_queue.claim("other", limit=1, lease_seconds=60), [])
+
+        RefreshJob.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        (reclaimed,) = refresh_queue.claim("other", limit=1, lease_seconds=60)
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+        # The first worker lost its lease and can't extend it anymore.
+        self.assertEqual(refresh_queue.heartbeat("worker", [job], 60), 0)
+        self.assertEqual(refresh_queue.heartbeat("other", [reclaimed], 60), 1)
+
+    def test_retry_with_backoff_then_give_up(self):
+        refresh_queue.enqueue(self.accounts[0])
+        (job,) = refresh_queue.claim("worker", limit=1, lease_seconds=60)
+        refresh_queue.finish("worker", [], [job])
+        job.refresh_from_db()
+        self.assertEqual(job.status, RefreshJob.PENDING)
+        self.assertIsNone(job.worker_id)
+        self.assertGreater(job.available_at, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(refresh_queue.claim("worker", limit=1, lease_seconds=60), [])
+
+        RefreshJob.objects.update(available_at=timezone.now())
+        (job,) = refresh_queue.claim("worker", limit=1, lease_seconds=60)
+        refresh_queue.finish("worker", [], [job])
+        job.refresh_from_db()
+        self.assertEqual(job.status, RefreshJob.FAILED)
+
+    def test_enqueue_keeps_retry_backoff(self):
+        refresh_queue.enqueue(self.accounts[0])
+        (job,) = refresh_queue.claim("worker", limit=1, lease_seconds=60)
+        refresh_queue.finish("worker", [], [job])
+        again = refresh_queue.enqueue(self.accounts[0], priority=10)
+        self.assertEqual(again.priority, 10)
+        self.assertGreater(again.available_at, timezone.now())
+        self.assertEqual(refresh_queue.claim("worker", limit=1, lease_seconds=60), [])
+
+    def test_deferred_job_keeps_its_attempts(self):
+        refresh_queue.enqueue(self.accounts[0])
+        for _ in range(3):
+            RefreshJob.objects.update(available_at=timezone.now())
+            (job,) = refresh_queue.claim("worker", limit=1, lease_seconds=60)
+            refresh_queue.finish("worker", [], [], deferred=[job])
+        job.refresh_from_db()
+        self.assertEqual(job.status, RefreshJob.PENDING)
+        self.assertEqual(job.attempts, 0)
+        self.assertGreater(job.available_at, timezone.now())
+
+    def test_finish_removes_succeeded_jobs(self):
+        refresh_queue.enqueue(self.accounts[0])
+        jobs = refresh_queue.claim("worker", limit=1, lease_seconds=60)
+        refresh_queue.finish("worker", jobs, [])
+        self.assertFalse(RefreshJob.objects.exists())
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """Breaker states of a Riot API endpoint."""
+
+    def _open_breaker(self, open_seconds: float = 0.0) -> CircuitBreaker:
+        breaker = CircuitBreaker(
+            min_calls=2, failure_rate=0.5, open_seconds=open_seconds, probe_limit=1
+        )
+        breaker.record_failure()
+        breaker.record_failure()
+        return breaker
+
+    def test_opens_at_failure_threshold(self):
+        breaker = CircuitBreaker(min_calls=4, failure_rate=0.5, open_seconds=60)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, BreakerState.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, BreakerState.OPEN)
+        self.assertFalse(breaker.allow_request())
+        self.assertGreater(breaker.retry_after, 0)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(min_calls=2, slow_call_seconds=1.0, open_seconds=60)
+        breaker.record_success(2.0)
+        breaker.record_success(2.0)
+        self.assertEqual(breaker.state, BreakerState.OPEN)
+
+    def test_half_open_probe_limit(self):
+        breaker = self._open_breaker()
+        self.assertEqual(breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+    def test_successful_probe_closes(self):
+        breaker = self._open_breaker()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, BreakerState.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+    def test_failed_probe_reopens(self):
+        breaker = self._open_breaker()
+        self.assertTrue(breaker.allow_request())
+        breaker._open_seconds = 60
+        breaker.record_failure()
+        self.assertEqual(breaker.state, BreakerState.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_released_probe_slot_is_reusable(self):
+        breaker = self._open_breaker()
+        self.assertTrue(breaker.allow_request())
+        breaker.release()
+        self.assertEqual(breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+
+
+class RiotAPIServiceBreakerTests(SimpleTestCase):
+    """Probe slots of requests that never reach Riot."""
+
+    route = "/lol/league/v4/entries/by-summoner/{encrypted_summoner_id}"
+
+    def setUp(self):
+        self.limiter = RateLimiter(((1, 60.0),))
+        self.service = RiotAPIService(
+            key_pool=KeyPool([ApiKey("main", "token-main", self.limiter)])
+        )
+        self.breaker = CircuitBreaker(
+            min_calls=1, failure_rate=0.5, open_seconds=0, probe_limit=1
+        )
+        self.breaker.record_failure()
+        self.service._breakers[(self.route, Region.euw.platform)] = self.breaker
+
+    def _request(self, key_id: str | None = None):
+        return self.service._make_request(
+            "/lol/league/v4/entries/by-summoner/id",
+            region=Region.euw,
+            route=self.route,
+            key_id=key_id,
+        )
+
+    def test_unavailable_key_releases_probe_slot(self):
+        with self.assertRaises(KeyUnavailableError):
+            asyncio.run(self._request("removed"))
+        self.assertEqual(self.breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_cancelled_request_releases_probe_slot(self):
+        async def cancelled_request():
+            # The only request of the window is spent, the next one waits.
+            await self.limiter.acquire()
+            with self.assertRaises(TimeoutError):
+                await asyncio.wait_for(self._request(), timeout=0.05)
+
+        asyncio.run(cancelled_request())
+        self.assertEqual(self.breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_circuit_open_only_for_requested_routes(self):
+        breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+        breaker.record_failure()
+        self.service._breakers[(self.route, Region.euw.platform)] = breaker
+        spectator = "/lol/spectator/v5/active-games/by-summoner/{puuid}"
+        self.assertTrue(self.service.circuit_open(Region.euw, [self.route]))
+        self.assertFalse(self.service.circuit_open(Region.euw, [spectator]))
+        self.assertFalse(self.service.circuit_open(Region.na, [self.route]))
+
+
+class TrendTests(TestCase):
+    """Window math of the LP trends."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.climber = RiotAccount.objects.create(puuid="climber", summoner_name="a")
+        self.placed = RiotAccount.objects.create(puuid="placed", summoner_name="b")
+        self._snapshot(self.climber, 20, ("SILVER", "I", 80, 10, 10))
+        self._snapshot(self.climber, 4, ("GOLD", "IV", 20, 14, 11))
+        self._snapshot(self.climber, 2, ("GOLD", "IV", 60, 20, 13))
+        self._snapshot(self.placed, 5, ("UNRANKED", None, 0, 0, 0))
+        self._snapshot(self.placed, 1, ("GOLD", "IV", 0, 6, 4))
+
+    def _snapshot(self, account, days_ago, state):
+        tier, division, lp, wins, losses = state
+        snapshot = RankSnapshot.objects.create(
+            account=account,
+            queue_type="RANKED_SOLO_5x5",
+            tier=tier,
+            division=division,
+            league_points=lp,
+            wins=wins,
+            losses=losses,
+        )
+        RankSnapshot.objects.filter(pk=snapshot.pk).update(
+            created_at=self.now - timedelta(days=days_ago)
+        )
+
+    def _trends(self):
+        return compute_trends(
+            [self.climber.pk, self.placed.pk], "RANKED_SOLO_5x5", 10, now=self.now
+        )
+
+    def test_climb_across_tiers(self):
+        metrics = self._trends().row(self.climber.pk)
+        # From Silver I 80 LP, the state when the window opened, to Gold IV 60.
+        self.assertEqual(metrics["lp_delta"], 80)
+        self.assertEqual(metrics["games"], 13)
+        self.assertAlmostEqual(metrics["win_rate"], 10 / 13)
+        self.assertAlmostEqual(metrics["games_per_day"], 1.3)
+        self.assertAlmostEqual(metrics["lp_per_day"], 8)
+        # 340 LP to Platinum IV at 8 LP/day.
+        self.assertAlmostEqual(metrics["next_tier_eta_days"], 42.5)
+
+    def test_unranked_endpoint(self):
+        metrics = self._trends().row(self.placed.pk)
+        self.assertTrue(math.isnan(metrics["lp_delta"]))
+        self.assertTrue(math.isnan(metrics["lp_per_day"]))
+        self.assertTrue(math.isnan(metrics["next_tier_eta_days"]))
+        # Games still count, over the 5 days since the first snapshot.
+        self.assertEqual(metrics["games"], 10)
+        self.assertAlmostEqual(metrics["games_per_day"], 2)
+
+    def test_players_without_snapshots_are_left_out(self):
+        other = RiotAccount.objects.create(puuid="other", summoner_name="c")
+        report = compute_trends([other.pk], "RANKED_SOLO_5x5", 10, now=self.now)
+        self.assertEqual(len(report), 0)
+        self.assertIsNone(report.row(other.pk))
+
+
+class QueryCountTests(TestCase):
+    """Lookups counted in memory and written out in batches."""
+
+    def setUp(self):
+        self.service = SummonerService(riot_api=None)
+        self.account = RiotAccount.objects.create(puuid="puuid", summoner_name="a")
+        RiotAccount.objects.filter(pk=self.account.pk).update(
+            next_refresh_at=timezone.now() + timedelta(days=1)
+        )
+
+    def test_lookups_are_written_on_flush(self):
+        with self.assertNumQueries(0):
+            self.service.record_query(self.account)
+            self.service.record_query(self.account)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.activity, 0)
+
+        async_to_sync(self.service.flush_queries)()
+        self.account.refresh_from_db()
+        self.assertAlmostEqual(self.account.activity, 2 * refresh_priority.QUERY_WEIGHT)
+        self.assertLess(
+            self.account.next_refresh_at, timezone.now() + timedelta(days=1)
+        )
+
+        # Nothing left to write.
+        with self.assertNumQueries(0):
+            async_to_sync(self.service.flush_queries)()
+
+
+class TTLCacheTests(SimpleTestCase):
+    """Expiry and LRU eviction of the in-process cache."""
+
+    def test_expired_values_are_dropped(self):
+        cache = TTLCache[int](ttl=-1)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache[int](max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+
+class _CountingRiotAPI:
+    """Riot API answering every lookup with the same player, counting calls."""
+
+    def __init__(self):
+        self.key_pool = KeyPool([ApiKey("main", "token", RateLimiter(((10, 1.0),)))])
+        self.calls = 0
+
+    async def get_summoner_account(self, **kwargs):
+        self.calls += 1
+        return RiotAccountDTO(puuid="puuid", gameName="Faker", tagLine="KR1")
+
+    async def get_summoner_by_puuid(self, **kwargs):
+        self.calls += 1
+        return SummonerDTO(
+            id="summoner",
+            accountId="account",
+            puuid="puuid",
+            profileIconId=1,
+            revisionDate=1,
+            summonerLevel=30,
+        )
+
+    async def get_league_entries(self, **kwargs):
+        self.calls += 1
+        return [_league_entry("GOLD", 40)]
+
+
+class ScoutTests(SimpleTestCase):
+    """Lookups of untracked players going through the scouting cache."""
+
+    def setUp(self):
+        self.riot_api = _CountingRiotAPI()
+
+    def test_repeated_lookup_is_served_from_cache(self):
+        service = SummonerService(self.riot_api, scout_cache=TTLCache(ttl=60))
+        first = asyncio.run(service.scout("Faker", "KR1", Region.euw))
+        self.assertEqual(self.riot_api.calls, 3)
+        self.assertEqual(first.ranks["RANKED_SOLO_5x5"].league_points, 40)
+
+        second = asyncio.run(service.scout("faker", "kr1", Region.euw))
+        self.assertIs(second, first)
+        self.assertEqual(self.riot_api.calls, 3)
+
+        # Other regions are other players.
+        asyncio.run(service.scout("Faker", "KR1", Region.na))
+        self.assertEqual(self.riot_api.calls, 6)
+
+    def test_expired_lookup_calls_riot_again(self):
+        service = SummonerService(self.riot_api, scout_cache=TTLCache(ttl=-1))
+        asyncio.run(service.scout("Faker", "KR1", Region.euw))
+        asyncio.run(service.scout("Faker", "KR1", Region.euw))
+        self.assertEqual(self.riot_api.calls, 6)
+
+
+class LadderIndexTests(SimpleTestCase):
+    """Placing scores on a small ladder."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        ladder = np.array([100, 200, 200, 300, 400], dtype=SCORE_DTYPE)
+        np.save(ladder_path(self.directory, Region.euw, "RANKED_SOLO_5x5"), ladder)
+        self.index = LadderIndex(self.directory)
+
+    def _top(self, score: int) -> float | None:
+        return self.index.top_percent(Region.euw, "RANKED_SOLO_5x5", score)
+
+    def test_boundary_scores(self):
+        self.assertAlmostEqual(self._top(400), 20)
+        self.assertAlmostEqual(self._top(300), 40)
+        # Tied players share the place of the lowest of them.
+        self.assertAlmostEqual(self._top(200), 80)
+        self.assertAlmostEqual(self._top(100), 100)
+        # Scores that moved off the ladder since it was ingested.
+        self.assertAlmostEqual(self._top(500), 20)
+        self.assertAlmostEqual(self._top(50), 100)
+
+    def test_unranked_or_missing_ladder(self):
+        self.assertIsNone(self._top(RankScore.UNRANKED))
+        self.assertIsNone(self.index.top_percent(Region.na, "RANKED_SOLO_5x5", 100))
+
+
+class _LadderRiotAPI:
+    """Riot API serving one player per apex league and two per division.
+
+    Fails once on ``fail_at``, a (tier, division, page) request.
+    """
+
+    def __init__(self, fail_at: tuple[str, str | None, int] | None = None):
+        self.fail_at = fail_at
+        self.fetched: list[tuple[str, str | None, int]] = []
+
+    def _page(self, tier, division, page, entries):
+        if (tier, division, page) == self.fail_at:
+            self.fail_at = None
+            raise RuntimeError("interrupted")
+        self.fetched.append((tier, division, page))
+        return entries
+
+    async def get_apex_league(self, queue_type, tier, region):
+        entries = [LadderEntryDTO(tier=tier, rank="I", leaguePoints=100)]
+        return self._page(tier, None, 1, entries)
+
+    async def get_league_page(self, queue_type, tier, division, page, region):
+        entries = [
+            LadderEntryDTO(tier=tier, rank=division, leaguePoints=league_points)
+            for league_points in (10, 90)
+        ]
+        return self._page(tier, division, page, entries if page == 1 else [])
+
+
+class LadderIngestTests(SimpleTestCase):
+    """Checkpointed ingest of a ladder, resumed after an interruption."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.riot_api = _LadderRiotAPI(fail_at=("GOLD", "II", 2))
+
+    def _ingest(self) -> LadderIngest:
+        return LadderIngest(
+            self.riot_api, Region.euw, "RANKED_SOLO_5x5", self.directory
+        )
+
+    def test_resume_after_interruption(self):
+        ingest = self._ingest()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(ingest.run())
+        self.assertFalse(ingest.path.exists())
+        # Scores written after the last checkpoint are dropped on resume.
+        with ingest.path.with_suffix(".part").open("ab") as part:
+            part.write(np.array([1, 2, 3], dtype=SCORE_DTYPE).tobytes())
+
+        count = asyncio.run(self._ingest().run())
+        players = len(RankScore.APEX_TIERS) + 2 * (
+            len(RankScore.TIERS) * len(RankScore.DIVISIONS)
+        )
+        self.assertEqual(count, players)
+        # No page was read twice.
+        self.assertEqual(len(self.riot_api.fetched), len(set(self.riot_api.fetched)))
+
+        ladder = np.load(ingest.path)
+        self.assertEqual(len(ladder), players)
+        self.assertTrue((np.diff(ladder) >= 0).all())
+        self.assertEqual(ladder[0], RankScore.of("IRON", "IV", 10))
+        self.assertEqual(ladder[-1], RankScore.APEX_BASE + 100)
+        self.assertEqual(sorted(self.directory.iterdir()), [ingest.path])
@@ -0,0 +1,26 @@
+"""URL configuration of the player tracker JSON API."""
+
+from django.urls import path
+
+from . import views
+
+app_name = "player_tracker"
+
+urlpatterns = [
+    path("leaderboard/", views.leaderboard, name="leaderboard"),
+    path(
+        "profiles/riot/<str:summoner_name>/<str:tagline>/",
+        views.profile_by_riot_id,
+        name="profile-by-riot-id",
+    ),
+    path(
+        "profiles/<str:discord_id>/",
+        views.profile_by_discord_id,
+        name="profile-by-discord-id",
+    ),
+    path(
+        "profiles/<str:discord_id>/history/",
+        views.rank_history,
+        name="rank-history",
+    ),
+]
@@ -1 +1,338 @@
-# Create your views here.
+"""Async JSON API for profiles, leaderboards and rank history."""
+
+import base64
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from .cache import CachedResponse, response_cache
+from .models import QueueRank, RankSnapshot, RiotAccount, SummonerProfile
+from .services.riot.constants import QueueType
+
+QUEUES = {"solo": QueueType.RANKED_SOLO, "flex": QueueType.RANKED_FLEX}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+Validator = Callable[[], Awaitable[tuple[datetime | None, str]]]
+Payload = Callable[[], Awaitable[dict]]
+
+
+class BadRequestError(Exception):
+    """Raised when query parameters are invalid."""
+
+
+def _serialize_rank(rank: QueueRank) -> dict:
+    """Serialize the rank of a profile in one queue."""
+    return {
+        "queue_type": rank.queue_type,
+        "tier": rank.tier,
+        "division": rank.division,
+        "league_points": rank.league_points,
+        "wins": rank.wins,
+        "losses": rank.losses,
+        "highest_achieved_tier": rank.highest_achieved_tier,
+        "score": rank.score,
+    }
+
+
+def _serialize_account(account: RiotAccount) -> dict:
+    """Serialize an account for the API, without its ranks."""
+    return {
+        "summoner_name": account.summoner_name,
+        "tagline": account.tagline,
+        "puuid": account.puuid,
+        "region": account.server_region,
+        "last_check_timestamp": account.last_check_timestamp,
+    }
+
+
+def _serialize_profile(profile: SummonerProfile) -> dict:
+    """Serialize a profile and its account for the API, without its ranks."""
+    return {"discord_id": profile.discord_id, **_serialize_account(profile.account)}
+
+
+def _encode_cursor(*values: object) -> str:
+    """Encode the sort key of the last returned row into an opaque cursor."""
+    raw = json.dumps(values, cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _cursor_value(value: object, expected: type) -> object:
+    """Check a decoded cursor value, parsing datetimes from ISO format."""
+    if expected is datetime and isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError as e:
+            raise BadRequestError("Invalid cursor") from e
+    # JSON booleans decode to bool, which is an int subclass.
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise BadRequestError("Invalid cursor")
+    return value
+
+
+def _decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decode a cursor produced by ``_encode_cursor``.
+
+    Args:
+        cursor: The encoded cursor.
+        types: Expected type of each value, datetimes are encoded in ISO format.
+
+    Raises:
+        BadRequestError: If the cursor doesn't hold one value of each type.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:
+        raise BadRequestError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise BadRequestError("Invalid cursor")
+    return tuple(
+        _cursor_value(value, expected)
+        for value, expected in zip(values, types, strict=True)
+    )
+
+
+def _page_size(request: HttpRequest) -> int:
+    """Read the ``limit`` query parameter."""
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError as e:
+        raise BadRequestError("limit must be an integer") from e
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _queue(request: HttpRequest) -> QueueType:
+    """Read the ``queue`` query parameter."""
+    try:
+        return QUEUES[request.GET.get("queue", "solo")]
+    except KeyError as e:
+        raise BadRequestError(f"queue must be one of {', '.join(QUEUES)}") from e
+
+
+async def _respond(
+    request: HttpRequest, validator: Validator, payload: Payload
+) -> HttpResponse:
+    """Answer a GET with conditional request support and response caching.
+
+    The ETag and Last-Modified headers derive from ``last_check_timestamp``, so
+    clients polling an unchanged resource get a 304 without the body being built.
+    """
+    key = request.get_full_path()
+    cached = response_cache.get(key)
+    if cached is None:
+        last_modified, version = await validator()
+        stamp = last_modified.isoformat() if last_modified else ""
+        digest = hashlib.sha1(f"{key}|{stamp}|{version}".encode()).hexdigest()
+        etag = f'"{digest}"'
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified_ts
+        )
+        if not_modified is not None:
+            return not_modified
+        body = json.dumps(await payload(), cls=DjangoJSONEncoder).encode()
+        cached = CachedResponse(body=body, etag=etag, last_modified=last_modified)
+        response_cache.set(key, cached)
+
+    last_modified_ts = (
+        int(cached.last_modified.timestamp()) if cached.last_modified else None
+    )
+    response = get_conditional_response(
+        request, etag=cached.etag, last_modified=last_modified_ts
+    )
+    if response is None:
+        response = HttpResponse(cached.body, content_type="application/json")
+    response["ETag"] = cached.etag
+    if last_modified_ts is not None:
+        response["Last-Modified"] = http_date(last_modified_ts)
+    return response
+
+
+def _bad_request(error: BadRequestError) -> JsonResponse:
+    """Render a 400 response."""
+    return JsonResponse({"error": str(error)}, status=400)
+
+
+async def _profile_response(
+    request: HttpRequest, queryset: QuerySet[SummonerProfile]
+) -> HttpResponse:
+    """Respond with the most recently checked profile of ``queryset``."""
+    profile = (
+        await queryset.select_related("account")
+        .prefetch_related("account__queue_ranks")
+        .order_by("-account__last_check_timestamp")
+        .afirst()
+    )
+    if profile is None:
+        raise Http404("Profile not found")
+
+    async def validator() -> tuple[datetime | None, str]:
+        return profile.account.last_check_timestamp, str(profile.account_id)
+
+    async def payload() -> dict:
+        return {
+            **_serialize_profile(profile),
+            "ranks": [
+                _serialize_rank(rank) for rank in profile.account.queue_ranks.all()
+            ],
+        }
+
+    return await _respond(request, validator, payload)
+
+
+@require_GET
+async def profile_by_discord_id(request: HttpRequest, discord_id: str) -> HttpResponse:
+    """Get the profile registered by a Discord user."""
+    return await _profile_response(
+        request, SummonerProfile.objects.filter(discord_id=discord_id)
+    )
+
+
+@require_GET
+async def profile_by_riot_id(
+    request: HttpRequest, summoner_name: str, tagline: str
+) -> HttpResponse:
+    """Get a profile by Riot ID (name#tagline), ignoring case."""
+    return await _profile_response(
+        request,
+        SummonerProfile.objects.filter(
+            account__riot_id_normalized=RiotAccount.normalize_riot_id(
+                summoner_name, tagline
+            )
+        ),
+    )
+
+
+def leaderboard_ranks(
+    queue_type: str, region: str | None = None
+) -> QuerySet[QueueRank]:
+    """Get the ranked queue ranks of tracked accounts, optionally in one region."""
+    tracked = SummonerProfile.objects.filter(
+        account=OuterRef("account"), is_active=True
+    )
+    ranks = QueueRank.objects.filter(Exists(tracked), queue_type=queue_type).exclude(
+        tier="UNRANKED"
+    )
+    if region:
+        ranks = ranks.filter(account__server_region=region.upper())
+    return ranks
+
+
+@require_GET
+async def leaderboard(request: HttpRequest) -> HttpResponse:
+    """List ranked tracked accounts from best to worst, each account once.
+
+    Query parameters:
+        queue: ``solo`` (default) or ``flex``.
+        region: Optional platform code, e.g. ``EUW1``.
+        limit: Page size.
+        cursor: ``next_cursor`` of the previous page.
+    """
+    try:
+        queue = _queue(request)
+        limit = _page_size(request)
+        cursor = request.GET.get("cursor")
+        after = _decode_cursor(cursor, int, int) if cursor else None
+    except BadRequestError as e:
+        return _bad_request(e)
+
+    ranks = leaderboard_ranks(queue.value, request.GET.get("region"))
+    # Fetched by the validator and reused by the payload.
+    rows: list[QueueRank] = []
+
+    async def validator() -> tuple[datetime | None, str]:
+        # Derived from the page alone: aggregating the whole ranked population
+        # on every page costs more than the page itself.
+        page = ranks.select_related("account")
+        if after is not None:
+            score, pk = after
+            page = page.filter(Q(score__lt=score) | Q(score=score, pk__gt=pk))
+        rows.extend([rank async for rank in page.order_by("-score", "pk")[: limit + 1]])
+        last_modified = max(
+            (rank.account.last_check_timestamp for rank in rows), default=None
+        )
+        return last_modified, ",".join(f"{rank.pk}:{rank.score}" for rank in rows)
+
+    async def payload() -> dict:
+        results = [
+            {**_serialize_account(rank.account), "rank": _serialize_rank(rank)}
+            for rank in rows[:limit]
+        ]
+        next_cursor = (
+            _encode_cursor(rows[limit - 1].score, rows[limit - 1].pk)
+            if len(rows) > limit
+            else None
+        )
+        return {"queue": queue.value, "results": results, "next_cursor": next_cursor}
+
+    return await _respond(request, validator, payload)
+
+
+@require_GET
+async def rank_history(request: HttpRequest, discord_id: str) -> HttpResponse:
+    """List the rank snapshots of a profile, newest first.
+
+    Query parameters:
+        queue: ``solo`` (default) or ``flex``.
+        limit: Page size.
+        cursor: ``next_cursor`` of the previous page.
+    """
+    try:
+        queue = _queue(request)
+        limit = _page_size(request)
+        cursor = request.GET.get("cursor")
+        after = _decode_cursor(cursor, datetime, int) if cursor else None
+    except BadRequestError as e:
+        return _bad_request(e)
+
+    profile = (
+        await SummonerProfile.objects.select_related("account")
+        .filter(discord_id=discord_id)
+        .afirst()
+    )
+    if profile is None:
+        raise Http404("Profile not found")
+
+    async def validator() -> tuple[datetime | None, str]:
+        return profile.account.last_check_timestamp, str(profile.account_id)
+
+    async def payload() -> dict:
+        snapshots = RankSnapshot.objects.filter(
+            account_id=profile.account_id, queue_type=queue.value
+        )
+        if after is not None:
+            created_at, pk = after
+            snapshots = snapshots.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+            )
+        rows = [
+            snapshot
+            async for snapshot in snapshots.order_by("-created_at", "-pk")[: limit + 1]
+        ]
+        results = [
+            {
+                "tier": snapshot.tier,
+                "division": snapshot.division,
+                "league_points": snapshot.league_points,
+                "wins": snapshot.wins,
+                "losses": snapshot.losses,
+                "created_at": snapshot.created_at,
+            }
+            for snapshot in rows[:limit]
+        ]
+        next_cursor = (
+            _encode_cursor(rows[limit - 1].created_at.isoformat(), rows[limit - 1].pk)
+            if len(rows) > limit
+            else None
+        )
+        return {"queue": queue.value, "results": results, "next_cursor": next_cursor}
+
+    return await _respond(request, validator, payload)
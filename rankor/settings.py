@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,13 +25,83 @@ env = environ.Env()
 environ.Env.read_env()
 RIOT_API_KEY = env("RIOT_API_KEY")  # os.getenv("RIOT_API_KEY")
 print(f"Loading settings... RIOT_API_KEY = {RIOT_API_KEY}")
+# Riot API keys as name=key pairs, e.g. "main=RGAPI-...,extra=RGAPI-...". Puuids and
+# summoner ids are encrypted per key and accounts remember the name of theirs, so
+# keep names stable when rotating keys. RIOT_API_KEY alone is the key named "default".
+# Keys Riot rejects are left out for RIOT_KEY_QUARANTINE_SECONDS.
+RIOT_API_KEYS = env.dict("RIOT_API_KEYS", default={}) or {"default": RIOT_API_KEY}
+RIOT_KEY_QUARANTINE_SECONDS = env.float("RIOT_KEY_QUARANTINE_SECONDS", default=600.0)
 
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 DISCORD_GUILD_ID = os.getenv("DEVELOPMENT_GUILD_ID", None)
 
+# Rank refresh
+# Profiles checked more recently than PROFILE_FRESHNESS_SECONDS are served from the
+# database. The refresh worker refreshes each account after an interval between the
+# min and max below, shorter the more active the account was lately; activity decays
+# with a half-life of ACTIVITY_HALF_LIFE_SECONDS.
+PROFILE_FRESHNESS_SECONDS = env.int("PROFILE_FRESHNESS_SECONDS", default=300)
+REFRESH_MIN_INTERVAL_SECONDS = env.int("REFRESH_MIN_INTERVAL_SECONDS", default=600)
+REFRESH_MAX_INTERVAL_SECONDS = env.int("REFRESH_MAX_INTERVAL_SECONDS", default=21600)
+ACTIVITY_HALF_LIFE_SECONDS = env.int("ACTIVITY_HALF_LIFE_SECONDS", default=86400)
+# Lookups count towards activity, the bot writes its counts out in one batch every
+# QUERY_FLUSH_SECONDS.
+QUERY_FLUSH_SECONDS = env.float("QUERY_FLUSH_SECONDS", default=30.0)
+# Shares of every Riot API key's budget, which add up to 1: the refresh workers get
+# REFRESH_WORKER_BUDGET_SHARE together, a ladder ingest LADDER_INGEST_BUDGET_SHARE
+# and the bot the rest, at least 0.1.
+REFRESH_WORKER_BUDGET_SHARE = env.float("REFRESH_WORKER_BUDGET_SHARE", default=0.6)
+LADDER_INGEST_BUDGET_SHARE = env.float("LADDER_INGEST_BUDGET_SHARE", default=0.1)
+BOT_BUDGET_SHARE = max(
+    1 - REFRESH_WORKER_BUDGET_SHARE - LADDER_INGEST_BUDGET_SHARE, 0.1
+)
+# Queued refresh jobs (!update): a worker that stops heartbeating loses its jobs after
+# the lease, failed jobs are retried with a doubling delay up to the max attempts.
+REFRESH_JOB_LEASE_SECONDS = env.float("REFRESH_JOB_LEASE_SECONDS", default=60.0)
+REFRESH_JOB_RETRY_SECONDS = env.float("REFRESH_JOB_RETRY_SECONDS", default=30.0)
+REFRESH_JOB_MAX_ATTEMPTS = env.int("REFRESH_JOB_MAX_ATTEMPTS", default=5)
+
+# JSON API response cache
+API_CACHE_TTL_SECONDS = env.float("API_CACHE_TTL_SECONDS", default=30.0)
+API_CACHE_MAX_ENTRIES = env.int("API_CACHE_MAX_ENTRIES", default=1024)
+
+# Players looked up with !rank without being tracked are cached, not stored.
+SCOUT_CACHE_TTL_SECONDS = env.float("SCOUT_CACHE_TTL_SECONDS", default=600.0)
+SCOUT_CACHE_MAX_ENTRIES = env.int("SCOUT_CACHE_MAX_ENTRIES", default=2048)
+# Players looked up at once by !compare and !team.
+LOOKUP_CONCURRENCY = env.int("LOOKUP_CONCURRENCY", default=4)
+
+# Most accounts the admin "Refresh selected from Riot" action queues at once.
+ADMIN_REFRESH_MAX_PROFILES = env.int("ADMIN_REFRESH_MAX_PROFILES", default=200)
+
+# Bot sharding, leave DISCORD_SHARD_COUNT unset to let Discord pick the shard count.
+DISCORD_SHARD_COUNT = env.int("DISCORD_SHARD_COUNT", default=None)
+
+# Live game poller. Players in game are polled every LIVE_POLL_MIN_SECONDS, players
+# active in the last two hours every LIVE_POLL_ACTIVE_SECONDS, idle ones back off
+# up to LIVE_POLL_MAX_SECONDS. Set LIVE_ANNOUNCE_CHANNEL_ID to announce new games.
+LIVE_POLL_ENABLED = env.bool("LIVE_POLL_ENABLED", default=True)
+LIVE_POLL_MIN_SECONDS = env.float("LIVE_POLL_MIN_SECONDS", default=60.0)
+LIVE_POLL_ACTIVE_SECONDS = env.float("LIVE_POLL_ACTIVE_SECONDS", default=180.0)
+LIVE_POLL_MAX_SECONDS = env.float("LIVE_POLL_MAX_SECONDS", default=1800.0)
+LIVE_POLL_BATCH_SIZE = env.int("LIVE_POLL_BATCH_SIZE", default=10)
+LIVE_ANNOUNCE_CHANNEL_ID = env.int("LIVE_ANNOUNCE_CHANNEL_ID", default=None)
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Command profiling, share of bot commands sampled (0 disables it). Can be changed
+# at runtime with the owner-only !profiling command.
+COMMAND_PROFILING_SAMPLE_RATE = env.float("COMMAND_PROFILING_SAMPLE_RATE", default=0.0)
+COMMAND_PROFILING_DIR = env("COMMAND_PROFILING_DIR", default=str(BASE_DIR / "profiles"))
+
+# Sorted ladder score arrays written by ingest_ladder, read by !rank for percentiles.
+LADDER_DIR = env("LADDER_DIR", default=str(BASE_DIR / "ladder"))
+
+# Data Dragon bundles written by fetch_static_data, newer versions are picked up
+# by the running bot every STATIC_DATA_RELOAD_SECONDS.
+STATIC_DATA_DIR = env("STATIC_DATA_DIR", default=str(BASE_DIR / "static_data"))
+STATIC_DATA_RELOAD_SECONDS = env.float("STATIC_DATA_RELOAD_SECONDS", default=300.0)
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -91,12 +162,61 @@ WSGI_APPLICATION = "rankor.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# The bot, the refresh worker and the web process all write concurrently.
+# SQLite runs in WAL mode with IMMEDIATE transactions so writers queue on the busy
+# timeout instead of failing with "database is locked". Set DATABASE_BACKEND=postgres
+# (requires "psycopg[pool]") for deployments that outgrow a single SQLite file.
+DATABASE_BACKEND = env("DATABASE_BACKEND", default="sqlite")
+
+if DATABASE_BACKEND == "postgres":
+    # Django's psycopg pool does not support persistent connections, fall back to
+    # CONN_MAX_AGE when pooling is disabled.
+    POSTGRES_POOL = env.bool("POSTGRES_POOL", default=True)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": env("POSTGRES_DB", default="rankor"),
+            "USER": env("POSTGRES_USER", default="rankor"),
+            "PASSWORD": env("POSTGRES_PASSWORD", default=""),
+            "HOST": env("POSTGRES_HOST", default="localhost"),
+            "PORT": env("POSTGRES_PORT", default="5432"),
+            "CONN_MAX_AGE": 0 if POSTGRES_POOL else env.int("CONN_MAX_AGE", default=60),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "pool": {
+                        "min_size": env.int("POSTGRES_POOL_MIN_SIZE", default=2),
+                        "max_size": env.int("POSTGRES_POOL_MAX_SIZE", default=10),
+                        "timeout": env.float("POSTGRES_POOL_TIMEOUT", default=10.0),
+                    }
+                }
+                if POSTGRES_POOL
+                else {}
+            ),
+        }
+    }
+elif DATABASE_BACKEND == "sqlite":
+    SQLITE_BUSY_TIMEOUT_MS = env.int("SQLITE_BUSY_TIMEOUT_MS", default=5000)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": env("SQLITE_PATH", default=str(BASE_DIR / "db.sqlite3")),
+            "OPTIONS": {
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+                "transaction_mode": "IMMEDIATE",
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS};"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA cache_size=-20000;"
+                    "PRAGMA temp_store=MEMORY;"
+                    "PRAGMA mmap_size=134217728;"
+                ),
+            },
+        }
     }
-}
+else:
+    raise ImproperlyConfigured(f"Unknown DATABASE_BACKEND {DATABASE_BACKEND!r}")
 
 
 # Password validation